@@ -0,0 +1,82 @@
+"""
+benchmarks/bench_sqlite_load.py
+-------------------------------
+Compare rows/sec of SQLite load paths for a synthetic messages table:
+
+- to_sql:        pandas to_sql through a fresh SQLAlchemy engine (previous path)
+- sink_append:   SQLiteSink.append (pooled connection, WAL, executemany)
+- sink_upsert:   SQLiteSink.upsert (keyed merge with unique index)
+- append_fts:    SQLiteSink.append with the opt-in FTS5 search index, whose
+                 second copy of the text costs more than half the append rate
+
+Usage:
+    python -m benchmarks.bench_sqlite_load --rows 1000000 --chunk 100000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from etl.load.sqlite_sink import SQLiteSink
+
+
+def make_messages(rows: int, offset: int = 0) -> pd.DataFrame:
+    """Build a messages-shaped DataFrame with unique message ids."""
+    ids = range(offset, offset + rows)
+    return pd.DataFrame({
+        "email_id": [f"sample_{i}" for i in ids],
+        "message_id": [str(uuid.UUID(int=i)) for i in ids],
+        "timestamp": "2025-09-14T05:19:14.864688Z",
+        "speaker_name": "Bob Demo",
+        "speaker_contact": "bob@example.com",
+        "message": [f"Hello team, this is message number {i}." for i in ids],
+        "with_attachment": [i % 2 == 0 for i in ids],
+        "batch_dt": "2025-09-14",
+    })
+
+
+def run(name: str, load, rows: int, chunk: int) -> float:
+    """Load ``rows`` rows in chunks and return rows/sec (frame building excluded)."""
+    elapsed = 0.0
+    for offset in range(0, rows, chunk):
+        df = make_messages(min(chunk, rows - offset), offset)
+        start = time.perf_counter()
+        load(df)
+        elapsed += time.perf_counter() - start
+    rate = rows / elapsed
+    print(f"{name:<12} {rate:12,.0f} rows/sec  ({elapsed:.2f}s)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite load paths")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows to load per path")
+    parser.add_argument("--chunk", type=int, default=100_000, help="Rows per load call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        legacy_db = os.path.join(folder, "legacy.db")
+        run("to_sql", lambda df: df.to_sql(
+            "messages", create_engine(f"sqlite:///{legacy_db}"), if_exists="append", index=False
+        ), args.rows, args.chunk)
+
+        sink = SQLiteSink(os.path.join(folder, "append.db"), search_index=False)
+        run("sink_append", lambda df: sink.append(df, "messages"), args.rows, args.chunk)
+        sink.close()
+
+        sink = SQLiteSink(os.path.join(folder, "upsert.db"), search_index=False)
+        run("sink_upsert", lambda df: sink.upsert(df, "messages"), args.rows, args.chunk)
+        sink.close()
+
+        sink = SQLiteSink(os.path.join(folder, "append_fts.db"), search_index=True)
+        run("append_fts", lambda df: sink.append(df, "messages"), args.rows, args.chunk)
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+benchmarks/bench_suite.py
+-------------------------
+Scale benchmark suite built on examples/generate_sample_eml.py.
+
+For every corpus size it generates a corpus (the simple sample emails, or
+the seeded load-test corpus with --realistic), then measures files/sec,
+MB/sec and peak RSS of:
+
+- parse_email:  EmailParser.parse_email in one process
+- parallel:     process_files_parallel at each worker count
+- sink:         Storage.write into each sink (csv, sqlite, parquet)
+
+Each case runs in a freshly spawned process so peak RSS is per case.
+For the parallel case, worker peak RSS is reported separately from the
+parent's. Results are written as JSON (with the git commit) so runs can be
+compared across commits.
+
+Usage:
+    python -m benchmarks.bench_suite --sizes 1000 --workers 1,2,4
+    python -m benchmarks.bench_suite --sizes 1000,100000,1000000 --body-bytes 4096 --html \\
+        --attachment-every 3 --attachment-bytes 65536 --output bench_results.json
+    python -m benchmarks.bench_suite --sizes 100000 --realistic --seed 7 --malformed-rate 0.01
+    python -m benchmarks.bench_suite --sizes 1000 --compare bench_results.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+from examples.generate_sample_eml import CorpusSpec, generate_corpus, generate_eml
+from etl.core.context import ETLContext
+from etl.core.metrics import StageMetrics, peak_rss_kb
+from etl.extract.parser import EmailParser
+from etl.load.storage import Storage
+from etl.transform.enrichments import enrich_messages, enrich_attachments
+from etl.transform.processor import process_files_parallel
+
+MB = 1024 * 1024
+SINKS = ("csv", "sqlite", "parquet")
+
+
+def _corpus_bytes(folder: str, limit: int = None) -> tuple:
+    """Return (files, total bytes) of the corpus, optionally only the first ``limit`` files."""
+    files = sorted(Path(folder).rglob("*.eml"))[:limit]
+    return files, sum(file.stat().st_size for file in files)
+
+
+def _dir_bytes(folder: str) -> int:
+    return sum(file.stat().st_size for file in Path(folder).rglob("*") if file.is_file())
+
+
+def _result(benchmark: str, files: int, input_bytes: int, seconds: float, **extra) -> dict:
+    return {
+        "benchmark": benchmark,
+        "files": files,
+        "bytes": input_bytes,
+        "seconds": round(seconds, 4),
+        "files_per_sec": round(files / seconds, 1) if seconds else None,
+        "mb_per_sec": round(input_bytes / MB / seconds, 2) if seconds else None,
+        "peak_rss_kb": peak_rss_kb(),
+        **extra,
+    }
+
+
+# --------------------------------------------------------------------
+# Cases (each runs in its own spawned process)
+# --------------------------------------------------------------------
+def bench_parse_email(folder: str, limit: int) -> dict:
+    """EmailParser.parse_email over the first ``limit`` files in this process."""
+    files, input_bytes = _corpus_bytes(folder, limit)
+    parser = EmailParser()
+    start = time.perf_counter()
+    for file in files:
+        parser.parse_email(str(file))
+    return _result("parse_email", len(files), input_bytes, time.perf_counter() - start)
+
+
+def bench_parallel(folder: str, workers: int) -> dict:
+    """process_files_parallel over the whole corpus with ``workers`` processes."""
+    _, input_bytes = _corpus_bytes(folder)
+    metrics = StageMetrics("bench")
+    start = time.perf_counter()
+    messages_df, _, file_count = process_files_parallel(folder, max_workers=workers, metrics=metrics)
+    elapsed = time.perf_counter() - start
+
+    df = metrics.to_frame()
+    parse = df[df["stage"] == "parse"]
+    worker_peak = parse.loc[parse["worker"] != "all", "peak_rss_kb"].max() if not parse.empty else None
+    return _result(
+        "parallel", file_count, input_bytes, elapsed, workers=workers, rows=len(messages_df),
+        worker_peak_rss_kb=None if pd.isna(worker_peak) else int(worker_peak),
+    )
+
+
+def bench_sink(folder: str, sink: str, workers: int) -> dict:
+    """
+    Storage.write of the parsed and enriched corpus into one sink.
+
+    Parsing is not timed; bytes are the in-memory size of the written frames.
+    """
+    messages_df, attachments_df, file_count = process_files_parallel(folder, max_workers=workers)
+    messages_df = enrich_messages(messages_df)
+    attachments_df = enrich_attachments(attachments_df)
+    frame_bytes = int(
+        messages_df.memory_usage(deep=True).sum() + attachments_df.memory_usage(deep=True).sum()
+    )
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        ctx = ETLContext.from_args(folder, output_dir)
+        storage = Storage(ctx)
+        start = time.perf_counter()
+        storage.write(attachments_df, "attachments", sinks=(sink,))
+        storage.write(messages_df, "messages", sinks=(sink,))
+        storage.close()
+        elapsed = time.perf_counter() - start
+        output_bytes = _dir_bytes(output_dir)
+
+    return _result(
+        "sink", file_count, frame_bytes, elapsed, sink=sink,
+        rows=len(messages_df) + len(attachments_df), output_bytes=output_bytes,
+    )
+
+
+def run_isolated(func, *args) -> dict:
+    """Run one case in a fresh interpreter so its peak RSS is not inherited."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(func, *args).result()
+
+
+# --------------------------------------------------------------------
+# Reporting
+# --------------------------------------------------------------------
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def case_key(result: dict) -> tuple:
+    return (result["size"], result["benchmark"], result.get("workers"), result.get("sink"))
+
+
+def print_result(result: dict, baseline: dict = None):
+    label = result["benchmark"]
+    if "workers" in result:
+        label += f" w={result['workers']}"
+    if "sink" in result:
+        label += f" {result['sink']}"
+    line = (
+        f"{result['size']:>9} {label:<18} {result['files_per_sec'] or 0:10.1f} files/s "
+        f"{result['mb_per_sec'] or 0:8.2f} MB/s"
+    )
+    if result.get("peak_rss_kb"):
+        line += f"  peak {result['peak_rss_kb']:>8} KiB"
+    if result.get("worker_peak_rss_kb"):
+        line += f" (workers {result['worker_peak_rss_kb']} KiB)"
+    if baseline and baseline.get("files_per_sec") and result["files_per_sec"]:
+        line += f"  x{result['files_per_sec'] / baseline['files_per_sec']:.2f} vs {baseline['commit']}"
+    print(line)
+
+
+def load_baseline(path: str, corpus: dict) -> dict:
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    if report["meta"].get("corpus") != corpus:
+        print(f"Warning: {path} was measured on a different corpus ({report['meta'].get('corpus')})")
+    commit = report["meta"].get("commit")
+    return {case_key(result): {**result, "commit": commit} for result in report["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scale benchmark suite")
+    parser.add_argument("--sizes", type=str, default="1000", help="Comma-separated corpus sizes (e.g. 1000,100000,1000000)")
+    parser.add_argument("--workers", type=str, default="1,2,4", help="Comma-separated worker counts for the parallel case")
+    parser.add_argument("--sinks", type=str, default=",".join(SINKS), help="Comma-separated sinks to benchmark")
+    parser.add_argument("--parse-limit", type=int, default=10000, help="Max files for the single-process parse_email case")
+    parser.add_argument("--html", action="store_true", help="Generate text/html bodies")
+    parser.add_argument("--body-bytes", type=int, default=0, help="Extra filler bytes per body")
+    parser.add_argument("--attachment-every", type=int, default=2, help="Attach a file to every n-th email (0 = none)")
+    parser.add_argument("--attachment-bytes", type=int, default=0, help="Extra filler bytes per attachment")
+    parser.add_argument("--realistic", action="store_true", help="Use the seeded load-test corpus generator")
+    parser.add_argument("--seed", type=int, default=0, help="Load-test corpus seed (--realistic)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of malformed files (--realistic)")
+    parser.add_argument("--output", type=str, default="bench_results.json", help="JSON results file")
+    parser.add_argument("--compare", type=str, default=None, help="Previous JSON results to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    worker_counts = [int(workers) for workers in args.workers.split(",")]
+    sinks = [sink.strip() for sink in args.sinks.split(",") if sink.strip()]
+    if args.realistic:
+        spec = CorpusSpec(seed=args.seed, malformed_rate=args.malformed_rate)
+        if args.html:
+            spec = spec._replace(html_rate=1.0)
+        corpus = {"generator": "corpus", **spec._asdict()}
+    else:
+        corpus = {
+            "generator": "sample",
+            "html": args.html,
+            "body_bytes": args.body_bytes,
+            "attachment_every": args.attachment_every,
+            "attachment_bytes": args.attachment_bytes,
+        }
+    baseline = load_baseline(args.compare, corpus) if args.compare else {}
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "corpus": corpus,
+        },
+        "results": [],
+    }
+
+    def record(size: int, result: dict):
+        result = {"size": size, **result}
+        report["results"].append(result)
+        print_result(result, baseline.get(case_key(result)))
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            start = time.perf_counter()
+            with redirect_stdout(StringIO()):
+                if args.realistic:
+                    generate_corpus(folder, size, spec)
+                else:
+                    generate_eml(
+                        folder, count=size, html=args.html, body_bytes=args.body_bytes,
+                        attachment_every=args.attachment_every, attachment_bytes=args.attachment_bytes,
+                        verbose=False,
+                    )
+            _, corpus_bytes = _corpus_bytes(folder)
+            record(size, _result("generate", size, corpus_bytes, time.perf_counter() - start, peak_rss_kb=None))
+
+            record(size, run_isolated(bench_parse_email, folder, args.parse_limit))
+            for workers in worker_counts:
+                record(size, run_isolated(bench_parallel, folder, workers))
+            for sink in sinks:
+                record(size, run_isolated(bench_sink, folder, sink, max(worker_counts)))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
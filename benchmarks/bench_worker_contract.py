@@ -0,0 +1,101 @@
+"""
+benchmarks/bench_worker_contract.py
+-----------------------------------
+Compare files/sec of the worker result transports:
+
+- dataframes: one future per file returning two DataFrames (the previous
+  worker contract's transport)
+- records:    batched tasks returning plain row tuples (process_files_parallel)
+
+Both sides parse with the current EmailParser.parse_records and the default
+HTML engine, so the numbers isolate the transport. They are not a
+before/after of the whole parse path: the previous parser (full
+email.parser walk, BeautifulSoup on every body) is not reproduced here.
+
+Usage:
+    python -m benchmarks.bench_worker_contract --count 5000 --workers 4
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+from examples.generate_sample_eml import generate_eml
+from etl.extract.parser import EmailParser, MESSAGE_COLUMNS, ATTACHMENT_COLUMNS
+from etl.transform.processor import process_files_parallel
+
+
+def process_single_file(file_path: str):
+    """
+    The previous per-file worker's transport: a fresh parser per file and two
+    plain DataFrames (no schema dtype coercion) pickled back per future. It
+    parses with the current parse_records, not the previous parse_email.
+    """
+    try:
+        email_id = Path(file_path).stem
+        message_rows, attachment_rows = EmailParser().parse_records(file_path)
+        messages_df = pd.DataFrame.from_records(message_rows, columns=MESSAGE_COLUMNS)
+        attachments_df = pd.DataFrame.from_records(attachment_rows, columns=ATTACHMENT_COLUMNS)
+
+        # Ensure email_id consistency
+        if not messages_df.empty:
+            messages_df["email_id"] = email_id
+        if not attachments_df.empty:
+            attachments_df["email_id"] = email_id
+
+        return messages_df, attachments_df
+
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+        return pd.DataFrame(), pd.DataFrame()
+
+
+def run_dataframe_contract(folder: str, max_workers: int) -> int:
+    """Per-file DataFrames pickled back and concatenated (previous transport)."""
+    file_list = list(Path(folder).glob("*.eml"))
+    messages_list = []
+    attachments_list = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(process_single_file, str(file)) for file in file_list]
+        for future in futures:
+            messages_df, attachments_df = future.result()
+            if not messages_df.empty:
+                messages_list.append(messages_df)
+            if not attachments_df.empty:
+                attachments_list.append(attachments_df)
+    messages_df = pd.concat(messages_list, ignore_index=True)
+    pd.concat(attachments_list, ignore_index=True)
+    return len(messages_df)
+
+
+def run_records_contract(folder: str, max_workers: int) -> int:
+    """Batched row tuples materialized once in the parent (current transport)."""
+    messages_df, _, _ = process_files_parallel(folder, max_workers=max_workers)
+    return len(messages_df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark worker result transports (same parser on both sides)")
+    parser.add_argument("--count", type=int, default=5000, help="Number of .eml files to generate")
+    parser.add_argument("--workers", type=int, default=4, help="Number of parallel workers")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        with redirect_stdout(StringIO()):
+            generate_eml(folder, count=args.count)
+
+        for name, func in (("dataframes", run_dataframe_contract), ("records", run_records_contract)):
+            start = time.perf_counter()
+            rows = func(folder, args.workers)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<12} {args.count / elapsed:10.1f} files/sec  ({rows} messages, {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
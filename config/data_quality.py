@@ -0,0 +1,50 @@
+"""
+config/data_quality.py
+----------------------
+Declarative data quality rules, evaluated per chunk by
+etl/transform/data_quality.py.
+
+Rule fields:
+- name:       unique rule name (key of the dq_results rows)
+- check:      not_null | unique | regex | range | reference
+- columns:    checked column(s); a unique rule checks the combination
+- pattern:    regex (full match) for ``regex`` rules
+- min / max:  bounds for ``range`` rules (ISO-8601, or "now" for the run time)
+- ref_table / ref_column: referenced table and column for ``reference`` rules
+
+Null values only fail ``not_null`` rules; the other checks skip them.
+"""
+
+from typing import List, Dict
+
+UUID_PATTERN = r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+EMAIL_PATTERN = r"[^@\s]+@[^@\s]+\.[^@\s]+"
+
+# --------------------------------------------------------------------
+# Rules per table
+# --------------------------------------------------------------------
+DQ_RULES: Dict[str, List[Dict]] = {
+    "messages": [
+        {"name": "messages_required_fields", "check": "not_null",
+         "columns": ["email_id", "timestamp", "speaker_name", "speaker_contact", "message_id"]},
+        {"name": "messages_unique_message", "check": "unique", "columns": ["email_id", "message_id"]},
+        {"name": "messages_message_id_format", "check": "regex", "columns": ["message_id"], "pattern": UUID_PATTERN},
+        {"name": "messages_speaker_contact_format", "check": "regex", "columns": ["speaker_contact"],
+         "pattern": EMAIL_PATTERN},
+        {"name": "messages_timestamp_range", "check": "range", "columns": ["timestamp"],
+         "min": "2000-01-01T00:00:00Z", "max": "now"},
+    ],
+    "attachments": [
+        {"name": "attachments_required_fields", "check": "not_null",
+         "columns": ["email_id", "attachment_name", "message_id"]},
+        {"name": "attachments_unique_name", "check": "unique", "columns": ["email_id", "attachment_name"]},
+        {"name": "attachments_message_exists", "check": "reference", "columns": ["message_id"],
+         "ref_table": "messages", "ref_column": "message_id"},
+    ],
+}
+
+# Columns recorded in the sample of offending rows
+DQ_SAMPLE_COLUMNS: Dict[str, List[str]] = {
+    "messages": ["email_id", "message_id"],
+    "attachments": ["email_id", "attachment_name"],
+}
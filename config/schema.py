@@ -1,7 +1,7 @@
 """
 config/schema.py
 -----------------
-Defines table schemas for parsed email messages and attachments.
+Defines table schemas, keys and indexes for parsed email messages and attachments.
 """
 
 from typing import List, Dict
@@ -34,6 +34,7 @@ ATTACHMENT_SCHEMA: List[Dict[str, str]] = [
     {"name": "email_id", "type": "STRING"},
     {"name": "attachment_name", "type": "STRING"},
     {"name": "content_id", "type": "STRING"},
+    {"name": "content_type", "type": "STRING"},
     {"name": "message_id", "type": "STRING"},
     {"name": "stream_id", "type": "STRING"},
     {"name": "batch_dt", "type": "DATE"},
@@ -43,3 +44,30 @@ ATTACHMENT_SCHEMA: List[Dict[str, str]] = [
     {"name": "entity", "type": "STRING"},
     {"name": "last_ingestion_ts", "type": "TIMESTAMP"},
 ]
+
+# --------------------------------------------------------------------
+# Table keys & indexes (used by upsert loads)
+# --------------------------------------------------------------------
+TABLE_SCHEMAS: Dict[str, List[Dict[str, str]]] = {
+    "messages": MESSAGE_SCHEMA,
+    "attachments": ATTACHMENT_SCHEMA,
+}
+
+TABLE_KEYS: Dict[str, List[str]] = {
+    "messages": ["message_id"],
+    "attachments": ["email_id", "attachment_name"],
+}
+
+TABLE_INDEXES: Dict[str, List[List[str]]] = {
+    "messages": [["email_id"], ["batch_dt"]],
+    "attachments": [["message_id"], ["batch_dt"]],
+}
+
+# --------------------------------------------------------------------
+# Low-cardinality columns held as pandas categoricals in memory
+# (see etl/core/dtypes.py)
+# --------------------------------------------------------------------
+TABLE_CATEGORICALS: Dict[str, List[str]] = {
+    "messages": ["speaker_name", "speaker_contact", "batch_dt"],
+    "attachments": ["content_type", "batch_dt"],
+}
@@ -34,6 +34,42 @@ HISTORY_DATASET = os.getenv("BQ_HISTORY_DATASET", "history_dataset")
 # ETL runtime config
 # --------------------------------------------------------------------
 MAX_PARALLELISM = int(os.getenv("MAX_PARALLELISM", 4))
+RECURSIVE_INPUT = os.getenv("RECURSIVE_INPUT", "true").lower() == "true"  # scan input sub-directories
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", 0))  # this host's shard (0-based)
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 1))  # hosts splitting the input by hash of email_id
+QUEUE_CLAIM_SIZE = int(os.getenv("QUEUE_CLAIM_SIZE", 500))  # files leased per work-queue claim
+QUEUE_LEASE_SECONDS = int(os.getenv("QUEUE_LEASE_SECONDS", 300))  # lease length; renewed by a heartbeat
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", 3))  # expired leases before a file is marked FAILED
+QUEUE_POLL_SECONDS = float(os.getenv("QUEUE_POLL_SECONDS", 5))  # idle wait while other workers hold leases
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 0))  # files per streaming chunk (0 = load everything at once)
+PARSE_BATCH_SIZE = int(os.getenv("PARSE_BATCH_SIZE", 64))  # max files per worker task
+PARSE_BATCH_BYTES = int(os.getenv("PARSE_BATCH_BYTES", 8 * 1024 * 1024))  # target bytes per worker task
+MAX_INFLIGHT_TASKS = int(os.getenv("MAX_INFLIGHT_TASKS", 0))  # outstanding worker tasks (0 = 2 x workers)
+MP_START_METHOD = os.getenv("MP_START_METHOD", "forkserver")  # forkserver | spawn | fork (fork is unsafe with writer threads)
+STAGED = os.getenv("STAGED", "false").lower() == "true"  # overlap extract/transform/load in concurrent stages
+STAGE_QUEUE_SIZE = int(os.getenv("STAGE_QUEUE_SIZE", 2))  # chunks buffered between stages
+ORDERED_OUTPUT = os.getenv("ORDERED_OUTPUT", "false").lower() == "true"  # keep rows in file order
+HTML_TEXT_ENGINE = os.getenv("HTML_TEXT_ENGINE", "fast")  # fast | bs4
+ATTACHMENT_MODE = os.getenv("ATTACHMENT_MODE", "full")  # full | metadata (skip attachment payloads)
+INCREMENTAL = os.getenv("INCREMENTAL", "false").lower() == "true"  # skip files already in the ingest manifest
+SQLITE_LOAD_MODE = os.getenv("SQLITE_LOAD_MODE", "append")  # append | upsert (keyed merge, no duplicates)
+SQLITE_UPSERT_DEDUPLICATE = os.getenv("SQLITE_UPSERT_DEDUPLICATE", "false").lower() == "true"  # first upsert deletes keys repeated by append loads (last row kept) instead of failing
+OUTPUT_SINKS = [s.strip() for s in os.getenv("OUTPUT_SINKS", "csv,sqlite").split(",") if s.strip()]  # csv | sqlite | parquet
+CSV_COMPRESSION = os.getenv("CSV_COMPRESSION", "none")  # none | gzip | bz2 | lzma
+CSV_ROTATE_BYTES = int(os.getenv("CSV_ROTATE_BYTES", 0))  # start a new CSV file after N uncompressed bytes (0 = never)
+CSV_ROTATE_BY_BATCH_DT = os.getenv("CSV_ROTATE_BY_BATCH_DT", "false").lower() == "true"  # one CSV file per batch_dt
+SQLITE_BATCH_ROWS = int(os.getenv("SQLITE_BATCH_ROWS", 50000))  # rows per executemany call
+SQLITE_SEARCH_INDEX = os.getenv("SQLITE_SEARCH_INDEX", "false").lower() == "true"  # maintain the messages_fts full-text index (cuts append throughput by more than half)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")  # use DELETE on network filesystems
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 65536))
+STRING_DTYPE_STORAGE = os.getenv("STRING_DTYPE_STORAGE", "pyarrow")  # pyarrow | python (in-memory string columns)
+DTYPE_MEMORY_REPORT = os.getenv("DTYPE_MEMORY_REPORT", "false").lower() == "true"  # log frame memory before/after dtype coercion
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")  # Prometheus textfile path for stage metrics ("" = off)
+VALIDATE_ATTACHMENT_LINKS = os.getenv("VALIDATE_ATTACHMENT_LINKS", "false").lower() == "true"  # cross-check parse-time linkage with a global merge
+DQ_SAMPLE_SIZE = int(os.getenv("DQ_SAMPLE_SIZE", 20))  # offending keys kept per data quality rule
+PROFILE = os.getenv("PROFILE", "false").lower() == "true"  # cProfile parent + workers into <output>/profile/<batch_id>
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", 40))  # functions listed in the profile report
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
 # --------------------------------------------------------------------
@@ -4,8 +4,16 @@ etl/core/context.py
 Define a single immutable context object to represent runtime-scoped ETL environment.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import datetime
 import os
+import uuid
+
+
+def new_batch_id() -> str:
+    """Return a sortable, unique id for one pipeline run."""
+    return f"{datetime.now():%Y%m%d%H%M%S}_{uuid.uuid4().hex[:8]}"
+
 
 @dataclass
 class ETLContext:
@@ -13,9 +21,22 @@ class ETLContext:
     input_dir: str
     output_dir: str
     db_path: str
+    batch_id: str = field(default_factory=new_batch_id)
+    shard_index: int = 0
+    shard_count: int = 1
 
     @classmethod
-    def from_args(cls, input_dir: str, output_dir: str):
+    def from_args(cls, input_dir: str, output_dir: str, shard_index: int = 0, shard_count: int = 1,
+                  create_dirs: bool = True):
+        """
+        Build the context; sharded runs (shard_count > 1) write to their own
+        ``shard=<index>-of-<count>`` partition under output_dir. Read-only
+        commands pass ``create_dirs=False`` to leave the filesystem untouched.
+        """
+        if shard_count > 1:
+            output_dir = os.path.join(output_dir, f"shard={shard_index:03d}-of-{shard_count:03d}")
         db_path = os.path.join(output_dir, "etl_demo.db")
-        os.makedirs(output_dir, exist_ok=True)
-        return cls(input_dir=input_dir, output_dir=output_dir, db_path=db_path)
+        if create_dirs:
+            os.makedirs(output_dir, exist_ok=True)
+        return cls(input_dir=input_dir, output_dir=output_dir, db_path=db_path,
+                   shard_index=shard_index, shard_count=shard_count)
@@ -0,0 +1,97 @@
+"""
+etl/core/dtypes.py
+------------------
+Schema-driven in-memory dtypes for message and attachment frames.
+
+- Column types come from config/schema.py (TABLE_SCHEMAS, TABLE_CATEGORICALS)
+- STRING: compact string dtype (Arrow-backed when pyarrow is installed)
+- Low-cardinality columns: category
+- TIMESTAMP: tz-aware datetime64 (UTC); BOOLEAN: nullable boolean
+- Applied once when rows are materialized into DataFrames; sinks format
+  timestamps back to text only where they need it
+"""
+
+import pandas as pd
+from pandas.api import types as ptypes
+from etl.core.logger import get_logger
+from etl.core.utils import format_timestamps, parse_utc_timestamps
+from config import settings
+from config.schema import TABLE_SCHEMAS, TABLE_CATEGORICALS
+
+logger = get_logger(__name__)
+
+def string_dtype(storage: str = settings.STRING_DTYPE_STORAGE) -> pd.StringDtype:
+    """Nullable string dtype; falls back to Python storage without pyarrow."""
+    if storage == "pyarrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            storage = "python"
+    return pd.StringDtype(storage)
+
+
+def column_dtypes(table: str) -> dict:
+    """Return {column: pandas dtype} for a table declared in config/schema.py."""
+    categoricals = set(TABLE_CATEGORICALS.get(table, []))
+    dtypes = {}
+    for col in TABLE_SCHEMAS.get(table, []):
+        name = col["name"]
+        if name in categoricals:
+            dtypes[name] = "category"
+        elif col["type"] == "TIMESTAMP":
+            dtypes[name] = pd.DatetimeTZDtype(tz="UTC")
+        elif col["type"] == "BOOLEAN":
+            dtypes[name] = "boolean"
+        else:
+            dtypes[name] = string_dtype()
+    return dtypes
+
+
+def coerce_frame(df: pd.DataFrame, table: str, columns: list = None) -> pd.DataFrame:
+    """
+    Convert the frame's schema columns to their in-memory dtypes.
+
+    Columns already of the target dtype and columns not declared in the
+    schema are left as they are. ``columns`` limits the conversion.
+    """
+    dtypes = column_dtypes(table)
+    for name in columns or list(df.columns):
+        dtype = dtypes.get(name)
+        if dtype is None or name not in df.columns:
+            continue
+        series = df[name]
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            if not ptypes.is_datetime64_any_dtype(series):
+                df[name] = parse_utc_timestamps(series)
+        elif series.dtype != dtype:
+            df[name] = series.astype(dtype)
+    return df
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    """Deep memory usage of a frame in bytes."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def apply_schema_dtypes(df: pd.DataFrame, table: str, report: bool = settings.DTYPE_MEMORY_REPORT) -> pd.DataFrame:
+    """Coerce a freshly materialized frame; with ``report`` log its memory before/after."""
+    if not report:
+        return coerce_frame(df, table)
+
+    before = frame_bytes(df)
+    df = coerce_frame(df, table)
+    after = frame_bytes(df)
+    saved = 1 - after / before if before else 0.0
+    logger.info(
+        f"Memory of {table} ({len(df)} rows): {before / 1024 / 1024:.1f} MiB -> "
+        f"{after / 1024 / 1024:.1f} MiB ({saved:.0%} saved)"
+    )
+    return df
+
+
+def timestamps_to_text(df: pd.DataFrame) -> pd.DataFrame:
+    """Return the frame with tz-aware datetime columns formatted as text (see format_timestamps)."""
+    columns = [col for col in df.columns if isinstance(df[col].dtype, pd.DatetimeTZDtype)]
+    if not columns:
+        return df
+    return df.assign(**{col: format_timestamps(df[col]) for col in columns})
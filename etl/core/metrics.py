@@ -0,0 +1,193 @@
+"""
+etl/core/metrics.py
+-------------------
+Lightweight per-stage instrumentation.
+
+- Wall time, CPU time, rows, bytes read and peak RSS per stage
+- Per-worker parse timings reported back from the process pool
+- Persisted to the ``stage_metrics`` SQLite table next to batch_control
+- Optional Prometheus textfile export (node_exporter textfile collector)
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+from etl.core.logger import get_logger
+from etl.load.sqlite_sink import get_sqlite_sink
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = get_logger(__name__)
+
+METRICS_TABLE = "stage_metrics"
+ALL_WORKERS = "all"
+
+
+def peak_rss_kb() -> int:
+    """Peak resident set size of this process in KiB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class StageSample:
+    """Counters a stage body can fill in (rows / bytes handled)."""
+
+    def __init__(self, rows: int = 0, bytes_read: int = 0):
+        self.rows = rows
+        self.bytes_read = bytes_read
+
+
+class StageMetrics:
+    """
+    Thread-safe collector of per-stage metrics for one pipeline run.
+
+    Samples with the same (stage, worker) are aggregated: times, rows and
+    bytes are summed, peak RSS is the maximum seen.
+    """
+
+    def __init__(self, batch_id: str):
+        self.batch_id = batch_id
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def add(self, stage: str, wall_sec: float, cpu_sec: float, rows: int = 0, bytes_read: int = 0,
+            peak_rss: int = None, worker: str = ALL_WORKERS):
+        """Record one sample."""
+        peak_rss = peak_rss_kb() if peak_rss is None else peak_rss
+        with self._lock:
+            entry = self._stages.setdefault((stage, worker), {
+                "calls": 0, "rows": 0, "bytes_read": 0, "wall_sec": 0.0, "cpu_sec": 0.0, "peak_rss_kb": None,
+            })
+            entry["calls"] += 1
+            entry["rows"] += rows
+            entry["bytes_read"] += bytes_read
+            entry["wall_sec"] += wall_sec
+            entry["cpu_sec"] += cpu_sec
+            if peak_rss is not None:
+                entry["peak_rss_kb"] = max(entry["peak_rss_kb"] or 0, peak_rss)
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0, bytes_read: int = 0):
+        """
+        Time a block of code as one sample of ``name``.
+
+        CPU time is measured for the calling thread, so concurrent stages
+        (staged mode) do not count each other's work.
+        """
+        sample = StageSample(rows, bytes_read)
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield sample
+        finally:
+            self.add(name, time.perf_counter() - wall, time.thread_time() - cpu, sample.rows, sample.bytes_read)
+
+    def timed_iter(self, name: str, iterable, size=None):
+        """
+        Yield from ``iterable``, timing the next() calls as one sample of ``name``.
+
+        Each item counts as one row; ``size(item)`` adds to bytes_read.
+        """
+        iterator = iter(iterable)
+        sample = StageSample()
+        wall_sec = 0.0
+        cpu_sec = 0.0
+        try:
+            while True:
+                wall = time.perf_counter()
+                cpu = time.thread_time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    wall_sec += time.perf_counter() - wall
+                    cpu_sec += time.thread_time() - cpu
+                sample.rows += 1
+                if size is not None:
+                    sample.bytes_read += size(item) or 0
+                yield item
+        finally:
+            self.add(name, wall_sec, cpu_sec, sample.rows, sample.bytes_read)
+
+    def add_worker(self, stage: str, stats: dict):
+        """Record a sample measured inside a pool worker, per worker and aggregated."""
+        for worker in (str(stats["worker"]), ALL_WORKERS):
+            self.add(stage, stats["wall_sec"], stats["cpu_sec"], stats["rows"], stats["bytes_read"],
+                     stats["peak_rss_kb"], worker=worker)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def to_frame(self) -> pd.DataFrame:
+        """Return one row per (stage, worker)."""
+        recorded_at = datetime.now()
+        with self._lock:
+            rows = [
+                {"batch_id": self.batch_id, "stage": stage, "worker": worker, **entry, "recorded_at": recorded_at}
+                for (stage, worker), entry in self._stages.items()
+            ]
+        return pd.DataFrame(rows)
+
+    def log_summary(self):
+        """Log aggregated metrics per stage."""
+        df = self.to_frame()
+        if df.empty:
+            return
+        logger.info("Stage metrics:")
+        for row in df[df["worker"] == ALL_WORKERS].itertuples():
+            rate = row.rows / row.wall_sec if row.wall_sec else 0.0
+            logger.info(
+                f"  {row.stage:<16} calls={row.calls:<6} rows={row.rows:<8} bytes={row.bytes_read:<12} "
+                f"wall={row.wall_sec:.3f}s cpu={row.cpu_sec:.3f}s rows/s={rate:.1f} peak_rss={row.peak_rss_kb}KiB"
+            )
+
+    def persist(self, db_path: str):
+        """Append this run's metrics to the stage_metrics table."""
+        df = self.to_frame()
+        if not df.empty:
+            get_sqlite_sink(db_path).append(df, METRICS_TABLE)
+
+    def write_prometheus(self, path: str, prefix: str = "eml_etl"):
+        """
+        Write metrics in Prometheus text format.
+
+        The file is written to a temp file and renamed, as the node_exporter
+        textfile collector expects.
+        """
+        df = self.to_frame()
+        metrics = [
+            ("stage_wall_seconds", "wall_sec", "Wall time spent in the stage"),
+            ("stage_cpu_seconds", "cpu_sec", "CPU time spent in the stage"),
+            ("stage_rows", "rows", "Rows (files for discover/parse) handled by the stage"),
+            ("stage_bytes_read", "bytes_read", "Input bytes read by the stage"),
+            ("stage_peak_rss_kib", "peak_rss_kb", "Peak resident set size seen during the stage"),
+        ]
+        lines = []
+        for metric, column, help_text in metrics:
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} gauge")
+            for row in df.itertuples():
+                value = getattr(row, column)
+                if value is None or pd.isna(value):
+                    continue
+                lines.append(
+                    f'{prefix}_{metric}{{stage="{row.stage}",worker="{row.worker}",batch_id="{self.batch_id}"}} {value}'
+                )
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+        logger.info(f"Prometheus metrics written to {path}")
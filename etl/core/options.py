@@ -0,0 +1,65 @@
+"""
+etl/core/options.py
+-------------------
+Tunable options of one pipeline run, defaulting to config/settings.py.
+"""
+
+from dataclasses import dataclass, field
+from config import settings
+
+
+@dataclass
+class PipelineOptions:
+    """
+    Options for ``run_pipeline``; the input/output folders live in ETLContext.
+
+    Parsing: ``max_workers`` processes, ``batch_size`` files per worker task,
+    at most ``max_inflight`` outstanding tasks; ``ordered`` keeps rows in file
+    order. ``attachment_mode="metadata"`` streams each file and skips
+    attachment payloads instead of materializing them. With ``chunk_size`` > 0
+    the pipeline streams micro-batches of that many files (per claim in worker
+    mode), so peak memory stays flat regardless of corpus size.
+
+    Loading: ``sinks`` selects csv, sqlite and/or parquet (partitioned by
+    batch_dt). ``load_mode="upsert"`` merges SQLite rows on their keys instead
+    of appending; ``search_index`` also maintains the ``messages_fts`` index
+    used by search mode (slower loads). CSV output is appended chunk by chunk
+    to open files, optionally compressed (``csv_compression``) and rotated
+    every ``csv_rotate_bytes`` bytes.
+
+    ``incremental`` skips files already loaded with the same size/mtime (or
+    content hash, only computed by incremental runs) and appends to the CSV
+    files of earlier runs. ``staged`` runs extract, transform and one writer
+    thread per sink concurrently, connected by queues of ``stage_queue_size``
+    chunks. The input folder is scanned recursively unless ``recursive=False``;
+    with ``shard_count`` > 1 only files whose email_id hashes to
+    ``shard_index`` are processed, into their own output partition.
+
+    ``worker`` claims files from the work queue instead of discovering them,
+    suffixing CSV files with ``worker_id``. ``metrics_textfile`` also exports
+    stage metrics in Prometheus text format, ``profile`` cProfiles the parent
+    and every pool worker, and ``validate_links`` re-links each chunk with the
+    global merge and logs differences.
+    """
+    max_workers: int = settings.MAX_PARALLELISM
+    chunk_size: int = settings.CHUNK_SIZE
+    batch_size: int = settings.PARSE_BATCH_SIZE
+    max_inflight: int = settings.MAX_INFLIGHT_TASKS
+    ordered: bool = settings.ORDERED_OUTPUT
+    attachment_mode: str = settings.ATTACHMENT_MODE
+    incremental: bool = settings.INCREMENTAL
+    load_mode: str = settings.SQLITE_LOAD_MODE
+    search_index: bool = settings.SQLITE_SEARCH_INDEX
+    sinks: list = field(default_factory=lambda: list(settings.OUTPUT_SINKS))
+    csv_compression: str = settings.CSV_COMPRESSION
+    csv_rotate_bytes: int = settings.CSV_ROTATE_BYTES
+    staged: bool = settings.STAGED
+    stage_queue_size: int = settings.STAGE_QUEUE_SIZE
+    recursive: bool = settings.RECURSIVE_INPUT
+    shard_index: int = settings.SHARD_INDEX
+    shard_count: int = settings.SHARD_COUNT
+    worker: bool = False
+    worker_id: str = None
+    metrics_textfile: str = settings.METRICS_TEXTFILE
+    profile: bool = settings.PROFILE
+    validate_links: bool = settings.VALIDATE_ATTACHMENT_LINKS
@@ -0,0 +1,97 @@
+"""
+etl/core/profiling.py
+---------------------
+Built-in cProfile mode (main.py --profile).
+
+- Every pool worker runs its own profiler and dumps ``worker-<pid>.pstats``
+  when the pool shuts it down
+- The parent (all threads, including staged-mode stages) is profiled into
+  ``parent-<pid>.pstats``
+- merge_profiles() combines them into ``combined.pstats`` and a top-N
+  hot-function report
+
+With profiling off no profiler is created, so there is no overhead.
+"""
+
+import cProfile
+import os
+import pstats
+from contextlib import contextmanager
+from multiprocessing import util
+from etl.core.logger import get_logger
+from config import settings
+
+logger = get_logger(__name__)
+
+COMBINED_STATS = "combined.pstats"
+TOP_REPORT = "top_functions.txt"
+
+
+def start_worker_profile(profile_dir: str):
+    """
+    Profile the rest of this worker process's life.
+
+    The dump is registered as a multiprocessing finalizer, which runs when
+    the worker exits cleanly (atexit handlers do not run in pool workers).
+    """
+    profiler = cProfile.Profile()
+
+    def dump():
+        profiler.disable()
+        profiler.dump_stats(os.path.join(profile_dir, f"worker-{os.getpid()}.pstats"))
+
+    util.Finalize(None, dump, exitpriority=100)
+    profiler.enable()
+
+
+@contextmanager
+def profiled(profile_dir: str, name: str = "parent"):
+    """Profile the block into ``<name>-<pid>.pstats``; a no-op when profile_dir is None."""
+    if profile_dir is None:
+        yield
+        return
+
+    os.makedirs(profile_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(os.path.join(profile_dir, f"{name}-{os.getpid()}.pstats"))
+
+
+def merge_profiles(profile_dir: str, top_n: int = settings.PROFILE_TOP_N) -> str:
+    """
+    Merge every per-process profile in profile_dir.
+
+    Writes ``combined.pstats`` (load with pstats / snakeviz) and a text report
+    of the top ``top_n`` functions by cumulative and by own time.
+
+    Returns:
+        str: Path of the text report, or None when no profiles were found
+    """
+    files = sorted(
+        os.path.join(profile_dir, name) for name in os.listdir(profile_dir)
+        if name.endswith(".pstats") and name != COMBINED_STATS
+    )
+    if not files:
+        logger.warning(f"No profiles found in {profile_dir}")
+        return None
+
+    stats = pstats.Stats(files[0])
+    if len(files) > 1:
+        stats.add(*files[1:])
+    stats.dump_stats(os.path.join(profile_dir, COMBINED_STATS))
+
+    workers = sum(os.path.basename(file).startswith("worker-") for file in files)
+    report_path = os.path.join(profile_dir, TOP_REPORT)
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write(f"Merged {len(files)} profiles ({workers} workers, {len(files) - workers} parent)\n")
+        stats.stream = f
+        for sort_key in ("cumulative", "tottime"):
+            f.write(f"\n=== Top {top_n} by {sort_key} ===\n")
+            stats.sort_stats(sort_key).print_stats(top_n)
+
+    logger.info(f"Profile of {len(files)} processes written to {profile_dir} ({COMBINED_STATS}, {TOP_REPORT})")
+    return report_path
@@ -0,0 +1,255 @@
+"""
+etl/core/stages.py
+------------------
+Staged pipeline runner.
+
+- The source (extract) and every stage run in their own thread
+- Stages are connected by bounded queues, so a slow stage applies
+  backpressure instead of letting chunks pile up in memory
+- Writers receive every item concurrently (one thread and queue each);
+  ``on_loaded`` runs once all writers have finished an item
+- Per-stage busy time, throughput and input queue depth are collected
+  to show which stage is the bottleneck
+"""
+
+import queue
+import threading
+import time
+from etl.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DONE = object()
+_POLL_SEC = 0.1
+
+
+class StageStats:
+    """Counters for one stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.rows = 0
+        self.busy_sec = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+
+    def observe_depth(self, depth: int):
+        self.depth_samples += 1
+        self.depth_total += depth
+        self.max_depth = max(self.max_depth, depth)
+
+    def as_dict(self, wall_sec: float) -> dict:
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "rows": self.rows,
+            "busy_sec": round(self.busy_sec, 3),
+            "utilization": round(self.busy_sec / wall_sec, 3) if wall_sec else 0.0,
+            "rows_per_sec": round(self.rows / self.busy_sec, 1) if self.busy_sec else 0.0,
+            "avg_queue_depth": round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0.0,
+            "max_queue_depth": self.max_depth,
+        }
+
+
+class _Abort(Exception):
+    """Raised inside a stage thread when another stage failed."""
+
+
+class StagedPipeline:
+    """
+    Run ``source -> stages... -> writers`` with one thread per step.
+
+    ``on_loaded`` calls are serialized, so it may update shared counters.
+
+    Args:
+        queue_size (int): Max items waiting in front of each stage
+        item_rows (Callable[[object], int]): Row count of an item, for throughput
+    """
+
+    def __init__(self, queue_size: int = 2, item_rows=None):
+        self.queue_size = max(1, queue_size)
+        self.item_rows = item_rows or (lambda item: 1)
+        self._stop = threading.Event()
+        self._errors = []
+
+    # ------------------------------------------------------------------
+    # Queue helpers (poll so a failed stage never deadlocks the others)
+    # ------------------------------------------------------------------
+    def _put(self, q: queue.Queue, item):
+        while True:
+            if self._stop.is_set():
+                raise _Abort()
+            try:
+                q.put(item, timeout=_POLL_SEC)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q: queue.Queue, stats: StageStats):
+        stats.observe_depth(q.qsize())
+        while True:
+            if self._stop.is_set():
+                raise _Abort()
+            try:
+                return q.get(timeout=_POLL_SEC)
+            except queue.Empty:
+                continue
+
+    def _run_thread(self, name: str, target):
+        def runner():
+            try:
+                target()
+            except _Abort:
+                pass
+            except BaseException as e:
+                logger.error(f"Stage '{name}' failed: {e}")
+                self._errors.append(e)
+                self._stop.set()
+
+        thread = threading.Thread(target=runner, name=f"stage-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+    def run(self, source, stages: list, writers: dict, on_loaded=None, source_name: str = "extract") -> list:
+        """
+        Drive ``source`` through the stages and writers until it is exhausted.
+
+        Args:
+            source (Iterable): Items to process (consumed in its own thread)
+            stages (list[tuple[str, Callable]]): Ordered (name, func) steps;
+                func(item) returns the next item, or None to drop it
+            writers (dict[str, Callable]): Terminal steps, each called with every item
+            on_loaded (Callable): Called with each item once all writers are done
+            source_name (str): Stage name reported for the source
+
+        Returns:
+            list[dict]: Per-stage report, see StageStats.as_dict
+
+        Raises:
+            The first exception raised by any stage.
+        """
+        start = time.perf_counter()
+        stats = [StageStats(source_name)]
+        threads = []
+        pending = {}
+        pending_lock = threading.Lock()
+
+        inbox = queue.Queue(self.queue_size)
+        threads.append(self._run_thread(source_name, lambda: self._source(source, inbox, stats[0])))
+
+        for name, func in stages:
+            outbox = queue.Queue(self.queue_size)
+            stage_stats = StageStats(name)
+            stats.append(stage_stats)
+            threads.append(self._run_thread(
+                name, lambda func=func, inbox=inbox, outbox=outbox, s=stage_stats: self._stage(func, inbox, [outbox], s)
+            ))
+            inbox = outbox
+
+        loaded_lock = threading.Lock()
+
+        def loaded(item):
+            with pending_lock:
+                pending[id(item)] -= 1
+                finished = pending[id(item)] <= 0
+                if finished:
+                    del pending[id(item)]
+            if finished and on_loaded is not None:
+                with loaded_lock:
+                    on_loaded(item)
+
+        def track(item):
+            with pending_lock:
+                pending[id(item)] = len(writers)
+            if not writers:
+                pending[id(item)] = 1
+                loaded(item)
+            return item
+
+        # Fan out: register each item, then hand it to every writer queue
+        writer_queues = [queue.Queue(self.queue_size) for _ in writers]
+        fan_out = StageStats("fan_out")
+        threads.append(self._run_thread("fan_out", lambda: self._stage(track, inbox, writer_queues, fan_out)))
+
+        for (name, func), writer_queue in zip(writers.items(), writer_queues):
+            writer_stats = StageStats(name)
+            stats.append(writer_stats)
+            threads.append(self._run_thread(
+                name, lambda func=func, q=writer_queue, s=writer_stats: self._writer(func, q, loaded, s)
+            ))
+
+        for thread in threads:
+            thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+        wall_sec = time.perf_counter() - start
+        report = [s.as_dict(wall_sec) for s in stats]
+        self._log_report(report, wall_sec)
+        return report
+
+    def _source(self, source, outbox: queue.Queue, stats: StageStats):
+        iterator = iter(source)
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stats.busy_sec += time.perf_counter() - started
+                stats.items += 1
+                stats.rows += self.item_rows(item)
+                self._put(outbox, item)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None and self._stop.is_set():
+                close()
+        self._put(outbox, _DONE)
+
+    def _stage(self, func, inbox: queue.Queue, outboxes: list, stats: StageStats):
+        while True:
+            item = self._get(inbox, stats)
+            if item is _DONE:
+                break
+            started = time.perf_counter()
+            result = func(item)
+            stats.busy_sec += time.perf_counter() - started
+            stats.items += 1
+            if result is None:
+                continue
+            stats.rows += self.item_rows(result)
+            for outbox in outboxes:
+                self._put(outbox, result)
+        for outbox in outboxes:
+            self._put(outbox, _DONE)
+
+    def _writer(self, func, inbox: queue.Queue, loaded, stats: StageStats):
+        while True:
+            item = self._get(inbox, stats)
+            if item is _DONE:
+                break
+            started = time.perf_counter()
+            func(item)
+            stats.busy_sec += time.perf_counter() - started
+            stats.items += 1
+            stats.rows += self.item_rows(item)
+            loaded(item)
+
+    @staticmethod
+    def _log_report(report: list, wall_sec: float):
+        logger.info(f"Stage report (wall {wall_sec:.2f}s):")
+        for row in report:
+            logger.info(
+                f"  {row['stage']:<12} items={row['items']:<6} rows={row['rows']:<8} "
+                f"busy={row['busy_sec']:.2f}s util={row['utilization']:.0%} "
+                f"rows/s={row['rows_per_sec']:<10} queue avg={row['avg_queue_depth']} max={row['max_queue_depth']}"
+            )
+        bottleneck = max(report, key=lambda row: row["busy_sec"])
+        logger.info(f"Bottleneck stage: {bottleneck['stage']}")
@@ -1,14 +1,16 @@
 """
 etl/core/utils.py
 -----------------
-Utility helpers: retry logic, regex extractors, timezone conversions.
+Utility helpers: retry logic, regex extractors, file digests, timezone conversions.
 """
 
+import hashlib
 import re
 import time
+import numpy as np
 import pytz
 import pandas as pd
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import Tuple, Type, Union, Callable, Optional
 from .logger import get_logger
 
@@ -57,26 +59,79 @@ def retry_with_backoff(
 # --------------------------------------------------------------------
 # Simple regex extractors (public-safe placeholders)
 # --------------------------------------------------------------------
+_UUID = r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+_ISO_TS = r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z"
+_CONTACT = r"[\w\.-]+@[\w\.-]+"
+
+_MESSAGE_ID_RE = re.compile(r"Message ID:\s*(" + _UUID + ")", re.IGNORECASE)
+_MESSAGE_ID_LABEL_RE = re.compile(r"message id:", re.IGNORECASE)
+_TIMESTAMP_RE = re.compile(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z)")
+_MESSAGE_TIMESTAMP_RE = re.compile(r"(" + _ISO_TS + r")\s+[A-Za-z ]+\s+-\s+" + _CONTACT + r"\s+says:")
+_SPEAKER_NAME_RE = re.compile(_ISO_TS + r"\s+(.+?)\s+-\s+" + _CONTACT + r"\s+says:")
+_SPEAKER_CONTACT_RE = re.compile(_ISO_TS + r"\s+[A-Za-z ]+\s+-\s+(" + _CONTACT + r")\s+says:")
+_MESSAGE_CONTENT_RE = re.compile(r"says:\s*(.+)", re.DOTALL)
+
+# Header block: "Message ID: <uuid>" directly followed by the "says:" line
+_HEADER_BLOCK_RE = re.compile(
+    r"(?i:Message ID:)\s*(" + _UUID + r")\s+"
+    r"(" + _ISO_TS + r")\s+([A-Za-z ]+?)\s+-\s+(" + _CONTACT + r")\s+says:"
+)
+_CONTENT_TAIL_RE = re.compile(r"\s*(.+)", re.DOTALL)
+# Anything before the header block that the per-field searches could latch onto
+_PREAMBLE_CONFLICT_RE = re.compile(r"says:|\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}")
+
+
+def _flatten(message: str) -> str:
+    """Strip and join multiline message content into one line."""
+    return " ".join(message.strip().splitlines())
+
+
+def extract_message_fields(text: str) -> Optional[Tuple[Optional[str], ...]]:
+    """
+    Extract all message metadata fields in a single pass.
+
+    Locates the "Message ID:" header block once and reads the id, timestamp,
+    speaker name, speaker contact and content from it. Bodies that do not
+    follow the canonical layout fall back to the per-field extractors, so
+    results always match them.
+
+    Returns:
+        (message_id, timestamp, speaker_name, speaker_contact, message),
+        or None when the body has no "Message ID:" label.
+    """
+    label = _MESSAGE_ID_LABEL_RE.search(text)
+    if label is None:
+        return None
+
+    header = _HEADER_BLOCK_RE.match(text, label.start())
+    if header and not _PREAMBLE_CONFLICT_RE.search(text, 0, label.start()):
+        message_id, timestamp, speaker_name, speaker_contact = header.groups()
+        content = _CONTENT_TAIL_RE.match(text, header.end())
+        message = _flatten(content.group(1)) if content else None
+        return message_id, timestamp, speaker_name, speaker_contact, message
+
+    return (
+        extract_message_id(text),
+        extract_message_timestamp(text),
+        extract_speaker_name(text),
+        extract_speaker_contact(text),
+        extract_message_content(text),
+    )
+
+
 def extract_message_id(text: str) -> Optional[str]:
     """
     Extract message ID (UUID) from text body.
     Example line:
         Message ID: 8d798677-9a33-47d1-876c-a0efe27a7222
     """
-    match = re.search(
-        r"Message ID:\s*([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-"
-        r"[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})",
-        text,
-        re.IGNORECASE,
-    )
-    if match:
-        return match.group(1)
-    return None
+    match = _MESSAGE_ID_RE.search(text)
+    return match.group(1) if match else None
 
 
 def extract_timestamp(text: str) -> Optional[str]:
     """Extract timestamp in ISO8601 format (demo)."""
-    match = re.search(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z)", text)
+    match = _TIMESTAMP_RE.search(text)
     return match.group(1) if match else None
 
 
@@ -86,13 +141,8 @@ def extract_message_timestamp(text: str) -> Optional[str]:
     Example:
         2025-09-14T05:19:14.864688Z Bob Demo - bob@example.com says:
     """
-    match = re.search(
-        r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z)\s+[A-Za-z ]+\s+-\s+[\w\.-]+@[\w\.-]+\s+says:",
-        text
-    )
-    if match:
-        return match.group(1)
-    return None
+    match = _MESSAGE_TIMESTAMP_RE.search(text)
+    return match.group(1) if match else None
 
 
 def extract_speaker_name(text: str) -> Optional[str]:
@@ -101,13 +151,8 @@ def extract_speaker_name(text: str) -> Optional[str]:
     Example:
         2025-09-14T05:19:14.864688Z Bob Demo - bob@example.com says:
     """
-    match = re.search(
-        r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z\s+(.+?)\s+-\s+[\w\.-]+@[\w\.-]+\s+says:",
-        text
-    )
-    if match:
-        return match.group(1).strip()
-    return None
+    match = _SPEAKER_NAME_RE.search(text)
+    return match.group(1).strip() if match else None
 
 
 def extract_speaker_contact(text: str) -> Optional[str]:
@@ -116,32 +161,96 @@ def extract_speaker_contact(text: str) -> Optional[str]:
     Example:
         2025-09-14T05:19:14.864688Z Bob Demo - bob@example.com says:
     """
-    match = re.search(
-        r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z\s+[A-Za-z ]+\s+-\s+([\w\.-]+@[\w\.-]+)\s+says:",
-        text
-    )
-    if match:
-        return match.group(1).strip()
-    return None
+    match = _SPEAKER_CONTACT_RE.search(text)
+    return match.group(1).strip() if match else None
 
 
 def extract_message_content(text: str) -> Optional[str]:
     """
     Extract the message content after the 'says:' line.
     """
-    match = re.search(r"says:\s*(.+)", text, re.DOTALL)
-    if match:
-        message = match.group(1).strip()
-        return " ".join(message.splitlines())  # flatten multiline
-    return None
+    match = _MESSAGE_CONTENT_RE.search(text)
+    return _flatten(match.group(1)) if match else None
 
 
 # --------------------------------------------------------------------
-# Timezone conversion
+# File fingerprints
 # --------------------------------------------------------------------
+def file_digest(path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+# --------------------------------------------------------------------
+# Timestamps & timezone conversion
+# --------------------------------------------------------------------
+@lru_cache(maxsize=None)
+def get_timezone(tz: str):
+    """Resolve a timezone name once per process."""
+    return pytz.timezone(tz)
+
+
+def parse_utc_timestamps(series: pd.Series) -> pd.Series:
+    """
+    Parse ISO-8601 ``YYYY-MM-DDTHH:MM:SS[.ffffff]Z`` strings to UTC datetime64.
+
+    Uses pandas' explicit ISO-8601 parser (no per-value format inference);
+    unparseable values (including years outside 0001-9999) become NaT.
+    Values are kept to microseconds, so any year in that range survives.
+    """
+    parsed = pd.to_datetime(series, format="ISO8601", utc=True, errors="coerce")
+    if parsed.dt.unit == "ns":
+        # Nanosecond digits make pandas pick ns, whose 1677-2262 range turns other years into NaT
+        text = series.astype("string").str.replace(r"(\.\d{6})\d+", r"\1", regex=True)
+        parsed = pd.to_datetime(text, format="ISO8601", utc=True, errors="coerce")
+    return parsed
+
+
+def format_utc_timestamps(series: pd.Series) -> pd.Series:
+    """
+    Format tz-aware datetimes as ISO-8601 UTC text (``...Z``), NaT as None.
+
+    Vectorized with numpy.datetime_as_string; sub-second digits are only
+    written for values that have them, always as six digits (microseconds),
+    so an input of ``...14.5Z`` is written back as ``...14.500000Z``.
+    """
+    values = series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy("datetime64[us]")
+    text = np.datetime_as_string(values, unit="s")
+    fractional = values.astype("int64") % 1_000_000 != 0
+    if fractional.any():
+        text[fractional] = np.datetime_as_string(values[fractional], unit="us")
+    result = pd.Series(text, index=series.index, dtype=object) + "Z"
+    result[np.isnat(values)] = None
+    return result
+
+
+def format_timestamps(series: pd.Series) -> pd.Series:
+    """
+    Format tz-aware datetimes as text in their own timezone, NaT as None.
+
+    UTC columns use format_utc_timestamps; columns converted to another zone
+    (convert_utc_to_local) keep their local wall-clock time as
+    ``YYYY-MM-DD HH:MM:SS``.
+    """
+    if str(series.dt.tz) == "UTC":
+        return format_utc_timestamps(series)
+    values = series.dt.tz_localize(None).to_numpy("datetime64[s]")
+    text = np.char.replace(np.datetime_as_string(values, unit="s"), "T", " ")
+    result = pd.Series(text, index=series.index, dtype=object)
+    result[np.isnat(values)] = None
+    return result
+
+
 def convert_utc_to_local(df: pd.DataFrame, column: str, tz: str = "Asia/Hong_Kong"):
-    """Convert UTC timestamps in a DataFrame column to given timezone."""
-    target_tz = pytz.timezone(tz)
-    df[column] = pd.to_datetime(df[column], errors="coerce", utc=True)
-    df[column] = df[column].dt.tz_convert(target_tz).dt.strftime("%Y-%m-%d %H:%M:%S")
+    """
+    Convert UTC timestamps in a DataFrame column to the given timezone.
+
+    Strings are parsed with parse_utc_timestamps first. The column stays a
+    tz-aware datetime64; sinks write it as local time (format_timestamps).
+    """
+    series = df[column]
+    if not isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = parse_utc_timestamps(series)
+    df[column] = series.dt.tz_convert(get_timezone(tz))
     return df
@@ -0,0 +1,101 @@
+"""
+etl/extract/html_text.py
+------------------------
+Pluggable HTML-to-text engines for email bodies.
+
+- fast: regex tag stripper (default), falls back to bs4 on markup it cannot handle
+- bs4:  BeautifulSoup html.parser (reference implementation)
+
+The fast engine only handles well-formed tags and ``;``-terminated known
+entities itself; input with a stray ``<``, a bare entity name (``&amp`` or
+``&copya``) or an unknown entity goes to bs4, whose html.parser resolves
+those differently from html.unescape.
+"""
+
+import html
+import re
+from html.entities import html5
+from bs4 import BeautifulSoup
+
+# Elements whose content is not part of the visible text
+_SKIP_BLOCK_RE = re.compile(r"<(script|style|template)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_SKIP_OPEN_RE = re.compile(r"<(?:script|style|template)\b", re.IGNORECASE)
+
+# End tags of void elements (e.g. "</br>"): html.parser's tree handling of them differs from a tag strip
+_VOID_END_RE = re.compile(
+    r"</(?:area|base|br|col|embed|hr|img|input|link|meta|source|track|wbr)\b", re.IGNORECASE
+)
+
+# Comments, declarations, processing instructions and start/end tags (quoted attribute values may contain ">";
+# a "<" or a quote outside an attribute value leaves the tag in the text for the bs4 fallback)
+_MARKUP_RE = re.compile(
+    r"<!--.*?-->"
+    r"|<![A-Za-z][^>]*>"
+    r"|<\?[^>]*>"
+    r"|</?[A-Za-z](?:=\s*\"[^\"<]*\"|=\s*'[^'<]*'|[^'\"<>])*>",
+    re.DOTALL,
+)
+
+# Character references; a "&" followed by a name or "#" without a terminated reference matches with group 1 None
+_ENTITY_RE = re.compile(r"&(?:(#[0-9]+;|#[xX][0-9a-fA-F]+;|[A-Za-z][A-Za-z0-9]*;)|(?=[A-Za-z#]))")
+
+
+def _plain_entities(text: str) -> bool:
+    """True when every reference in ``text`` is ;-terminated and known (html.unescape matches bs4)."""
+    for match in _ENTITY_RE.finditer(text):
+        ref = match.group(1)
+        if ref is None or (not ref.startswith("#") and ref not in html5):
+            return False
+    return True
+
+
+def bs4_html_to_text(body: str) -> str:
+    """Extract visible text with BeautifulSoup."""
+    return BeautifulSoup(body, "html.parser").get_text(" ", strip=True)
+
+
+def fast_html_to_text(body: str) -> str:
+    """
+    Extract visible text by stripping tags with precompiled regexes.
+
+    Each text run between tags is unescaped and stripped, and non-empty runs
+    are joined by a single space. Malformed markup (a leftover ``<``) and
+    entities html.unescape would resolve differently are handed to bs4.
+    """
+    stripped = _SKIP_BLOCK_RE.sub("<br>", body)
+    if _SKIP_OPEN_RE.search(stripped) or _VOID_END_RE.search(stripped):
+        return bs4_html_to_text(body)
+
+    parts = _MARKUP_RE.split(stripped)
+    if "&" in parts[-1]:
+        # html.parser resolves a trailing entity-like run at end of input differently
+        return bs4_html_to_text(body)
+
+    pieces = []
+    for piece in parts:
+        if not piece:
+            continue
+        if "<" in piece:
+            return bs4_html_to_text(body)
+        if "&" in piece:
+            if not _plain_entities(piece):
+                return bs4_html_to_text(body)
+            piece = html.unescape(piece)
+        piece = piece.strip()
+        if piece:
+            pieces.append(piece)
+    return " ".join(pieces)
+
+
+HTML_TEXT_ENGINES = {
+    "fast": fast_html_to_text,
+    "bs4": bs4_html_to_text,
+}
+
+
+def get_html_text_engine(name: str):
+    """Return the HTML-to-text function registered under ``name``."""
+    try:
+        return HTML_TEXT_ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown HTML text engine '{name}'. Use one of: {', '.join(HTML_TEXT_ENGINES)}")
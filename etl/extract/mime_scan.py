@@ -0,0 +1,201 @@
+"""
+etl/extract/mime_scan.py
+------------------------
+Streaming MIME scanner for attachment-metadata mode.
+
+- Reads a message line by line (lines capped at MAX_LINE_BYTES)
+- Parses only header blocks for every part
+- Keeps payload bytes only for the text/plain and text/html body candidates
+- Discards attachment payloads as they stream past
+
+Memory per message is bounded by its header blocks and body text instead of
+its largest attachment.
+"""
+
+from email import policy
+from email.parser import BytesParser
+
+MAX_LINE_BYTES = 64 * 1024
+
+# Same candidate types EmailMessage.iter_attachments skips as body parts
+_BODY_TYPES = {("text", "plain"), ("text", "html"), ("multipart", "related"), ("multipart", "alternative")}
+
+
+class _LineReader:
+    """Read a binary stream in line-sized chunks, tracking line starts."""
+
+    def __init__(self, fp, max_line: int = MAX_LINE_BYTES):
+        self.fp = fp
+        self.max_line = max_line
+        self.at_line_start = True
+
+    def read(self):
+        """Return (chunk, starts_line); chunk is b"" at EOF."""
+        starts_line = self.at_line_start
+        chunk = self.fp.readline(self.max_line)
+        self.at_line_start = chunk.endswith(b"\n")
+        return chunk, starts_line
+
+
+def _split_line_ending(chunk: bytes):
+    """Split a chunk into (content, line_ending)."""
+    if chunk.endswith(b"\r\n"):
+        return chunk[:-2], b"\r\n"
+    if chunk.endswith(b"\n") or chunk.endswith(b"\r"):
+        return chunk[:-1], chunk[-1:]
+    return chunk, b""
+
+
+def _match_delimiter(chunk: bytes, active: list):
+    """
+    Match a line against the active boundaries, innermost first.
+
+    Returns (level, is_close) or None.
+    """
+    line = chunk.rstrip(b"\r\n").rstrip(b" \t")
+    for level in range(len(active) - 1, -1, -1):
+        delimiter = active[level]
+        if line == delimiter:
+            return level, False
+        if line == delimiter + b"--":
+            return level, True
+    return None
+
+
+def _read_until_delimiter(reader: _LineReader, active: list, sink: list = None):
+    """
+    Consume lines until a delimiter of any active boundary.
+
+    Lines are appended to ``sink`` when given and dropped otherwise. The line
+    ending before a delimiter belongs to the delimiter and is not kept.
+
+    Returns (level, is_close), or None at EOF.
+    """
+    pending_ending = b""
+    while True:
+        chunk, starts_line = reader.read()
+        if not chunk:
+            if sink is not None:
+                sink.append(pending_ending)
+            return None
+        if starts_line and active and chunk.startswith(b"--"):
+            hit = _match_delimiter(chunk, active)
+            if hit is not None:
+                return hit
+        if sink is not None:
+            content, ending = _split_line_ending(chunk)
+            sink.append(pending_ending)
+            sink.append(content)
+            pending_ending = ending
+
+
+def _read_header_block(reader: _LineReader) -> bytes:
+    """Read a header block up to and including the blank separator line."""
+    lines = []
+    while True:
+        chunk, starts_line = reader.read()
+        if not chunk:
+            break
+        lines.append(chunk)
+        if starts_line and chunk in (b"\r\n", b"\n"):
+            break
+    return b"".join(lines)
+
+
+def _parse_headers(header_bytes: bytes):
+    """Parse a header block into a header-only EmailMessage."""
+    return BytesParser(policy=policy.default).parsebytes(header_bytes, headersonly=True)
+
+
+class MessageScan:
+    """Result of scanning one message: top-level headers, child headers and body candidates."""
+
+    def __init__(self, top):
+        self.top = top
+        self.children = []
+        self.bodies = {}
+
+    def wants_body(self, part) -> bool:
+        """True for the first non-attachment text/plain and text/html part."""
+        return (
+            part.get_content_maintype() == "text"
+            and part.get_content_subtype() in ("plain", "html")
+            and part.get_content_subtype() not in self.bodies
+            and not part.is_attachment()
+        )
+
+    def get_body(self):
+        """Return the body part (plain preferred over html), like EmailMessage.get_body."""
+        raw = self.bodies.get("plain") or self.bodies.get("html")
+        if raw is None:
+            return None
+        return BytesParser(policy=policy.default).parsebytes(raw)
+
+    def iter_attachments(self):
+        """Yield header-only attachment parts, like EmailMessage.iter_attachments."""
+        if self.top.get_content_type() == "multipart/alternative":
+            return
+        seen = []
+        for part in self.children:
+            maintype, subtype = part.get_content_type().split("/")
+            if (maintype, subtype) in _BODY_TYPES and not part.is_attachment() and subtype not in seen:
+                seen.append(subtype)
+                continue
+            yield part
+
+
+def _scan_multipart(reader: _LineReader, active: list, scan: MessageScan, depth: int):
+    """
+    Scan the parts of one multipart level (boundary ``active[-1]``).
+
+    Returns the next delimiter hit belonging to an enclosing level, or None at EOF.
+    """
+    level = len(active) - 1
+    hit = _read_until_delimiter(reader, active)  # preamble
+
+    while hit is not None and hit == (level, False):
+        header_bytes = _read_header_block(reader)
+        part = _parse_headers(header_bytes)
+        if depth == 1:
+            scan.children.append(part)
+
+        boundary = part.get_boundary() if part.get_content_maintype() == "multipart" else None
+        if boundary:
+            hit = _scan_multipart(reader, active + [b"--" + boundary.encode("ascii", "surrogateescape")], scan, depth + 1)
+        elif scan.wants_body(part):
+            sink = [header_bytes]
+            hit = _read_until_delimiter(reader, active, sink)
+            scan.bodies[part.get_content_subtype()] = b"".join(sink)
+        else:
+            hit = _read_until_delimiter(reader, active)
+
+    if hit == (level, True):
+        hit = _read_until_delimiter(reader, active[:-1])  # epilogue
+    return hit
+
+
+def scan_message(fp, max_line: int = MAX_LINE_BYTES) -> MessageScan:
+    """
+    Scan a binary .eml stream without materializing attachment payloads.
+
+    Args:
+        fp: Binary file object positioned at the start of the message
+        max_line (int): Max bytes read per line chunk
+
+    Returns:
+        MessageScan exposing get_body() and iter_attachments()
+    """
+    reader = _LineReader(fp, max_line)
+    header_bytes = _read_header_block(reader)
+    top = _parse_headers(header_bytes)
+    scan = MessageScan(top)
+
+    boundary = top.get_boundary() if top.get_content_maintype() == "multipart" else None
+    if boundary:
+        _scan_multipart(reader, [b"--" + boundary.encode("ascii", "surrogateescape")], scan, depth=1)
+    elif scan.wants_body(top):
+        sink = [header_bytes]
+        _read_until_delimiter(reader, [], sink)
+        scan.bodies[top.get_content_subtype()] = b"".join(sink)
+
+    return scan
@@ -5,34 +5,93 @@ Generic EmailParser for extracting messages and attachments from .eml files.
 
 - Decodes MIME content
 - Extracts body, metadata, and attachments
-- Returns results as DataFrames
+- Returns results as compact row tuples (parse_records) or DataFrames (parse_email)
 """
 
 import base64
 import quopri
 from email import policy
 from email.parser import BytesParser
-from pathlib import Path
 from io import BytesIO
 import pandas as pd
-from bs4 import BeautifulSoup
 from etl.core.logger import get_logger
-from etl.core.utils import extract_message_id, extract_message_timestamp, extract_speaker_name, extract_speaker_contact, extract_message_content
+from etl.core.dtypes import apply_schema_dtypes
+from etl.core.utils import extract_message_fields
+from etl.extract.html_text import get_html_text_engine
+from etl.extract.mime_scan import scan_message
+from etl.extract.sources import as_source
+from config import settings
 
 logger = get_logger(__name__)
 
+# Column order of the row tuples returned by EmailParser.parse_records
+MESSAGE_COLUMNS = (
+    "email_id",
+    "message_id",
+    "timestamp",
+    "speaker_name",
+    "speaker_contact",
+    "message",
+    "with_attachment",
+)
+ATTACHMENT_COLUMNS = (
+    "email_id",
+    "attachment_name",
+    "content_id",
+    "content_type",
+    "message_id",
+)
+
+
+def records_to_frames(message_rows: list, attachment_rows: list):
+    """
+    Materialize parse_records row tuples into (messages_df, attachments_df),
+    with the compact dtypes from config/schema.py (see etl/core/dtypes.py).
+    """
+    messages_df = pd.DataFrame.from_records(message_rows, columns=MESSAGE_COLUMNS)
+    attachments_df = pd.DataFrame.from_records(attachment_rows, columns=ATTACHMENT_COLUMNS)
+    return apply_schema_dtypes(messages_df, "messages"), apply_schema_dtypes(attachments_df, "attachments")
+
 
 class EmailParser:
     """
     Lightweight parser for .eml files.
 
-    Outputs two DataFrames:
-    - messages_df: parsed message content
-    - attachments_df: parsed attachment metadata
+    Outputs two sets of rows (see MESSAGE_COLUMNS / ATTACHMENT_COLUMNS):
+    - messages: parsed message content, flagged with_attachment
+    - attachments: parsed attachment metadata, linked to the email's message_id
+
+    Linkage is resolved per file: an email holds at most one message, and
+    attachment names are unique within an email (first occurrence kept).
+
+    attachment_mode:
+    - full: parse the whole message with email.parser (payloads in memory)
+    - metadata: stream the file and keep only headers and the body text,
+      discarding attachment payloads as they are read
     """
 
-    def __init__(self):
+    ATTACHMENT_MODES = ("full", "metadata")
+
+    def __init__(
+        self,
+        html_engine: str = settings.HTML_TEXT_ENGINE,
+        attachment_mode: str = settings.ATTACHMENT_MODE,
+    ):
+        if attachment_mode not in self.ATTACHMENT_MODES:
+            raise ValueError(f"Unknown attachment mode '{attachment_mode}'. Use one of: {', '.join(self.ATTACHMENT_MODES)}")
         self.logger = get_logger(self.__class__.__name__)
+        self.html_to_text = get_html_text_engine(html_engine)
+        self.attachment_mode = attachment_mode
+
+    def body_to_text(self, body_part) -> str:
+        """
+        Decode a body part to searchable text.
+        text/plain is used as-is; HTML goes through the configured engine.
+        """
+        body = self.decode_content(body_part) or ""
+        if body_part.get_content_type() == "text/plain":
+            return body.strip()
+        return self.html_to_text(body)
 
     def decode_content(self, part):
         """
@@ -64,68 +123,71 @@ class EmailParser:
             self.logger.error(f"Failed to decode content: {e}")
             return None
 
-    def parse_email(self, file_path: str):
+    def parse_records(self, file_path):
         """
-        Parse one .eml file into messages and attachments DataFrames.
-        Clean, single-pass version — no redundant walking.
+        Parse one .eml file (path) or archive member (EmailSource) into plain row tuples.
+
+        Returns:
+            tuple[list[tuple], list[tuple]]:
+                (message_rows, attachment_rows) ordered as MESSAGE_COLUMNS
+                and ATTACHMENT_COLUMNS, with attachments linked to the
+                message. Raises on unreadable/unparseable files.
         """
-        messages = []
         attachments = []
-        email_id = Path(file_path).stem
-
-        try:
-            with open(file_path, "rb") as f:
-                msg = BytesParser(policy=policy.default).parse(f)
+        source = as_source(file_path)
+        email_id = source.email_id
 
-            # --------------------------------------------------
-            # Extract body (prefer plain text, fallback to HTML)
-            # --------------------------------------------------
-            body_part = msg.get_body(preferencelist=("plain", "html"))
-            if body_part:
-                body = self.decode_content(body_part)
-                soup = BeautifulSoup(body, "html.parser")
-                text = soup.get_text(" ", strip=True) if soup else body
-
-                if "message id:" in text.lower():
-                    message_id = extract_message_id(text)
-                    timestamp = extract_message_timestamp(text)
-                    speaker_name = extract_speaker_name(text)
-                    speaker_contact = extract_speaker_contact(text)
-                    message_content = extract_message_content(text)
-
-                    messages.append({
-                        "email_id": email_id,
-                        "message_id": message_id,
-                        "timestamp": timestamp,
-                        "speaker_name": speaker_name,
-                        "speaker_contact": speaker_contact,
-                        "message": message_content,
-                        "with_attachment": None,  # set later
-                    })
-                else:
-                    self.logger.warning(f"No Message ID found in body for {file_path}")
+        with source.open() as f:
+            if self.attachment_mode == "metadata":
+                msg = scan_message(f)
+                body_part = msg.get_body()
             else:
-                self.logger.warning(f"No text/plain or text/html body found in {file_path}")
-
-            # --------------------------------------------------
-            # Extract attachments
-            # --------------------------------------------------
-            for part in msg.iter_attachments():
-                filename = part.get_filename()
-                if not filename:
-                    continue
-                content_id = part.get("Content-ID")
-                if content_id:
-                    content_id = content_id.strip("<>")
-                attachments.append({
-                    "email_id": email_id,
-                    "attachment_name": filename,
-                    "content_id": content_id,
-                    "content_type": part.get_content_type(),
-                })
-
-            return pd.DataFrame(messages), pd.DataFrame(attachments)
+                msg = BytesParser(policy=policy.default).parse(f)
+                body_part = msg.get_body(preferencelist=("plain", "html"))
+
+        # --------------------------------------------------
+        # Extract body (prefer plain text, fallback to HTML)
+        # --------------------------------------------------
+        fields = None
+        if body_part:
+            text = self.body_to_text(body_part)
+            fields = extract_message_fields(text)
+            if fields is None:
+                self.logger.warning(f"No Message ID found in body for {source.key}")
+        else:
+            self.logger.warning(f"No text/plain or text/html body found in {source.key}")
+        message_id = fields[0] if fields is not None else None
+
+        # --------------------------------------------------
+        # Extract attachments, linked to this email's message
+        # --------------------------------------------------
+        seen = set()
+        for part in msg.iter_attachments():
+            filename = part.get_filename()
+            if not filename or filename in seen:
+                continue
+            seen.add(filename)
+            content_id = part.get("Content-ID")
+            if content_id:
+                content_id = content_id.strip("<>")
+            attachments.append((
+                email_id,
+                filename,
+                content_id,
+                part.get_content_type(),
+                message_id,
+            ))
+
+        messages = [(email_id, *fields, bool(attachments))] if fields is not None else []
+        return messages, attachments
 
+    def parse_email(self, file_path: str):
+        """
+        Parse one .eml file into messages and attachments DataFrames.
+        Clean, single-pass version — no redundant walking.
+        """
+        try:
+            return records_to_frames(*self.parse_records(file_path))
         except Exception as e:
             self.logger.error(f"Error parsing {file_path}: {e}")
             return pd.DataFrame(), pd.DataFrame()
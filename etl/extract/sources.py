@@ -0,0 +1,384 @@
+"""
+etl/extract/sources.py
+----------------------
+Input adapters for .eml files and email archives.
+
+- Plain .eml files in the input folder
+- .zip archives (members ending in .eml)
+- .tar archives, plain or gzip/bz2/xz compressed
+- .mbox mailboxes, split on "From " separator lines via mmap
+- Recursive os.scandir walk and deterministic sharding by email_id
+
+Discovery yields small picklable EmailSource descriptors. For .eml files,
+zip members, plain tar members and mbox messages the descriptor is a path
+plus byte range, so workers read just their own bytes instead of receiving
+archive copies. Compressed tars cannot be read at random offsets, so their
+members are streamed once on the parent side and shipped as bytes.
+EmailSource.open() streams a member from its byte range (inflating deflated
+zip members chunk by chunk), so metadata-mode parsing never holds a whole
+archive member in memory.
+"""
+
+import hashlib
+import io
+import mmap
+import os
+import tarfile
+import zipfile
+import zlib
+from io import BytesIO
+from pathlib import Path
+from typing import NamedTuple
+from etl.core.logger import get_logger
+from etl.core.utils import file_digest
+from config import settings
+
+logger = get_logger(__name__)
+
+EML_SUFFIX = ".eml"
+ZIP_SUFFIXES = (".zip",)
+TAR_SUFFIXES = (".tar",)
+COMPRESSED_TAR_SUFFIXES = (".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+MBOX_SUFFIXES = (".mbox",)
+
+_ZIP_LOCAL_HEADER_SIZE = 30
+_MBOX_SEPARATOR = b"\nFrom "
+_READ_CHUNK = 64 * 1024
+
+
+class _RangeReader(io.RawIOBase):
+    """Raw binary stream over ``length`` bytes of a file, starting at ``offset``."""
+
+    def __init__(self, path: str, offset: int, length: int):
+        self._file = open(path, "rb")
+        self._file.seek(offset)
+        self._left = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._left <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:min(len(buffer), self._left)])
+        self._left -= read
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class _InflateReader(io.RawIOBase):
+    """Raw binary stream inflating a raw-deflate stream (zip member data) one chunk at a time."""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+        self._pending = b""
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self._position >= len(self._pending):
+            if self._inflater.eof:
+                return 0
+            data = self._inflater.unconsumed_tail or self._raw.read(_READ_CHUNK)
+            self._pending = self._inflater.decompress(data, _READ_CHUNK) if data else self._inflater.flush()
+            self._position = 0
+            if not data and not self._pending:
+                return 0
+        count = min(len(buffer), len(self._pending) - self._position)
+        buffer[:count] = self._pending[self._position:self._position + count]
+        self._position += count
+        return count
+
+    def close(self):
+        self._raw.close()
+        super().close()
+
+
+class EmailSource(NamedTuple):
+    """
+    One raw email message and where to read it from.
+
+    kind:
+    - eml: the whole file at ``path``
+    - zip: zip member; ``offset`` is its local header, ``length`` the
+      compressed size and ``compression`` the zip compress type
+    - range: ``length`` raw bytes at ``offset`` (plain tar member, mbox message)
+    - bytes: message bytes carried in ``data``
+    """
+    path: str
+    kind: str = "eml"
+    member: str = None
+    email_id: str = None
+    offset: int = 0
+    length: int = None
+    size: int = None
+    compression: int = zipfile.ZIP_STORED
+    data: bytes = None
+
+    @property
+    def key(self) -> str:
+        """Stable id used by the ingest manifest (archive members: ``archive!member``)."""
+        path = os.path.abspath(self.path)
+        return path if self.member is None else f"{path}!{self.member}"
+
+    def stat(self):
+        """Return (size, mtime_ns); archive members take the archive's mtime."""
+        stat = os.stat(self.path)
+        size = stat.st_size if self.kind == "eml" else self.size
+        return size, stat.st_mtime_ns
+
+    def read_bytes(self) -> bytes:
+        """Read the raw message bytes."""
+        if self.kind == "bytes":
+            return self.data
+        with self.open() as f:
+            return f.read()
+
+    def materialize(self) -> "EmailSource":
+        """Return an in-memory copy so an archive member is read only once."""
+        if self.kind in ("eml", "bytes"):
+            return self
+        data = self.read_bytes()
+        return self._replace(kind="bytes", data=data, size=len(data))
+
+    def open(self):
+        """Open the message as a binary file object, streamed from the file or archive."""
+        if self.kind == "eml":
+            return open(self.path, "rb")
+        if self.kind == "bytes":
+            return BytesIO(self.data)
+        if self.kind == "range":
+            return io.BufferedReader(_RangeReader(self.path, self.offset, self.length))
+        if self.kind == "zip":
+            return _open_zip_member(self)
+        raise ValueError(f"Unknown email source kind '{self.kind}'")
+
+    def digest(self) -> str:
+        """SHA-256 of the message bytes (streamed)."""
+        if self.kind == "eml":
+            return file_digest(self.path)
+        with self.open() as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def as_source(source) -> EmailSource:
+    """Accept an EmailSource or a plain .eml path."""
+    if isinstance(source, EmailSource):
+        return source
+    path = str(source)
+    return EmailSource(path, email_id=Path(path).stem)
+
+
+# --------------------------------------------------------------------
+# Zip
+# --------------------------------------------------------------------
+def _open_zip_member(source: EmailSource):
+    """Stream one zip member from its byte range (stored/deflated), else through zipfile."""
+    if source.compression in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+        with open(source.path, "rb") as f:
+            f.seek(source.offset)
+            header = f.read(_ZIP_LOCAL_HEADER_SIZE)
+        if header[:4] == b"PK\x03\x04":
+            name_len = int.from_bytes(header[26:28], "little")
+            extra_len = int.from_bytes(header[28:30], "little")
+            data_offset = source.offset + _ZIP_LOCAL_HEADER_SIZE + name_len + extra_len
+            raw = _RangeReader(source.path, data_offset, source.length)
+            if source.compression == zipfile.ZIP_STORED:
+                return io.BufferedReader(raw)
+            return io.BufferedReader(_InflateReader(raw))
+
+    zf = zipfile.ZipFile(source.path)
+    try:
+        return zf.open(source.member)
+    finally:
+        zf.close()  # the open member keeps the archive file open until it is closed
+
+
+def iter_zip_sources(path: str):
+    """Yield one EmailSource per .eml member of a zip archive."""
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(EML_SUFFIX):
+                continue
+            # Encrypted members go through zipfile (which will report the error)
+            compression = -1 if info.flag_bits & 0x1 else info.compress_type
+            yield EmailSource(
+                path, "zip", info.filename, Path(info.filename).stem,
+                offset=info.header_offset, length=info.compress_size,
+                size=info.file_size, compression=compression,
+            )
+
+
+# --------------------------------------------------------------------
+# Tar
+# --------------------------------------------------------------------
+def iter_tar_sources(path: str, keep=None):
+    """
+    Yield one EmailSource per .eml member of a tar archive.
+
+    Plain tars yield byte ranges; compressed tars are streamed once and
+    yield each member's bytes. Members whose email_id fails ``keep`` are
+    skipped before their bytes are read.
+    """
+    compressed = path.lower().endswith(COMPRESSED_TAR_SUFFIXES)
+    with tarfile.open(path, "r|*" if compressed else "r:") as tf:
+        for member in tf:
+            if not member.isfile() or not member.name.lower().endswith(EML_SUFFIX):
+                continue
+            email_id = Path(member.name).stem
+            if keep is not None and not keep(email_id):
+                continue
+            if compressed:
+                data = tf.extractfile(member).read()
+                yield EmailSource(path, "bytes", member.name, email_id, size=len(data), data=data)
+            else:
+                yield EmailSource(
+                    path, "range", member.name, email_id,
+                    offset=member.offset_data, length=member.size, size=member.size,
+                )
+
+
+# --------------------------------------------------------------------
+# Mbox
+# --------------------------------------------------------------------
+def _iter_mbox_ranges(buffer):
+    """
+    Yield (offset, length) for each message in an mbox buffer.
+
+    Messages start after a line beginning with "From " and end before the
+    next one; the separator lines themselves are excluded.
+    """
+    if buffer[:5] == b"From ":
+        start = 0
+    else:
+        start = buffer.find(_MBOX_SEPARATOR)
+        if start == -1:
+            return
+        start += 1
+
+    size = len(buffer)
+    while True:
+        content = buffer.find(b"\n", start)
+        if content == -1:
+            return
+        content += 1
+        separator = buffer.find(_MBOX_SEPARATOR, content - 1)
+        end = size if separator == -1 else separator + 1
+        if end > content:
+            yield content, end - content
+        if separator == -1:
+            return
+        start = separator + 1
+
+
+def iter_mbox_sources(path: str):
+    """Yield one EmailSource per message of an mbox file (memory-mapped scan)."""
+    if os.path.getsize(path) == 0:
+        return
+    stem = Path(path).stem
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for index, (offset, length) in enumerate(_iter_mbox_ranges(mm)):
+            member = f"{index:06d}"
+            yield EmailSource(path, "range", member, f"{stem}_{member}", offset=offset, length=length, size=length)
+
+
+# --------------------------------------------------------------------
+# Discovery
+# --------------------------------------------------------------------
+def source_kind(path: str):
+    """Return 'eml', 'zip', 'tar' or 'mbox' for a supported input file, else None."""
+    name = path.lower()
+    if name.endswith(EML_SUFFIX):
+        return "eml"
+    if name.endswith(ZIP_SUFFIXES):
+        return "zip"
+    if name.endswith(TAR_SUFFIXES + COMPRESSED_TAR_SUFFIXES):
+        return "tar"
+    if name.endswith(MBOX_SUFFIXES):
+        return "mbox"
+    return None
+
+
+def iter_path_sources(path: str, keep=None):
+    """
+    Yield the EmailSources contained in one input file.
+
+    Args:
+        path (str): .eml file or archive
+        keep (Callable[[str], bool]): Optional email_id predicate (e.g. shard filter)
+    """
+    kind = source_kind(path)
+    try:
+        if kind == "eml":
+            sources = [as_source(path)]
+        elif kind == "zip":
+            sources = iter_zip_sources(path)
+        elif kind == "tar":
+            sources = iter_tar_sources(path, keep)
+        elif kind == "mbox":
+            sources = iter_mbox_sources(path)
+        else:
+            return
+        for source in sources:
+            if keep is None or keep(source.email_id):
+                yield source
+    except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+        logger.error(f"Cannot read archive {path}: {e}")
+
+
+def iter_input_files(folder: str, recursive: bool = True):
+    """
+    Lazily yield supported input files under a folder with os.scandir.
+
+    Entries are visited in name order within each directory, so the walk is
+    deterministic; hidden entries and symlinked directories are skipped.
+    """
+    try:
+        with os.scandir(folder) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError as e:
+        logger.error(f"Cannot scan {folder}: {e}")
+        return
+
+    for entry in entries:
+        if entry.name.startswith("."):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            if recursive:
+                yield from iter_input_files(entry.path, recursive)
+        elif entry.is_file() and source_kind(entry.name) is not None:
+            yield entry.path
+
+
+def shard_of(email_id: str, shard_count: int) -> int:
+    """Stable shard number of an email_id (same on every host and Python process)."""
+    digest = hashlib.blake2b(email_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+def iter_sources(
+    folder: str,
+    recursive: bool = settings.RECURSIVE_INPUT,
+    shard_index: int = 0,
+    shard_count: int = 1,
+):
+    """
+    Lazily yield EmailSources for every supported input under a folder.
+
+    With ``shard_count`` > 1 only sources whose email_id hashes to
+    ``shard_index`` are yielded, so N hosts can split one input tree.
+    """
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"Invalid shard {shard_index} of {shard_count}")
+    keep = None
+    if shard_count > 1:
+        keep = lambda email_id: shard_of(email_id, shard_count) == shard_index
+
+    for path in iter_input_files(folder, recursive):
+        yield from iter_path_sources(path, keep)
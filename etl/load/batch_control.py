@@ -8,9 +8,8 @@ Now persists control metadata to SQLite and CSV.
 import os
 import pandas as pd
 from datetime import datetime
-from sqlalchemy import create_engine
 from etl.core.logger import get_logger
-from config import settings
+from etl.load.sqlite_sink import get_sqlite_sink
 
 logger = get_logger(__name__)
 
@@ -52,6 +51,7 @@ class BatchControl:
     # --------------------------------------------------------------
     def persist(self, duration: float):
         record = {
+            "batch_id": self.ctx.batch_id,
             "batch_name": self.batch_name,
             "start_time": self.start_time,
             "end_time": self.end_time,
@@ -60,20 +60,26 @@ class BatchControl:
             "rows_loaded": self.rows_loaded,
             "status": self.status,
             "created_at": datetime.now(),
+            "shard_index": self.ctx.shard_index,
+            "shard_count": self.ctx.shard_count,
         }
 
         df = pd.DataFrame([record])
-        output_dir = settings.LOCAL_OUTPUT_DIR
         os.makedirs(self.ctx.output_dir, exist_ok=True)
 
         # --- Write to CSV (append mode)
         csv_path = os.path.join(self.ctx.output_dir, "batch_control.csv")
-        header = not os.path.exists(csv_path)
-        df.to_csv(csv_path, mode="a", header=header, index=False)
+        if not os.path.exists(csv_path):
+            df.to_csv(csv_path, index=False)
+        else:
+            existing = pd.read_csv(csv_path, nrows=0).columns
+            if set(df.columns) <= set(existing):
+                df.reindex(columns=existing).to_csv(csv_path, mode="a", header=False, index=False)
+            else:
+                # New columns: rewrite the file with the widened header (old rows get blanks)
+                pd.concat([pd.read_csv(csv_path), df], ignore_index=True).to_csv(csv_path, index=False)
 
         # --- Write to SQLite
-        engine = create_engine(f"sqlite:///{os.path.join(self.ctx.output_dir, 'etl_demo.db')}")
-        with engine.connect() as conn:
-            df.to_sql("batch_control", conn, if_exists="append", index=False)
+        get_sqlite_sink(self.ctx.db_path).append(df, "batch_control")
 
         logger.info(f"Batch control record saved to {csv_path} and SQLite.")
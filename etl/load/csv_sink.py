@@ -0,0 +1,159 @@
+"""
+etl/load/csv_sink.py
+--------------------
+Streaming CSV sink.
+
+- Keeps one open handle per output file for the whole run
+- Writes the header once per file and appends each chunk
+- Optional gzip / bz2 / lzma compression (standard library)
+- Optional rotation by size (uncompressed bytes) and/or batch_dt
+- Optional append mode that continues existing files (incremental runs)
+"""
+
+import bz2
+import csv
+import gzip
+import lzma
+import os
+import pandas as pd
+from etl.core.logger import get_logger
+from etl.core.dtypes import timestamps_to_text
+from config import settings
+
+logger = get_logger(__name__)
+
+COMPRESSIONS = {
+    None: (open, ""),
+    "gzip": (gzip.open, ".gz"),
+    "bz2": (bz2.open, ".bz2"),
+    "lzma": (lzma.open, ".xz"),
+}
+
+
+def _read_header(path: str, opener) -> list:
+    """Column names of an existing CSV file (None if it is empty)."""
+    with opener(path, "rt", encoding="utf-8-sig", newline="") as f:
+        return next(csv.reader(f), None)
+
+
+class _CsvFile:
+    """
+    One open CSV output file.
+
+    With ``append`` an existing file is continued: no second header, and
+    chunks are aligned to the file's own header.
+    """
+
+    def __init__(self, path: str, opener, append: bool = False):
+        self.path = path
+        self.columns = _read_header(path, opener) if append and os.path.exists(path) else None
+        # utf-8 (not utf-8-sig) when continuing a file: compressed streams would get a second BOM
+        encoding = "utf-8" if self.columns else "utf-8-sig"
+        self.handle = opener(path, "at" if self.columns else "wt", encoding=encoding, newline="")
+        self.bytes_written = 0
+        self.rows = 0
+
+
+class CsvSink:
+    """
+    Append-only CSV writer around long-lived file handles.
+
+    File names are ``<name>[.<suffix>][_<batch_dt>][.<seq>].csv[.gz|.bz2|.xz]``;
+    the suffix (e.g. a worker id) keeps concurrent writers apart, the batch_dt
+    part is added with ``rotate_by_batch_dt`` and the sequence with
+    ``rotate_bytes``. Each file is opened on first write, flushed by flush()
+    and closed by close() or when it rotates. Existing files are truncated, unless
+    ``append`` is set: then they are continued under their existing header
+    (incremental runs that only load new files).
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        compression: str = settings.CSV_COMPRESSION,
+        rotate_bytes: int = settings.CSV_ROTATE_BYTES,
+        rotate_by_batch_dt: bool = settings.CSV_ROTATE_BY_BATCH_DT,
+        suffix: str = None,
+        append: bool = False,
+    ):
+        compression = None if compression in (None, "", "none") else compression
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown CSV compression '{compression}'. Use gzip, bz2, lzma or none.")
+        self.output_dir = output_dir
+        self.opener, self.extension = COMPRESSIONS[compression]
+        self.rotate_bytes = rotate_bytes
+        self.rotate_by_batch_dt = rotate_by_batch_dt
+        self.suffix = suffix
+        self.append = append
+        self._files = {}
+        self._sequence = {}
+        self._columns = {}
+
+    def _file_name(self, name: str, batch_dt, sequence: int) -> str:
+        stem = name
+        if self.suffix:
+            stem += f".{self.suffix}"
+        if batch_dt is not None:
+            stem += f"_{batch_dt}"
+        if self.rotate_bytes:
+            stem += f".{sequence:04d}"
+        return os.path.join(self.output_dir, f"{stem}.csv{self.extension}")
+
+    def _open(self, name: str, batch_dt) -> _CsvFile:
+        key = (name, batch_dt)
+        sequence = self._sequence.get(key, 0)
+        self._sequence[key] = sequence + 1
+        csv_file = _CsvFile(self._file_name(name, batch_dt, sequence), self.opener, self.append)
+        self._files[key] = csv_file
+        return csv_file
+
+    def _write_part(self, df: pd.DataFrame, name: str, batch_dt):
+        key = (name, batch_dt)
+        csv_file = self._files.get(key)
+        if csv_file is not None and self.rotate_bytes and csv_file.bytes_written >= self.rotate_bytes:
+            self._close_file(key)
+            csv_file = None
+        if csv_file is None:
+            csv_file = self._open(name, batch_dt)
+
+        if csv_file.columns:
+            df = df.reindex(columns=csv_file.columns)
+        header = csv_file.rows == 0 and not csv_file.columns
+        text = timestamps_to_text(df).to_csv(index=False, header=header, lineterminator="\n")
+        csv_file.handle.write(text)
+        csv_file.bytes_written += len(text)
+        csv_file.rows += len(df)
+
+    def write(self, df: pd.DataFrame, name: str):
+        """Append a chunk; columns are aligned to the first chunk written for ``name``."""
+        if df.empty:
+            return
+
+        columns = self._columns.setdefault(name, list(df.columns))
+        df = df.reindex(columns=columns)
+
+        if self.rotate_by_batch_dt and "batch_dt" in df.columns:
+            for batch_dt, part in df.groupby("batch_dt", sort=True, observed=True):
+                self._write_part(part, name, batch_dt)
+        else:
+            self._write_part(df, name, None)
+
+    def flush(self):
+        """
+        Push written chunks to disk so the files are readable before close().
+
+        Uncompressed files are complete after a flush; compressed streams are
+        only finished (end-of-stream marker) by close().
+        """
+        for csv_file in self._files.values():
+            csv_file.handle.flush()
+
+    def _close_file(self, key):
+        csv_file = self._files.pop(key)
+        csv_file.handle.close()
+        logger.info(f"Closed CSV {csv_file.path} ({csv_file.rows} rows)")
+
+    def close(self):
+        """Flush and close every open file."""
+        for key in list(self._files):
+            self._close_file(key)
@@ -0,0 +1,123 @@
+"""
+etl/load/manifest.py
+--------------------
+Incremental ingestion manifest.
+
+Tracks every input file (path, size, mtime, content hash, batch id, status)
+in the SQLite output so re-runs only dispatch new or changed files. Archive
+members are keyed as ``archive!member`` and carry the archive's mtime.
+"""
+
+from datetime import datetime
+from etl.core.logger import get_logger
+from etl.extract.sources import as_source
+from etl.load.sqlite_sink import get_sqlite_sink
+
+logger = get_logger(__name__)
+
+MANIFEST_TABLE = "ingest_manifest"
+_LOOKUP_BATCH = 500
+
+
+class IngestManifest:
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.sink = get_sqlite_sink(ctx.db_path)
+        self._ensure_table()
+
+    def _ensure_table(self):
+        with self.sink.transaction() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    content_hash TEXT,
+                    batch_id TEXT,
+                    status TEXT,
+                    updated_at TEXT
+                )
+            """)
+
+    # --------------------------------------------------------------
+    # Lookup
+    # --------------------------------------------------------------
+    def _loaded_records(self, conn, paths: list) -> dict:
+        """Return {path: (size, mtime_ns, content_hash)} for SUCCESS records."""
+        query = (
+            f"SELECT path, size, mtime_ns, content_hash FROM {MANIFEST_TABLE} "
+            f"WHERE status = 'SUCCESS' AND path IN ({', '.join('?' * len(paths))})"
+        )
+        return {path: rest for path, *rest in conn.execute(query, paths)}
+
+    def filter_pending(self, file_list: list) -> list:
+        """
+        Return the files that are new or changed since they were last loaded.
+
+        A file is skipped when a SUCCESS record has the same size and mtime.
+        When only the mtime differs (e.g. touched or re-copied), the content
+        hash decides, and the stored mtime is refreshed for unchanged files;
+        files recorded without a hash (non-incremental runs) are reloaded.
+        """
+        pending = []
+        touched = []
+
+        with self.sink.transaction() as conn:
+            for start in range(0, len(file_list), _LOOKUP_BATCH):
+                batch = file_list[start:start + _LOOKUP_BATCH]
+                sources = [as_source(file) for file in batch]
+                known = self._loaded_records(conn, [source.key for source in sources])
+
+                for file, source in zip(batch, sources):
+                    record = known.get(source.key)
+                    size, mtime_ns = source.stat()
+                    if record is None or record[0] != size:
+                        pending.append(file)
+                    elif record[1] == mtime_ns:
+                        continue
+                    elif record[2] is not None and record[2] == source.digest():
+                        touched.append((mtime_ns, source.key))
+                    else:
+                        pending.append(file)
+
+            if touched:
+                conn.executemany(f"UPDATE {MANIFEST_TABLE} SET mtime_ns = ? WHERE path = ?", touched)
+
+        logger.info(
+            f"Manifest: {len(pending)} new/changed, {len(file_list) - len(pending)} already loaded "
+            f"({len(touched)} touched but unchanged)"
+        )
+        return pending
+
+    # --------------------------------------------------------------
+    # Persistence
+    # --------------------------------------------------------------
+    def record(self, file_rows: list):
+        """
+        Upsert processed files.
+
+        Args:
+            file_rows (list[tuple]): (source key, size, mtime_ns, content_hash, status)
+                rows as returned by process_file_batch
+        """
+        if not file_rows:
+            return
+
+        updated_at = datetime.now().isoformat(sep=" ")
+        params = [
+            (key, size, mtime_ns, content_hash, self.ctx.batch_id, status, updated_at)
+            for key, size, mtime_ns, content_hash, status in file_rows
+        ]
+        with self.sink.transaction() as conn:
+            conn.executemany(f"""
+                INSERT INTO {MANIFEST_TABLE} (path, size, mtime_ns, content_hash, batch_id, status, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime_ns = excluded.mtime_ns,
+                    content_hash = excluded.content_hash,
+                    batch_id = excluded.batch_id,
+                    status = excluded.status,
+                    updated_at = excluded.updated_at
+            """, params)
+        logger.info(f"Manifest updated for {len(params)} files (batch {self.ctx.batch_id})")
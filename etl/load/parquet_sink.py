@@ -0,0 +1,110 @@
+"""
+etl/load/parquet_sink.py
+------------------------
+Columnar Parquet sink partitioned by batch_dt.
+
+- Column types come from config/schema.py (MESSAGE_SCHEMA, ATTACHMENT_SCHEMA)
+- Hive-style layout: <output_dir>/<name>/batch_dt=YYYY-MM-DD/part-<batch_id>-<seq>.parquet
+- Every write adds new part files; earlier files are never rewritten
+
+Requires the optional ``pyarrow`` dependency.
+"""
+
+import os
+import pandas as pd
+from etl.core.logger import get_logger
+from etl.core.utils import parse_utc_timestamps
+from config.schema import TABLE_SCHEMAS
+
+logger = get_logger(__name__)
+
+PARTITION_COLUMN = "batch_dt"
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "The Parquet sink requires pyarrow. Install it with `uv pip install pyarrow`."
+        ) from e
+    return pyarrow
+
+
+def arrow_schema(df: pd.DataFrame, name: str):
+    """
+    Build the Arrow schema for the DataFrame's columns from config/schema.py.
+    Columns not declared in the schema keep their inferred type.
+    """
+    pa = _import_pyarrow()
+    arrow_types = {
+        "STRING": pa.string(),
+        "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+        "DATE": pa.date32(),
+        "BOOLEAN": pa.bool_(),
+    }
+    declared = {col["name"]: arrow_types[col["type"]] for col in TABLE_SCHEMAS.get(name, [])}
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    return pa.schema([
+        pa.field(field.name, declared.get(field.name, field.type))
+        for field in inferred
+    ])
+
+
+def _coerce_types(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """Convert string timestamps/dates to real datetimes so Arrow can cast them."""
+    df = df.copy()
+    for col in TABLE_SCHEMAS.get(name, []):
+        column = col["name"]
+        if column not in df.columns or pd.api.types.is_datetime64_any_dtype(df[column]):
+            continue
+        if col["type"] == "TIMESTAMP":
+            df[column] = parse_utc_timestamps(df[column])
+        elif col["type"] == "DATE":
+            df[column] = pd.to_datetime(df[column], errors="coerce").dt.date
+    return df
+
+
+class ParquetSink:
+    def __init__(self, output_dir: str, batch_id: str):
+        self.pa = _import_pyarrow()
+        self.output_dir = output_dir
+        self.batch_id = batch_id
+        self._sequence = {}
+
+    def write(self, df: pd.DataFrame, name: str) -> list:
+        """
+        Append a chunk as new Parquet part files, one per batch_dt partition.
+
+        Returns:
+            list[str]: Paths of the files written
+        """
+        if df.empty:
+            return []
+
+        partitions = (
+            df.groupby(PARTITION_COLUMN, sort=True, dropna=False, observed=True)
+            if PARTITION_COLUMN in df.columns
+            else [(None, df)]
+        )
+
+        paths = []
+        for batch_dt, part in partitions:
+            part_dir = os.path.join(self.output_dir, name)
+            if batch_dt is not None:
+                part_dir = os.path.join(part_dir, f"{PARTITION_COLUMN}={batch_dt}")
+                part = part.drop(columns=[PARTITION_COLUMN])
+            os.makedirs(part_dir, exist_ok=True)
+
+            sequence = self._sequence.get(name, 0)
+            self._sequence[name] = sequence + 1
+            file_path = os.path.join(part_dir, f"part-{self.batch_id}-{sequence:05d}.parquet")
+
+            part = _coerce_types(part, name)
+            table = self.pa.Table.from_pandas(part, schema=arrow_schema(part, name), preserve_index=False)
+            self.pa.parquet.write_table(table, file_path, compression="zstd")
+            paths.append(file_path)
+
+        logger.info(f"Wrote {len(df)} rows of {name} to {len(paths)} Parquet file(s) under {self.output_dir}")
+        return paths
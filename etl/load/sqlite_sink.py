@@ -0,0 +1,348 @@
+"""
+etl/load/sqlite_sink.py
+-----------------------
+High-throughput SQLite sink.
+
+- One pooled connection per database file for the whole run
+- WAL journaling and tuned synchronous/cache_size/temp_store pragmas
+- Bulk loads via executemany batches inside explicit transactions
+- Append and keyed upsert modes (keys/indexes from config/schema.py); once
+  an upsert load has keyed a table, appends to it merge on the key too
+- Optional FTS5 full-text index over messages maintained with every load
+  (search_index / SQLITE_SEARCH_INDEX, off by default; see etl/load/search_index.py)
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import pandas as pd
+from pandas.api import types as ptypes
+from etl.core.logger import get_logger
+from etl.core.utils import format_timestamps
+from etl.load.search_index import (
+    INDEXED_TABLES,
+    SEARCH_TABLE,
+    ensure_search_index,
+    index_new_messages,
+    last_message_rowid,
+    reindex_messages,
+)
+from config import settings
+from config.schema import TABLE_SCHEMAS, TABLE_KEYS, TABLE_INDEXES
+
+logger = get_logger(__name__)
+
+SQLITE_TYPES = {
+    "STRING": "TEXT",
+    "TIMESTAMP": "TEXT",
+    "DATE": "TEXT",
+    "BOOLEAN": "INTEGER",
+}
+
+
+def _column_list(columns) -> str:
+    """Quote and join column names for SQL."""
+    return ", ".join(f'"{col}"' for col in columns)
+
+
+def _sqlite_type(series: pd.Series) -> str:
+    """SQLite column type for a DataFrame column not declared in the schema."""
+    if ptypes.is_bool_dtype(series) or ptypes.is_integer_dtype(series):
+        return "INTEGER"
+    if ptypes.is_float_dtype(series):
+        return "REAL"
+    return "TEXT"
+
+
+def _column_values(series: pd.Series) -> list:
+    """Convert a column to a list of sqlite3-compatible Python values (None for nulls)."""
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = format_timestamps(series)
+    elif ptypes.is_datetime64_any_dtype(series):
+        series = series.dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+    values = series.astype(object)
+    return values.where(series.notna(), None).tolist()
+
+
+def _unique_index_name(table: str) -> str:
+    """Name of the unique index on TABLE_KEYS[table], created by upsert loads."""
+    return f"ux_{table}_{'_'.join(TABLE_KEYS[table])}"
+
+
+def _upsert_statement(table: str, columns: list) -> str:
+    """INSERT ... ON CONFLICT statement merging rows on TABLE_KEYS[table]."""
+    keys = TABLE_KEYS.get(table, [])
+    updates = [col for col in columns if col not in keys]
+    set_clause = ", ".join(f'"{col}" = excluded."{col}"' for col in updates)
+    return (
+        f'INSERT INTO "{table}" ({_column_list(columns)}) VALUES ({", ".join("?" * len(columns))}) '
+        f"ON CONFLICT({_column_list(keys)}) DO "
+        + (f"UPDATE SET {set_clause}" if updates else "NOTHING")
+    )
+
+
+def dataframe_rows(df: pd.DataFrame) -> list:
+    """Convert a DataFrame to a list of row tuples ready for executemany."""
+    return list(zip(*(_column_values(df[col]) for col in df.columns)))
+
+
+class SQLiteSink:
+    """
+    Bulk loader around one long-lived sqlite3 connection.
+
+    Use get_sqlite_sink(db_path) to share a sink across Storage, BatchControl
+    and the ingest manifest for the whole run. Writes are serialized with a
+    lock so the sink can be shared by writer threads.
+    """
+
+    def __init__(self, db_path: str, batch_rows: int = settings.SQLITE_BATCH_ROWS,
+                 search_index: bool = settings.SQLITE_SEARCH_INDEX,
+                 deduplicate_keys: bool = settings.SQLITE_UPSERT_DEDUPLICATE):
+        self.db_path = db_path
+        self.batch_rows = max(1, batch_rows)
+        self.search_index = search_index
+        self.deduplicate_keys = deduplicate_keys
+        self._lock = threading.RLock()
+        self._known_tables = {}
+        self._search_checked = False
+
+        self.conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False, timeout=30)
+        self.conn.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        self.conn.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        self.conn.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        logger.info(f"Opened SQLite sink {db_path} (journal_mode={settings.SQLITE_JOURNAL_MODE})")
+
+    # ------------------------------------------------------------------
+    # Transactions
+    # ------------------------------------------------------------------
+    @contextmanager
+    def transaction(self):
+        """Run statements in one explicit transaction on the shared connection."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def _executemany(self, conn, statement: str, rows: list):
+        for start in range(0, len(rows), self.batch_rows):
+            conn.executemany(statement, rows[start:start + self.batch_rows])
+
+    # ------------------------------------------------------------------
+    # DDL
+    # ------------------------------------------------------------------
+    def _resolve_duplicate_keys(self, conn, table: str, keys: list) -> int:
+        """
+        Make the table ready for its unique key index.
+
+        Tables filled by append loads can hold the same key several times
+        (re-runs). By default this raises, listing the conflicting keys; with
+        ``deduplicate_keys`` (SQLITE_UPSERT_DEDUPLICATE) the rows that repeat
+        a key are deleted instead, keeping the last loaded one (highest rowid).
+        Rows with a NULL key part are left alone, as the index allows them.
+
+        Returns:
+            int: Number of deleted rows
+        """
+        not_null = " AND ".join(f'"{key}" IS NOT NULL' for key in keys)
+        duplicates = f"""
+            SELECT {_column_list(keys)}, COUNT(*) FROM "{table}" WHERE {not_null}
+            GROUP BY {_column_list(keys)} HAVING COUNT(*) > 1
+        """
+        conflicts = conn.execute(f"{duplicates} LIMIT 10").fetchall()
+        if not conflicts:
+            return 0
+        if not self.deduplicate_keys:
+            total = conn.execute(f"SELECT COUNT(*) FROM ({duplicates})").fetchone()[0]
+            listed = "; ".join(
+                ", ".join(f"{key}={value!r}" for key, value in zip(keys, row[:-1])) + f" ({row[-1]} rows)"
+                for row in conflicts
+            )
+            raise ValueError(
+                f"Cannot create the unique key {keys} on {table}: {total} keys are loaded more than once "
+                f"(by earlier append loads), e.g. {listed}. Remove the duplicates, or set "
+                f"SQLITE_UPSERT_DEDUPLICATE=true to keep the last loaded row of each key."
+            )
+
+        removed = conn.execute(f"""
+            DELETE FROM "{table}"
+            WHERE {not_null} AND rowid NOT IN (
+                SELECT MAX(rowid) FROM "{table}" WHERE {not_null} GROUP BY {_column_list(keys)}
+            )
+        """).rowcount
+        if table == "messages" and conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)
+        ).fetchone():
+            conn.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid NOT IN (SELECT rowid FROM messages)")
+        logger.warning(f"Removed {removed} duplicate rows from {table} before creating its unique key on {keys}")
+        return removed
+
+    @staticmethod
+    def _has_unique_key(conn, table: str) -> bool:
+        """True when an earlier upsert load created the table's unique key index."""
+        if table not in TABLE_KEYS:
+            return False
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (_unique_index_name(table),)
+        ).fetchone() is not None
+
+    def ensure_table(self, conn, df: pd.DataFrame, table: str, keyed: bool = False):
+        """
+        Create the table from config/schema.py (plus any extra DataFrame columns)
+        and add columns missing from tables created by earlier loads. With
+        ``keyed=True`` the unique key and lookup indexes are created as well;
+        duplicate keys left by earlier append loads raise (see
+        _resolve_duplicate_keys). The first load of messages or attachments also sets up the full-text
+        search index (creating the other table if needed).
+        """
+        state = self._known_tables.get(table)
+        if state is not None and set(df.columns) <= state["columns"] and (state["keyed"] or not keyed):
+            return
+
+        columns = {col["name"]: SQLITE_TYPES.get(col["type"], "TEXT") for col in TABLE_SCHEMAS.get(table, [])}
+        for col in df.columns:
+            columns.setdefault(col, _sqlite_type(df[col]))
+
+        column_ddl = ", ".join(f'"{name}" {sql_type}' for name, sql_type in columns.items())
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({column_ddl})')
+
+        existing = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+        for name, sql_type in columns.items():
+            if name not in existing:
+                conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {sql_type}')
+                existing.add(name)
+
+        has_key = bool(state and state["keyed"]) or self._has_unique_key(conn, table)
+        if keyed:
+            if table not in TABLE_KEYS:
+                raise ValueError(f"No key defined for table '{table}' in config/schema.py")
+            keys = TABLE_KEYS[table]
+            unique_index = _unique_index_name(table)
+            if not has_key:
+                self._resolve_duplicate_keys(conn, table, keys)
+            conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{unique_index}" ON "{table}" ({_column_list(keys)})')
+            # A plain lookup index on the same columns (search index setup) is now redundant
+            conn.execute(f'DROP INDEX IF EXISTS "ix_{table}_{"_".join(keys)}"')
+            for index_cols in TABLE_INDEXES.get(table, []):
+                conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "ix_{table}_{"_".join(index_cols)}" '
+                    f'ON "{table}" ({_column_list(index_cols)})'
+                )
+
+        self._known_tables[table] = {"columns": existing, "keyed": keyed or has_key}
+
+        if self.search_index and table in INDEXED_TABLES and not self._search_checked:
+            self._search_checked = True
+            for other in INDEXED_TABLES:
+                if other != table:
+                    schema_columns = [col["name"] for col in TABLE_SCHEMAS[other]]
+                    self.ensure_table(conn, pd.DataFrame(columns=schema_columns), other)
+            self.search_index = ensure_search_index(conn)
+
+    # ------------------------------------------------------------------
+    # Search index
+    # ------------------------------------------------------------------
+    def _update_search_index(self, conn, df: pd.DataFrame, table: str, appended_after: int = None):
+        """
+        Bring the full-text index up to date after loading ``df`` into ``table``.
+
+        Appended messages are indexed by rowid (``appended_after`` is the last
+        rowid before the load); upserted messages and the messages of loaded
+        attachments are re-indexed by message_id.
+        """
+        if not self.search_index or table not in INDEXED_TABLES or "message_id" not in df.columns:
+            return
+        if appended_after is not None:
+            index_new_messages(conn, appended_after)
+        else:
+            reindex_messages(conn, df["message_id"].dropna().unique().tolist())
+
+    # ------------------------------------------------------------------
+    # Loads
+    # ------------------------------------------------------------------
+    def append(self, df: pd.DataFrame, table: str) -> int:
+        """
+        Insert all rows in one transaction.
+
+        A table that already carries its unique key (created by an earlier
+        upsert load) cannot take repeated keys, so rows are merged on the key
+        there instead, exactly as upsert would.
+        """
+        if df.empty:
+            return 0
+        columns = list(df.columns)
+        statement = f'INSERT INTO "{table}" ({_column_list(columns)}) VALUES ({", ".join("?" * len(columns))})'
+        rows = dataframe_rows(df)
+        with self.transaction() as conn:
+            self.ensure_table(conn, df, table)
+            if self._known_tables[table]["keyed"]:
+                self._executemany(conn, _upsert_statement(table, columns), rows)
+                self._update_search_index(conn, df, table)
+                return len(rows)
+            appended_after = last_message_rowid(conn) if self.search_index and table == "messages" else None
+            self._executemany(conn, statement, rows)
+            self._update_search_index(conn, df, table, appended_after)
+        return len(rows)
+
+    def upsert(self, df: pd.DataFrame, table: str) -> int:
+        """Merge rows on TABLE_KEYS[table] in one transaction."""
+        if df.empty:
+            return 0
+        statement = _upsert_statement(table, list(df.columns))
+        rows = dataframe_rows(df)
+        with self.transaction() as conn:
+            self.ensure_table(conn, df, table, keyed=True)
+            self._executemany(conn, statement, rows)
+            self._update_search_index(conn, df, table)
+        return len(rows)
+
+    def write(self, df: pd.DataFrame, table: str, mode: str = settings.SQLITE_LOAD_MODE) -> int:
+        """Load a DataFrame with the given mode ('append' or 'upsert')."""
+        if mode == "upsert":
+            return self.upsert(df, table)
+        if mode == "append":
+            return self.append(df, table)
+        raise ValueError(f"Unknown SQLite load mode '{mode}'. Use 'append' or 'upsert'.")
+
+    def close(self):
+        """Close the connection and drop the sink from the shared cache."""
+        with self._lock:
+            self.conn.close()
+        with _SINKS_LOCK:
+            if _SINKS.get(os.path.abspath(self.db_path)) is self:
+                del _SINKS[os.path.abspath(self.db_path)]
+        logger.info(f"Closed SQLite sink {self.db_path}")
+
+
+# --------------------------------------------------------------------
+# Shared sinks (one per database file)
+# --------------------------------------------------------------------
+_SINKS = {}
+_SINKS_LOCK = threading.Lock()
+
+
+def get_sqlite_sink(db_path: str, **options) -> SQLiteSink:
+    """
+    Return the shared sink for a database file, opening it on first use.
+
+    ``options`` (SQLiteSink keyword arguments) only apply when the sink is opened.
+    """
+    key = os.path.abspath(db_path)
+    with _SINKS_LOCK:
+        sink = _SINKS.get(key)
+        if sink is None:
+            sink = _SINKS[key] = SQLiteSink(db_path, **options)
+        return sink
+
+
+def close_sqlite_sink(db_path: str):
+    """Close the shared sink for a database file, if one is open."""
+    with _SINKS_LOCK:
+        sink = _SINKS.get(os.path.abspath(db_path))
+    if sink is not None:
+        sink.close()
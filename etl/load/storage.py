@@ -3,49 +3,115 @@ etl/load/storage.py
 -------------------
 Handles persistence of DataFrames.
 
-- Local storage (CSV, SQLite)
+- Local storage (CSV, SQLite, partitioned Parquet)
 - Extensible to cloud (BigQuery, S3, GCS) if needed
 """
 
-import os
 import pandas as pd
-from sqlalchemy import create_engine
 from etl.core.logger import get_logger
+from etl.load.sqlite_sink import get_sqlite_sink, close_sqlite_sink
+from etl.load.parquet_sink import ParquetSink
+from etl.load.csv_sink import CsvSink
 from config import settings
 
 logger = get_logger(__name__)
 
 
 class Storage:
-    def __init__(self, ctx):
+    """
+    Writes DataFrames to the configured sinks.
+
+    Use as a context manager (or call close()) so CSV files are closed and
+    the shared SQLite sink is released at the end of the run.
+    """
+
+    def __init__(self, ctx, csv_compression: str = settings.CSV_COMPRESSION,
+                 csv_rotate_bytes: int = settings.CSV_ROTATE_BYTES,
+                 csv_rotate_by_batch_dt: bool = settings.CSV_ROTATE_BY_BATCH_DT,
+                 csv_suffix: str = None, csv_append: bool = False):
         self.ctx = ctx
+        self._csv = CsvSink(ctx.output_dir, csv_compression, csv_rotate_bytes, csv_rotate_by_batch_dt, csv_suffix,
+                            append=csv_append)
+        self._parquet = None
+
+    def write(self, df: pd.DataFrame, name: str, sinks=settings.OUTPUT_SINKS,
+              sqlite_mode: str = settings.SQLITE_LOAD_MODE):
+        """Write one DataFrame to every configured sink ('csv', 'sqlite', 'parquet')."""
+        for sink in sinks:
+            if sink == "csv":
+                self.write_csv(df, name)
+            elif sink == "sqlite":
+                self.write_sqlite(df, name, mode=sqlite_mode)
+            elif sink == "parquet":
+                self.write_parquet(df, name)
+            else:
+                raise ValueError(f"Unknown output sink '{sink}'. Use csv, sqlite or parquet.")
 
     # ------------------------------------------------------------------
     # CSV
     # ------------------------------------------------------------------
     def write_csv(self, df: pd.DataFrame, name: str):
-        """Write DataFrame to CSV in output dir."""
+        """
+        Append DataFrame to CSV in output dir through the streaming CSV sink.
+
+        The first write for a name truncates the file and writes the header
+        (with ``csv_append`` an existing file is continued instead);
+        subsequent writes from the same Storage instance (streaming chunks)
+        append to the open handle. Each call flushes the file, so it is
+        readable without close() (compressed files are finished by close()).
+        """
         if df.empty:
             logger.warning(f"No data to write for {name}. Skipping CSV export.")
             return
 
-        file_path = os.path.join(self.ctx.output_dir, f"{name}.csv")
-        df.to_csv(file_path, index=False, encoding="utf-8-sig")
-        logger.info(f"Saved {len(df)} rows to CSV: {file_path}")
+        self._csv.write(df, name)
+        self._csv.flush()
+        logger.info(f"Appended {len(df)} rows to CSV: {name}")
 
     # ------------------------------------------------------------------
     # SQLite
     # ------------------------------------------------------------------
-    def write_sqlite(self, df: pd.DataFrame, table: str):
-        """Append DataFrame to SQLite table."""
+    def write_sqlite(self, df: pd.DataFrame, table: str, mode: str = settings.SQLITE_LOAD_MODE):
+        """
+        Load DataFrame into SQLite table through the shared bulk sink.
+
+        mode:
+        - append: plain INSERT of every row (merged on the key instead when an
+          earlier upsert load created the table's unique key)
+        - upsert: keyed merge on TABLE_KEYS[table] inside one transaction;
+          re-loading the same rows updates them instead of duplicating
+        """
         if df.empty:
             logger.warning(f"No data to write for {table}. Skipping SQLite export.")
             return
 
-        # engine = create_engine(self.sqlite_conn)
-        engine = create_engine(f"sqlite:///{self.ctx.db_path}")
-        df.to_sql(table, engine, if_exists="append", index=False)
-        logger.info(f"Appended {len(df)} rows into SQLite table: {table}")
+        rows = get_sqlite_sink(self.ctx.db_path).write(df, table, mode=mode)
+        action = "Upserted" if mode == "upsert" else "Appended"
+        logger.info(f"{action} {rows} rows into SQLite table: {table}")
+
+    # ------------------------------------------------------------------
+    # Parquet
+    # ------------------------------------------------------------------
+    def write_parquet(self, df: pd.DataFrame, name: str):
+        """Append DataFrame as Parquet part files partitioned by batch_dt."""
+        if df.empty:
+            logger.warning(f"No data to write for {name}. Skipping Parquet export.")
+            return
+
+        if self._parquet is None:
+            self._parquet = ParquetSink(self.ctx.output_dir, self.ctx.batch_id)
+        self._parquet.write(df, name)
+
+    def close(self):
+        """Close open CSV files and the shared SQLite sink for this run's database."""
+        self._csv.close()
+        close_sqlite_sink(self.ctx.db_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     # ------------------------------------------------------------------
     # Optional Cloud Placeholders (for extension)
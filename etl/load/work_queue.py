@@ -0,0 +1,214 @@
+"""
+etl/load/work_queue.py
+----------------------
+Durable SQLite work queue with leases.
+
+- ``work_queue`` table in the run's SQLite database (next to the loaded data)
+- Producers enqueue EmailSource descriptors once; re-enqueueing is a no-op
+- Any number of worker processes claim batches under time-limited leases,
+  keep them alive with a heartbeat, and mark them DONE / FAILED
+- Leases of dead workers expire and their files return to PENDING;
+  files whose leases expired ``max_attempts`` times are marked FAILED
+"""
+
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from etl.core.logger import get_logger
+from etl.extract.sources import EmailSource
+from etl.load.sqlite_sink import get_sqlite_sink
+from config import settings
+
+logger = get_logger(__name__)
+
+QUEUE_TABLE = "work_queue"
+_SOURCE_FIELDS = EmailSource._fields
+_SOURCE_COLUMNS = ", ".join(f'"{field}"' for field in _SOURCE_FIELDS)
+
+
+def default_worker_id() -> str:
+    """Worker id unique per host and process."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    def __init__(
+        self,
+        ctx,
+        lease_seconds: int = settings.QUEUE_LEASE_SECONDS,
+        max_attempts: int = settings.QUEUE_MAX_ATTEMPTS,
+    ):
+        self.ctx = ctx
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.sink = get_sqlite_sink(ctx.db_path)
+        self._ensure_table()
+
+    def _ensure_table(self):
+        with self.sink.transaction() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {QUEUE_TABLE} (
+                    key TEXT PRIMARY KEY,
+                    path TEXT,
+                    kind TEXT,
+                    member TEXT,
+                    email_id TEXT,
+                    "offset" INTEGER,
+                    length INTEGER,
+                    size INTEGER,
+                    compression INTEGER,
+                    data BLOB,
+                    status TEXT,
+                    owner TEXT,
+                    lease_until REAL,
+                    attempts INTEGER DEFAULT 0,
+                    updated_at TEXT
+                )
+            """)
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{QUEUE_TABLE}_status_lease ON {QUEUE_TABLE} (status, lease_until)"
+            )
+
+    # --------------------------------------------------------------
+    # Producer
+    # --------------------------------------------------------------
+    def enqueue(self, sources) -> int:
+        """
+        Add sources as PENDING work; keys already in the queue are left untouched.
+
+        Returns:
+            int: Number of newly queued sources
+        """
+        updated_at = datetime.now().isoformat(sep=" ")
+        params = [(source.key, *source, "PENDING", updated_at) for source in sources]
+        if not params:
+            return 0
+        with self.sink.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(f"""
+                INSERT OR IGNORE INTO {QUEUE_TABLE}
+                    (key, {_SOURCE_COLUMNS}, status, updated_at)
+                VALUES ({", ".join("?" * (len(_SOURCE_FIELDS) + 3))})
+            """, params)
+            added = conn.total_changes - before
+        logger.info(f"Work queue: {added} of {len(params)} sources enqueued")
+        return added
+
+    # --------------------------------------------------------------
+    # Workers
+    # --------------------------------------------------------------
+    def requeue_expired(self, conn=None) -> int:
+        """Return expired leases to PENDING (FAILED after max_attempts)."""
+        if conn is None:
+            with self.sink.transaction() as conn:
+                return self.requeue_expired(conn)
+
+        now = time.time()
+        updated_at = datetime.now().isoformat(sep=" ")
+        conn.execute(f"""
+            UPDATE {QUEUE_TABLE} SET status = 'FAILED', owner = NULL, updated_at = ?
+            WHERE status = 'LEASED' AND lease_until < ? AND attempts >= ?
+        """, (updated_at, now, self.max_attempts))
+        cursor = conn.execute(f"""
+            UPDATE {QUEUE_TABLE} SET status = 'PENDING', owner = NULL, updated_at = ?
+            WHERE status = 'LEASED' AND lease_until < ?
+        """, (updated_at, now))
+        if cursor.rowcount:
+            logger.warning(f"Work queue: re-queued {cursor.rowcount} expired leases")
+        return cursor.rowcount
+
+    def claim(self, owner: str, limit: int) -> list:
+        """
+        Lease up to ``limit`` PENDING sources for ``owner``.
+
+        Returns:
+            list[EmailSource]: Claimed sources, in enqueue order
+        """
+        with self.sink.transaction() as conn:
+            self.requeue_expired(conn)
+            rows = conn.execute(f"""
+                SELECT key, {_SOURCE_COLUMNS} FROM {QUEUE_TABLE}
+                WHERE status = 'PENDING' ORDER BY rowid LIMIT ?
+            """, (limit,)).fetchall()
+            if not rows:
+                return []
+            conn.executemany(f"""
+                UPDATE {QUEUE_TABLE}
+                SET status = 'LEASED', owner = ?, lease_until = ?, attempts = attempts + 1, updated_at = ?
+                WHERE key = ?
+            """, [
+                (owner, time.time() + self.lease_seconds, datetime.now().isoformat(sep=" "), row[0])
+                for row in rows
+            ])
+        return [EmailSource(*row[1:]) for row in rows]
+
+    def renew(self, owner: str) -> int:
+        """Extend every lease held by ``owner``."""
+        with self.sink.transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE {QUEUE_TABLE} SET lease_until = ? WHERE status = 'LEASED' AND owner = ?",
+                (time.time() + self.lease_seconds, owner),
+            )
+        return cursor.rowcount
+
+    def complete(self, owner: str, file_rows: list):
+        """
+        Mark processed sources DONE or FAILED.
+
+        Rows whose lease was lost (re-queued and claimed by another worker)
+        are left to their new owner.
+
+        Args:
+            file_rows (list[tuple]): (source key, size, mtime_ns, content_hash, status)
+                rows as returned by process_file_batch
+        """
+        if not file_rows:
+            return
+        updated_at = datetime.now().isoformat(sep=" ")
+        params = [
+            ("DONE" if status == "SUCCESS" else "FAILED", updated_at, key, owner)
+            for key, _, _, _, status in file_rows
+        ]
+        with self.sink.transaction() as conn:
+            conn.executemany(f"""
+                UPDATE {QUEUE_TABLE} SET status = ?, owner = NULL, lease_until = NULL, data = NULL, updated_at = ?
+                WHERE key = ? AND owner = ? AND status = 'LEASED'
+            """, params)
+
+    def has_open_work(self) -> bool:
+        """True while any source is PENDING or LEASED."""
+        with self.sink.transaction() as conn:
+            row = conn.execute(
+                f"SELECT 1 FROM {QUEUE_TABLE} WHERE status IN ('PENDING', 'LEASED') LIMIT 1"
+            ).fetchone()
+        return row is not None
+
+    def counts(self) -> dict:
+        """Return {status: count}."""
+        with self.sink.transaction() as conn:
+            return dict(conn.execute(f"SELECT status, COUNT(*) FROM {QUEUE_TABLE} GROUP BY status"))
+
+    # --------------------------------------------------------------
+    # Heartbeat
+    # --------------------------------------------------------------
+    def start_heartbeat(self, owner: str):
+        """
+        Renew ``owner``'s leases every third of the lease period in a daemon thread.
+
+        Returns:
+            threading.Event: Set it to stop the heartbeat
+        """
+        stop = threading.Event()
+        interval = max(1.0, self.lease_seconds / 3)
+
+        def beat():
+            while not stop.wait(interval):
+                try:
+                    self.renew(owner)
+                except Exception as e:
+                    logger.error(f"Work queue heartbeat failed for {owner}: {e}")
+
+        threading.Thread(target=beat, name=f"lease-heartbeat-{owner}", daemon=True).start()
+        return stop
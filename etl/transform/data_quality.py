@@ -1,65 +1,226 @@
 """
 etl/transform/data_quality.py
 -----------------------------
-Lightweight Data Quality (DQ) checks for parsed DataFrames.
+Rule-based Data Quality (DQ) checks for parsed DataFrames.
+
+- Rules are declared per table in config/data_quality.py
+- Each chunk is checked in one vectorized pass: one null mask shared by all
+  rules, one boolean mask per rule, no copies of offending rows
+- Per-rule counts and a capped sample of offending keys are accumulated over
+  the run and persisted to the ``dq_results`` SQLite table
+
+Uniqueness is checked within a chunk; duplicates across chunks are handled
+by the upsert load mode.
 """
 
+import json
+import threading
+from datetime import datetime
+import numpy as np
 import pandas as pd
 from etl.core.logger import get_logger
+from etl.core.utils import parse_utc_timestamps
+from etl.load.sqlite_sink import get_sqlite_sink
+from config import settings
+from config.data_quality import DQ_RULES, DQ_SAMPLE_COLUMNS
 
 logger = get_logger(__name__)
 
+DQ_TABLE = "dq_results"
 
-def check_nulls(df: pd.DataFrame, exclude: list = None):
-    """
-    Check for null values in DataFrame.
-    """
-    if df.empty:
-        logger.warning("DataFrame is empty, skipping null check.")
-        return pd.DataFrame()
-
-    exclude = exclude or []
-    columns_to_check = [col for col in df.columns if col not in exclude]
 
-    nan_counts = df[columns_to_check].isnull().sum()
-    total_nan_rows = df[columns_to_check].isnull().any(axis=1).sum()
+def _bound(value, now: pd.Timestamp):
+    """Parse a range bound (ISO-8601 or "now"); None means unbounded."""
+    if value is None:
+        return None
+    if value == "now":
+        return now
+    return parse_utc_timestamps(pd.Series([value])).iloc[0]
 
-    logger.info(f"Null counts per column:\n{nan_counts}")
-    logger.info(f"Total rows with nulls: {total_nan_rows}")
 
-    return df[df[columns_to_check].isnull().any(axis=1)]
+def _fullmatch(series: pd.Series, pattern: str) -> np.ndarray:
+    """Regex full match per row (False for nulls); categoricals match each category once."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        matched = series.cat.categories.astype("string").str.fullmatch(pattern).fillna(False).to_numpy(dtype=bool)
+        codes = series.cat.codes.to_numpy()
+        return np.where(codes >= 0, matched[codes], False)
+    return series.astype("string").str.fullmatch(pattern).fillna(False).to_numpy(dtype=bool)
 
 
-def check_duplicates(df: pd.DataFrame, subset: list = None):
+def rule_mask(df: pd.DataFrame, rule: dict, nulls: pd.DataFrame, refs: dict = None, now: pd.Timestamp = None):
     """
-    Check for duplicate rows by subset of columns.
-    """
-    if df.empty:
-        logger.warning("DataFrame is empty, skipping duplicate check.")
-        return pd.DataFrame()
-
-    subset = subset or ["email_id", "message_id"]
+    Boolean mask of the rows failing ``rule``.
 
-    duplicates = df[df.duplicated(subset=subset, keep=False)]
-    logger.info(f"Found {len(duplicates)} duplicate rows based on {subset}")
-
-    return duplicates
+    Args:
+        nulls (pd.DataFrame): df.isna() of (at least) the rule's columns
+        refs (dict): {table: DataFrame} for reference rules
+        now (pd.Timestamp): Value of the "now" range bound
 
+    Returns:
+        np.ndarray: Failing rows, or None when the rule cannot be evaluated
+            (missing column or referenced table)
+    """
+    columns = rule["columns"]
+    if any(col not in df.columns for col in columns):
+        return None
+
+    check = rule["check"]
+    if check == "not_null":
+        return nulls[columns].to_numpy().any(axis=1)
+    if check == "unique":
+        return df.duplicated(subset=columns, keep=False).to_numpy()
+
+    # Single-column checks; nulls never fail them
+    series = df[columns[0]]
+    present = ~nulls[columns[0]].to_numpy()
+    if check == "regex":
+        return present & ~_fullmatch(series, rule["pattern"])
+    if check == "range":
+        values = series if isinstance(series.dtype, pd.DatetimeTZDtype) else parse_utc_timestamps(series)
+        failed = np.zeros(len(df), dtype=bool)
+        low = _bound(rule.get("min"), now)
+        high = _bound(rule.get("max"), now)
+        if low is not None:
+            failed |= (values < low).to_numpy(dtype=bool)
+        if high is not None:
+            failed |= (values > high).to_numpy(dtype=bool)
+        return present & failed
+    if check == "reference":
+        ref = (refs or {}).get(rule["ref_table"])
+        if ref is None or rule["ref_column"] not in ref.columns:
+            return None
+        return present & ~series.isin(ref[rule["ref_column"]].dropna().unique()).to_numpy(dtype=bool)
+    raise ValueError(f"Unknown DQ check {check!r} in rule {rule['name']}")
+
+
+class DataQualityReport:
+    """
+    Evaluates the configured rules on each chunk and accumulates, per rule,
+    rows checked, rows failed and up to ``sample_size`` offending keys.
+    """
 
-def run_data_quality(df: pd.DataFrame, name: str = "DataFrame"):
+    def __init__(self, batch_id: str, rules: dict = None, sample_size: int = settings.DQ_SAMPLE_SIZE):
+        self.batch_id = batch_id
+        self.rules = DQ_RULES if rules is None else rules
+        self.sample_size = sample_size
+        self.now = pd.Timestamp.now(tz="UTC")
+        self._lock = threading.Lock()
+        self._results = {}
+
+    def check(self, df: pd.DataFrame, table: str, refs: dict = None) -> int:
+        """
+        Evaluate the table's rules on one chunk.
+
+        Args:
+            refs (dict): {table: DataFrame} of the chunk's other frames, for
+                reference rules
+
+        Returns:
+            int: Number of rule violations (rows failed, summed over rules)
+        """
+        return self._check(df, table, refs)[0]
+
+    def _check(self, df: pd.DataFrame, table: str, refs: dict = None):
+        """check(), also returning the mask of rows failing any rule."""
+        failed_any = np.zeros(len(df), dtype=bool)
+        rules = self.rules.get(table, [])
+        if df.empty or not rules:
+            return 0, failed_any
+
+        checked = sorted({col for rule in rules for col in rule["columns"] if col in df.columns})
+        nulls = df[checked].isna()
+        sample_columns = [col for col in DQ_SAMPLE_COLUMNS.get(table, []) if col in df.columns]
+
+        violations = 0
+        for rule in rules:
+            mask = rule_mask(df, rule, nulls, refs, self.now)
+            if mask is None:
+                logger.debug(f"DQ rule {rule['name']} skipped for {table}: columns or reference not available")
+                continue
+            failed = int(mask.sum())
+            violations += failed
+            failed_any |= mask
+
+            with self._lock:
+                entry = self._results.setdefault(rule["name"], {
+                    "table_name": table, "rule": rule["name"], "check_type": rule["check"],
+                    "columns": ",".join(rule["columns"]), "rows_checked": 0, "rows_failed": 0, "sample": [],
+                })
+                entry["rows_checked"] += len(df)
+                entry["rows_failed"] += failed
+                room = self.sample_size - len(entry["sample"])
+                if failed and room > 0:
+                    rows = df.iloc[np.flatnonzero(mask)[:room]][sample_columns or rule["columns"]]
+                    entry["sample"].extend(
+                        {col: None if pd.isna(value) else str(value) for col, value in row.items()}
+                        for row in rows.to_dict("records")
+                    )
+        return violations, failed_any
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def to_frame(self) -> pd.DataFrame:
+        """Return one row per evaluated rule."""
+        recorded_at = datetime.now()
+        with self._lock:
+            rows = [
+                {"batch_id": self.batch_id, **entry, "sample": json.dumps(entry["sample"]),
+                 "recorded_at": recorded_at}
+                for entry in self._results.values()
+            ]
+        return pd.DataFrame(rows)
+
+    def log_summary(self):
+        """Log the rules with failures."""
+        df = self.to_frame()
+        if df.empty:
+            return
+        failed = df[df["rows_failed"] > 0]
+        if failed.empty:
+            logger.info(f"Data quality: all {len(df)} rules passed")
+            return
+        logger.warning(f"Data quality: {len(failed)} of {len(df)} rules failed:")
+        for row in failed.itertuples():
+            logger.warning(f"  {row.rule:<34} {row.rows_failed}/{row.rows_checked} rows")
+
+    def persist(self, db_path: str):
+        """Append this run's results to the dq_results table."""
+        df = self.to_frame()
+        if not df.empty:
+            get_sqlite_sink(db_path).append(df, DQ_TABLE)
+
+
+def check_nulls(df: pd.DataFrame, exclude: list = None) -> pd.DataFrame:
+    """Return the rows with a null in any column not in ``exclude``."""
+    columns = [col for col in df.columns if col not in (exclude or [])]
+    if df.empty or not columns:
+        return df.iloc[:0]
+    rule = {"name": "nulls", "check": "not_null", "columns": columns}
+    return df[rule_mask(df, rule, df[columns].isna())]
+
+
+def check_duplicates(df: pd.DataFrame, subset: list = None) -> pd.DataFrame:
+    """Return every row whose ``subset`` columns (default email_id, message_id) repeat."""
+    rule = {"name": "duplicates", "check": "unique", "columns": subset or ["email_id", "message_id"]}
+    mask = rule_mask(df, rule, nulls=None)
+    return df.iloc[:0] if mask is None else df[mask]
+
+
+def run_data_quality(df: pd.DataFrame, name: str = "DataFrame", table: str = "messages") -> pd.DataFrame:
     """
-    Run all DQ checks on a DataFrame and return rows with issues.
+    Check one DataFrame against the table's rules and return the rows with
+    issues (for interactive use; the pipeline uses DataQualityReport).
     """
     if df.empty:
         logger.warning(f"{name} is empty, skipping data quality checks.")
         return pd.DataFrame()
 
     logger.info(f"Running DQ checks on {name} with shape {df.shape}")
+    report = DataQualityReport(batch_id=name)
+    _, failed = report._check(df, table)
+    report.log_summary()
 
-    nulls = check_nulls(df, exclude=["content_id"])
-    dups = check_duplicates(df, subset=["email_id", "message_id"])
-
-    issues = pd.concat([nulls, dups]).drop_duplicates()
+    issues = df[failed]
     logger.info(f"Total rows with issues in {name}: {len(issues)}")
-
     return issues
@@ -5,9 +5,10 @@ Data enrichment & normalization functions.
 """
 
 import pandas as pd
-import pytz
 from datetime import datetime
 from etl.core.logger import get_logger
+from etl.core.utils import get_timezone
+from etl.core.dtypes import coerce_frame, string_dtype
 
 logger = get_logger(__name__)
 
@@ -16,16 +17,16 @@ logger = get_logger(__name__)
 # --------------------------------------------------------------------
 def get_batch_date(tz: str = "Asia/Hong_Kong") -> str:
     """Return current date string in the given timezone (YYYY-MM-DD)."""
-    return datetime.now(pytz.timezone(tz)).strftime("%Y-%m-%d")
+    return datetime.now(get_timezone(tz)).strftime("%Y-%m-%d")
 
 
 # --------------------------------------------------------------------
 # Core enrichments
 # --------------------------------------------------------------------
 def normalize_text(df: pd.DataFrame, column: str) -> pd.DataFrame:
-    """Normalize text: strip whitespace, keep case."""
+    """Normalize text: strip whitespace, keep case. Missing values stay missing."""
     if column in df.columns:
-        df[column] = df[column].astype(str).str.strip()
+        df[column] = df[column].astype(string_dtype()).str.strip()
         logger.info(f"Normalized whitespace in column '{column}'")
     return df
 
@@ -37,6 +38,7 @@ def enrich_messages(messages_df: pd.DataFrame) -> pd.DataFrame:
 
     batch_date = get_batch_date()
     messages_df["batch_dt"] = batch_date
+    messages_df = coerce_frame(messages_df, "messages", ["batch_dt"])
 
     messages_df = normalize_text(messages_df, "message")
     logger.info(f"Added BATCH_DT='{batch_date}' to messages DataFrame")
@@ -51,6 +53,7 @@ def enrich_attachments(attachments_df: pd.DataFrame) -> pd.DataFrame:
 
     batch_date = get_batch_date()
     attachments_df["batch_dt"] = batch_date
+    attachments_df = coerce_frame(attachments_df, "attachments", ["batch_dt"])
     logger.info(f"Added BATCH_DT='{batch_date}' to attachments DataFrame")
 
     return attachments_df
@@ -5,98 +5,475 @@ Parallel file processor for .eml parsing.
 
 - Handles batch processing of multiple email files
 - Uses multiprocessing for scalability
-- Returns combined DataFrames for messages & attachments
+- Workers return plain row tuples per batch of files; DataFrames are
+  materialized once on the parent side
+- Bounded in-flight window; results are consumed as workers complete them
+- Returns combined DataFrames for messages & attachments, already linked
+  by the parser (no global merge needed)
+- Optionally streams results as bounded micro-batches (chunks)
+- Inputs are .eml files and members of zip/tar/mbox archives (etl/extract/sources.py)
 """
 
-from concurrent.futures import ProcessPoolExecutor
-from pathlib import Path
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 import pandas as pd
 from etl.core.logger import get_logger
-from etl.extract.parser import EmailParser
+from etl.extract.parser import EmailParser, records_to_frames
+from etl.extract.sources import as_source, iter_sources
+from etl.core.metrics import peak_rss_kb
+from etl.core.profiling import start_worker_profile
+from config import settings
 
 logger = get_logger(__name__)
 
+# Long-lived parser owned by each worker process (see _init_worker)
+_worker_parser = None
+# Whether the worker hashes each file for the ingest manifest (see _init_worker)
+_worker_content_hash = False
 
-def process_single_file(file_path: str):
+
+def _init_worker(parser_options: dict = None, profile_dir: str = None, content_hash: bool = False):
     """
-    Process a single .eml file with its own parser instance.
+    ProcessPoolExecutor initializer: build one EmailParser per worker.
 
     Args:
-        file_path (str): Path to .eml file
+        parser_options (dict): Keyword arguments for EmailParser
+            (e.g. {"attachment_mode": "metadata"})
+        profile_dir (str): When set, cProfile the worker and dump its stats there on exit
+        content_hash (bool): Compute the SHA-256 of every file for the manifest
+            (an extra full read; only incremental runs compare hashes)
+    """
+    global _worker_parser, _worker_content_hash
+    if profile_dir is not None:
+        start_worker_profile(profile_dir)
+    _worker_parser = EmailParser(**(parser_options or {}))
+    _worker_content_hash = content_hash
+
+
+def _get_worker_parser() -> EmailParser:
+    """Return the worker's parser, creating it when called outside a pool."""
+    if _worker_parser is None:
+        _init_worker()
+    return _worker_parser
+
+
+def _mp_context(start_method: str = settings.MP_START_METHOD):
+    """
+    Multiprocessing context for the worker pool.
+
+    forkserver (the default) and spawn never fork the multi-threaded parent,
+    which is unsafe once writer threads (staged mode) or pyarrow are running.
+    The forkserver preloads this module so workers start with pandas and the
+    parser already imported. Unavailable methods fall back to the platform default.
+    """
+    if start_method not in multiprocessing.get_all_start_methods():
+        start_method = None
+    context = multiprocessing.get_context(start_method)
+    if context.get_start_method() == "forkserver":
+        context.set_forkserver_preload([__name__])
+    return context
+
+
+def process_file_batch(file_paths: list):
+    """
+    Parse a batch of .eml files / archive members inside one worker task.
+
+    Rows from all files are aggregated into plain lists so only one
+    compact payload is pickled back to the parent per batch. The worker's
+    long-lived parser is reused across batches. Archive members are read
+    once from their byte range in the archive.
+
+    Args:
+        file_paths (list[str | EmailSource]): Paths to .eml files or EmailSources
 
     Returns:
-        tuple[pd.DataFrame, pd.DataFrame]:
-            (messages_df, attachments_df)
+        tuple[list[tuple], list[tuple], list[tuple]]:
+            (message_rows, attachment_rows, file_rows) where each file row is
+            (source key, size, mtime_ns, content_hash, status); the key is the
+            absolute path, or ``archive!member`` for archive members, and
+            content_hash is None unless the pool was started with content_hash
     """
-    try:
-        email_id = Path(file_path).stem
-        parser = EmailParser()
-        messages_df, attachments_df = parser.parse_email(file_path)
+    parser = _get_worker_parser()
+    message_rows = []
+    attachment_rows = []
+    file_rows = []
 
-        # Ensure email_id consistency
-        if not messages_df.empty:
-            messages_df["email_id"] = email_id
-        if not attachments_df.empty:
-            attachments_df["email_id"] = email_id
+    for source in map(as_source, file_paths):
+        try:
+            size, mtime_ns = source.stat()
+            if _worker_content_hash and parser.attachment_mode != "metadata":
+                # Parsed in memory anyway: read the member once for the parser and the hash
+                source = source.materialize()
+            messages, attachments = parser.parse_records(source)
+            content_hash = source.digest() if _worker_content_hash else None
+            file_rows.append((source.key, size, mtime_ns, content_hash, "SUCCESS"))
+        except Exception as e:
+            logger.error(f"Error processing {source.key}: {e}")
+            file_rows.append((source.key, None, None, None, "FAILED"))
+            continue
+        message_rows.extend(messages)
+        attachment_rows.extend(attachments)
 
-        return messages_df, attachments_df
+    return message_rows, attachment_rows, file_rows
+
+
+def process_file_batch_timed(file_paths: list):
+    """
+    Run process_file_batch and measure it inside the worker.
+
+    Returns:
+        tuple[tuple, dict]: (process_file_batch result, stats) where stats holds
+            worker pid, rows (files), bytes_read, wall_sec, cpu_sec and peak_rss_kb
+    """
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    result = process_file_batch(file_paths)
+    file_rows = result[2]
+    stats = {
+        "worker": os.getpid(),
+        "rows": len(file_rows),
+        "bytes_read": sum(row[1] or 0 for row in file_rows),
+        "wall_sec": time.perf_counter() - wall,
+        "cpu_sec": time.process_time() - cpu,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+    return result, stats
 
-    except Exception as e:
-        logger.error(f"Error processing {file_path}: {e}")
-        return pd.DataFrame(), pd.DataFrame()
 
+def _iter_batches(file_list, batch_size: int, batch_bytes: int):
+    """
+    Lazily group files into size-balanced task batches.
 
-def process_files_parallel(folder: str, max_workers: int = 4):
+    A batch is closed once it holds ``batch_size`` files or its files add up
+    to ``batch_bytes``, so many small messages share one task while a few
+    large ones do not pile onto a single worker.
+    """
+    batch_size = max(1, batch_size)
+    batch = []
+    batch_total = 0
+
+    for file in file_list:
+        source = as_source(file)
+        batch.append(source)
+        batch_total += source.size if source.size is not None else os.path.getsize(source.path)
+        if len(batch) >= batch_size or batch_total >= batch_bytes:
+            yield batch
+            batch = []
+            batch_total = 0
+
+    if batch:
+        yield batch
+
+
+def _iter_filtered(sources, file_filter, group_size: int = 1000):
+    """Apply a list-based file_filter to a lazy source stream, one group at a time."""
+    discovered = 0
+    selected = 0
+    group = []
+    for source in sources:
+        group.append(source)
+        if len(group) >= group_size:
+            discovered += len(group)
+            kept = file_filter(group)
+            selected += len(kept)
+            yield from kept
+            group = []
+    if group:
+        discovered += len(group)
+        kept = file_filter(group)
+        selected += len(kept)
+        yield from kept
+    logger.info(f"{selected} of {discovered} email sources selected for processing")
+
+
+def iter_batch_results(executor, batches, max_inflight: int, ordered: bool = False, metrics=None):
+    """
+    Submit batches to an executor with a bounded in-flight window and
+    yield results as soon as workers finish them.
+
+    At most ``max_inflight`` batches are submitted-but-not-yet-yielded at any
+    time, so the parent never holds more than that many pending results.
+    With ``ordered=True`` results are released in submission order (completed
+    batches wait in the window until their predecessors are done), which makes
+    output deterministic at the cost of head-of-line blocking.
+
+    Args:
+        executor: ProcessPoolExecutor (or compatible) to submit to
+        batches (Iterable[list[str]]): Task batches of file paths
+        max_inflight (int): Max outstanding batches
+        ordered (bool): Yield in submission order instead of completion order
+        metrics (StageMetrics): Optional collector for per-worker "parse" timings
+
+    Yields:
+        tuple[list[tuple], list[tuple], list[tuple]]:
+            (message_rows, attachment_rows, file_rows), see process_file_batch
+    """
+    max_inflight = max(1, max_inflight)
+    batch_iter = enumerate(batches)
+    pending = {}
+    completed = {}
+    next_index = 0
+    exhausted = False
+
+    while True:
+        while not exhausted and len(pending) + len(completed) < max_inflight:
+            try:
+                index, batch = next(batch_iter)
+            except StopIteration:
+                exhausted = True
+                break
+            task = process_file_batch_timed if metrics is not None else process_file_batch
+            pending[executor.submit(task, batch)] = (index, batch)
+
+        if not pending:
+            break
+
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index, batch = pending.pop(future)
+            try:
+                result = future.result()
+                if metrics is not None:
+                    result, stats = result
+                    metrics.add_worker("parse", stats)
+            except Exception as e:
+                logger.error(f"Parallel worker failed: {e}")
+                result = ([], [], [(source.key, None, None, None, "FAILED") for source in batch])
+
+            if ordered:
+                completed[index] = result
+            else:
+                yield result
+
+        while next_index in completed:
+            yield completed.pop(next_index)
+            next_index += 1
+
+
+def process_files_parallel(
+    folder: str,
+    max_workers: int = 4,
+    batch_size: int = settings.PARSE_BATCH_SIZE,
+    batch_bytes: int = settings.PARSE_BATCH_BYTES,
+    max_inflight: int = settings.MAX_INFLIGHT_TASKS,
+    ordered: bool = settings.ORDERED_OUTPUT,
+    parser_options: dict = None,
+    metrics=None,
+    profile_dir: str = None,
+    content_hash: bool = False,
+):
     """
     Process .eml files in parallel from a given folder.
 
     Args:
         folder (str): Directory containing .eml files
         max_workers (int): Number of parallel workers
+        batch_size (int): Max files per worker task
+        batch_bytes (int): Target bytes per worker task
+        max_inflight (int): Max outstanding tasks (0 = 2 x max_workers)
+        ordered (bool): Keep rows in file order for deterministic output
+        parser_options (dict): Keyword arguments for each worker's EmailParser
+        metrics (StageMetrics): Optional collector for discover / parse timings
+        profile_dir (str): Dump a cProfile of every worker into this folder
+        content_hash (bool): Hash every file for the ingest manifest
 
     Returns:
         tuple[pd.DataFrame, pd.DataFrame, int]:
             (messages_df, attachments_df, file_count)
     """
-    file_list = list(Path(folder).glob("*.eml"))
-    file_count = len(file_list)
-
-    if file_count == 0:
-        logger.warning(f"No .eml files found in {folder}")
+    chunks = list(iter_file_chunks(
+        folder,
+        max_workers=max_workers,
+        chunk_size=0,
+        batch_size=batch_size,
+        batch_bytes=batch_bytes,
+        max_inflight=max_inflight,
+        ordered=ordered,
+        parser_options=parser_options,
+        metrics=metrics,
+        profile_dir=profile_dir,
+        content_hash=content_hash,
+    ))
+    if not chunks:
         return pd.DataFrame(), pd.DataFrame(), 0
 
-    logger.info(f"Found {file_count} .eml files in {folder}")
+    result_df, attachments_df, file_rows = chunks[0]
+    logger.info(f"Finished processing {len(file_rows)} files.")
+    logger.info(f"Messages shape: {result_df.shape}, Attachments shape: {attachments_df.shape}")
 
-    messages_list = []
-    attachments_list = []
+    return result_df, attachments_df, len(file_rows)
 
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(process_single_file, str(file)) for file in file_list]
-        logger.info("Processing started...")
 
-        for future in futures:
-            try:
-                messages_df, attachments_df = future.result()
-                if not messages_df.empty:
-                    messages_list.append(messages_df)
-                if not attachments_df.empty:
-                    attachments_list.append(attachments_df)
-            except Exception as e:
-                logger.error(f"Parallel worker failed: {e}")
+def iter_file_chunks(
+    folder: str,
+    max_workers: int = 4,
+    chunk_size: int = 1000,
+    batch_size: int = settings.PARSE_BATCH_SIZE,
+    batch_bytes: int = settings.PARSE_BATCH_BYTES,
+    max_inflight: int = settings.MAX_INFLIGHT_TASKS,
+    ordered: bool = settings.ORDERED_OUTPUT,
+    parser_options: dict = None,
+    file_filter=None,
+    recursive: bool = settings.RECURSIVE_INPUT,
+    shard_index: int = 0,
+    shard_count: int = 1,
+    metrics=None,
+    profile_dir: str = None,
+    content_hash: bool = False,
+):
+    """
+    Process .eml files and archive members in parallel, yielding results one chunk at a time.
 
-    result_df = pd.concat(messages_list, ignore_index=True) if messages_list else pd.DataFrame()
-    attachments_df = pd.concat(attachments_list, ignore_index=True) if attachments_list else pd.DataFrame()
+    Worker results are consumed as they complete through a bounded in-flight
+    window, and a chunk is emitted as soon as it holds ``chunk_size`` files
+    (rounded up to whole task batches), so peak memory is bounded by the chunk
+    and window rather than the corpus. Messages and attachments of one file
+    always land in the same chunk. Sources are discovered lazily, so archives
+    are split while earlier chunks are already being parsed.
 
-    logger.info(f"Finished processing {file_count} files.")
-    logger.info(f"Messages shape: {result_df.shape}, Attachments shape: {attachments_df.shape}")
+    Args:
+        folder (str): Directory containing .eml files and/or zip/tar/mbox archives
+        max_workers (int): Number of parallel workers
+        chunk_size (int): Number of files per chunk (0 = one chunk for all files)
+        batch_size (int): Max files per worker task
+        batch_bytes (int): Target bytes per worker task
+        max_inflight (int): Max outstanding tasks (0 = 2 x max_workers)
+        ordered (bool): Keep rows in file order for deterministic output
+        parser_options (dict): Keyword arguments for each worker's EmailParser
+        file_filter (Callable[[list], list]): Optional hook applied to groups of
+            discovered sources before dispatch (e.g. skip already-loaded files)
+        recursive (bool): Also scan sub-directories of ``folder``
+        shard_index (int): Shard processed by this host (0-based)
+        shard_count (int): Number of hosts splitting the input by hash of email_id
+        metrics (StageMetrics): Optional collector for "discover" and per-worker "parse" metrics
+        profile_dir (str): Dump a cProfile of every worker into this folder
+        content_hash (bool): Hash every file for the ingest manifest (incremental
+            runs); otherwise file rows carry no content_hash
+
+    Yields:
+        tuple[pd.DataFrame, pd.DataFrame, list[tuple]]:
+            (messages_df, attachments_df, file_rows), see process_file_batch
+    """
+    sources = iter_sources(folder, recursive, shard_index, shard_count)
+    if metrics is not None:
+        sources = metrics.timed_iter("discover", sources, size=lambda source: source.size)
+    if file_filter is not None:
+        sources = _iter_filtered(sources, file_filter)
+    logger.info(
+        f"Processing email sources in {folder} (chunk size {chunk_size or 'all'}"
+        + (f", shard {shard_index} of {shard_count})" if shard_count > 1 else ")")
+    )
+
+    message_rows = []
+    attachment_rows = []
+    file_rows = []
+    done_files = 0
+    chunk_no = 0
+    batches = _iter_batches(sources, min(batch_size, chunk_size) if chunk_size > 0 else batch_size, batch_bytes)
+
+    def emit():
+        nonlocal chunk_no
+        messages_df, attachments_df = records_to_frames(message_rows, attachment_rows)
+        chunk_no += 1
+        logger.info(
+            f"Processed chunk {chunk_no} ({done_files} files so far): "
+            f"messages {messages_df.shape}, attachments {attachments_df.shape}"
+        )
+        return messages_df, attachments_df, file_rows
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=_mp_context(),
+        initializer=_init_worker, initargs=(parser_options, profile_dir, content_hash)
+    ) as executor:
+        results = iter_batch_results(executor, batches, max_inflight or 2 * max_workers, ordered, metrics)
+        for messages, attachments, files in results:
+            message_rows.extend(messages)
+            attachment_rows.extend(attachments)
+            file_rows.extend(files)
+            done_files += len(files)
+
+            if chunk_size > 0 and len(file_rows) >= chunk_size:
+                yield emit()
+                message_rows = []
+                attachment_rows = []
+                file_rows = []
 
-    return result_df, attachments_df, file_count
+    if file_rows:
+        yield emit()
+    elif chunk_no == 0 and file_filter is None:
+        logger.warning(f"No .eml files or email archives found in {folder}")
+
+
+def iter_queue_chunks(
+    work_queue,
+    owner: str,
+    max_workers: int = 4,
+    claim_size: int = settings.QUEUE_CLAIM_SIZE,
+    batch_size: int = settings.PARSE_BATCH_SIZE,
+    batch_bytes: int = settings.PARSE_BATCH_BYTES,
+    max_inflight: int = settings.MAX_INFLIGHT_TASKS,
+    ordered: bool = settings.ORDERED_OUTPUT,
+    parser_options: dict = None,
+    poll_seconds: float = settings.QUEUE_POLL_SECONDS,
+    metrics=None,
+    profile_dir: str = None,
+    content_hash: bool = False,
+):
+    """
+    Claim sources from a WorkQueue and parse them in parallel, one chunk per claim.
+
+    The caller marks each chunk's file_rows complete (WorkQueue.complete) once
+    it is loaded. When nothing is PENDING but other workers still hold leases,
+    the worker waits ``poll_seconds`` in case their leases expire; it stops
+    once the queue has no open work left.
+
+    Yields:
+        tuple[pd.DataFrame, pd.DataFrame, list[tuple]]:
+            (messages_df, attachments_df, file_rows), see process_file_batch
+    """
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=_mp_context(),
+        initializer=_init_worker, initargs=(parser_options, profile_dir, content_hash)
+    ) as executor:
+        while True:
+            if metrics is not None:
+                with metrics.stage("claim") as sample:
+                    sources = work_queue.claim(owner, claim_size)
+                    sample.rows = len(sources)
+            else:
+                sources = work_queue.claim(owner, claim_size)
+            if not sources:
+                if not work_queue.has_open_work():
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            logger.info(f"Worker {owner} claimed {len(sources)} sources")
+            message_rows = []
+            attachment_rows = []
+            file_rows = []
+            batches = _iter_batches(sources, batch_size, batch_bytes)
+            for messages, attachments, files in iter_batch_results(
+                executor, batches, max_inflight or 2 * max_workers, ordered, metrics
+            ):
+                message_rows.extend(messages)
+                attachment_rows.extend(attachments)
+                file_rows.extend(files)
+
+            messages_df, attachments_df = records_to_frames(message_rows, attachment_rows)
+            yield messages_df, attachments_df, file_rows
 
 
 def merge_messages_with_attachments(messages_df: pd.DataFrame, attachments_df: pd.DataFrame):
     """
     Link attachments to their parent messages via message_id,
-    and flag messages that have attachments.
+    and flag messages that have attachments, with global joins over the frames.
+
+    The parser already links attachments per file, so the pipeline only uses
+    this as the reference implementation for validate_attachment_links.
+    Existing linkage columns are recomputed.
 
     Returns:
         (messages_df, attachments_df)
@@ -106,9 +483,11 @@ def merge_messages_with_attachments(messages_df: pd.DataFrame, attachments_df: p
 
     if attachments_df.empty:
         # No attachments: mark all as False
-        messages_df["with_attachment"] = False
+        messages_df["with_attachment"] = pd.array([False] * len(messages_df), dtype="boolean")
         return messages_df, attachments_df
 
+    attachments_df = attachments_df.drop(columns="message_id", errors="ignore")
+
     # Link attachments to messages by email_id → message_id
     attachments_df = attachments_df.merge(
         messages_df[["email_id", "message_id"]],
@@ -117,10 +496,43 @@ def merge_messages_with_attachments(messages_df: pd.DataFrame, attachments_df: p
     )
 
     # Flag messages that have attachments
-    messages_df["with_attachment"] = messages_df["message_id"].isin(attachments_df["message_id"])
+    messages_df["with_attachment"] = messages_df["message_id"].isin(attachments_df["message_id"]).astype("boolean")
 
     # Drop duplicates just in case
     attachments_df = attachments_df.drop_duplicates(subset=["email_id", "attachment_name"])
 
     return messages_df, attachments_df
 
+
+def validate_attachment_links(messages_df: pd.DataFrame, attachments_df: pd.DataFrame) -> int:
+    """
+    Compare the parse-time linkage with a global merge (merge_messages_with_attachments).
+
+    Returns:
+        int: Number of mismatching messages and attachments (each logged)
+    """
+    if messages_df.empty:
+        return 0
+
+    merged_messages, merged_attachments = merge_messages_with_attachments(
+        messages_df.drop(columns="with_attachment"), attachments_df
+    )
+    flags = messages_df["with_attachment"].fillna(False).to_numpy(dtype=bool)
+    expected_flags = merged_messages["with_attachment"].fillna(False).to_numpy(dtype=bool)
+    message_mismatches = int((flags != expected_flags).sum())
+
+    key = ["email_id", "attachment_name"]
+    linked = attachments_df[key + ["message_id"]].astype(object)
+    expected = merged_attachments[key + ["message_id"]].astype(object)
+    compared = linked.merge(expected, on=key, how="outer", suffixes=("", "_expected"), indicator=True)
+    attachment_mismatches = int((
+        (compared["_merge"] != "both")
+        | (compared["message_id"].fillna("") != compared["message_id_expected"].fillna(""))
+    ).sum())
+
+    if message_mismatches or attachment_mismatches:
+        logger.warning(
+            f"Attachment linkage differs from the global merge: {message_mismatches} with_attachment flags, "
+            f"{attachment_mismatches} attachment rows"
+        )
+    return message_mismatches + attachment_mismatches
@@ -8,14 +8,37 @@ Each email:
 - Includes one unique message text
 - May include one text attachment with its own Content-ID
 - Uses realistic MIME headers (multipart/mixed)
+- Body is text/plain by default, or text/html with --html
+- Body and attachment sizes and the attachment mix are configurable
+  (used by benchmarks/bench_suite.py to build large corpora)
+
+With --corpus, generate_corpus() builds a load-test corpus instead: seeded
+and reproducible (the same seed gives byte-identical files for any worker
+count), generated in parallel, with lognormal body/attachment sizes,
+base64 and quoted-printable bodies in UTF-8 and legacy charsets, HTML
+bodies, binary attachments, long chat transcripts and a configurable rate
+of malformed files.
 """
 
+import base64
+import math
+import multiprocessing
 import os
+import quopri
+import random
 import uuid
 import argparse
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email import encoders
+from email.header import Header
+from email.mime.base import MIMEBase
+from email.mime.nonmultipart import MIMENonMultipart
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.utils import format_datetime
+from html import escape
+from typing import NamedTuple
 
 SPEAKERS = [
     ("Alice Example", "alice@example.com"),
@@ -31,8 +54,35 @@ MESSAGES = [
     "Attached is the invoice for last month.",
 ]
 
+FILLER = "The quick brown fox jumps over the lazy dog. "
+
+
+def _padding(size: int) -> str:
+    """Filler text of roughly ``size`` bytes, wrapped at 76 characters."""
+    if size <= 0:
+        return ""
+    text = (FILLER * (size // len(FILLER) + 1))[:size]
+    return "\n".join(text[i:i + 76] for i in range(0, len(text), 76))
 
-def generate_eml(output_dir: str, count: int = 5):
+
+def generate_eml(
+    output_dir: str,
+    count: int = 5,
+    html: bool = False,
+    body_bytes: int = 0,
+    attachment_every: int = 2,
+    attachment_bytes: int = 0,
+    verbose: bool = True,
+):
+    """
+    Write ``count`` sample emails to output_dir.
+
+    Args:
+        body_bytes (int): Extra filler text appended to each body
+        attachment_every (int): Attach a file to every n-th email (0 = none)
+        attachment_bytes (int): Extra filler text in each attachment
+        verbose (bool): Print one line per generated file
+    """
     os.makedirs(output_dir, exist_ok=True)
 
     for i in range(count):
@@ -53,25 +103,40 @@ def generate_eml(output_dir: str, count: int = 5):
         msg["Message-ID"] = message_id
 
         # ------------------------------------------------------------------
-        # Email body (plain text)
+        # Email body (plain text or HTML)
         # ------------------------------------------------------------------
         # Ensure each email gets its own unique message
         body_text = MESSAGES[i % len(MESSAGES)]
-        body = f"""\
+        padding = _padding(body_bytes)
+        if padding:
+            body_text = f"{body_text}\n{padding}"
+        if html:
+            body = f"""\
+<html><head><style>p {{ margin: 0; }}</style></head><body>
+<p>Message ID: {message_id.strip('<>')}</p>
+<p><b>{timestamp.isoformat()}Z</b> {sender_name} - <a href="mailto:{sender_email}">{sender_email}</a> says:</p>
+<div>{body_text.replace("&", "&amp;")}<br/>&nbsp;</div>
+</body></html>
+"""
+            msg.attach(MIMEText(body, "html", "utf-8"))
+        else:
+            body = f"""\
 Message ID: {message_id.strip('<>')}
 {timestamp.isoformat()}Z {sender_name} - {sender_email} says:
 {body_text}
 """
-        msg.attach(MIMEText(body, "plain", "utf-8"))
+            msg.attach(MIMEText(body, "plain", "utf-8"))
 
         # ------------------------------------------------------------------
         # Optional attachment (with Content-ID)
         # ------------------------------------------------------------------
         # For demo variety, alternate between emails with and without attachments
-        if i % 2 == 0:  # every other email gets an attachment
+        if attachment_every and i % attachment_every == 0:  # by default every other email
             filename = f"attachment_{i}.txt"
             content_id = f"<{uuid.uuid4()}@example.com>"
             attachment_content = f"This is a fake attachment for email {i}."
+            if attachment_bytes:
+                attachment_content = f"{attachment_content}\n{_padding(attachment_bytes)}"
 
             attachment = MIMEText(attachment_content, "plain", "utf-8")
             attachment.add_header("Content-ID", content_id)
@@ -86,15 +151,290 @@ Message ID: {message_id.strip('<>')}
         with open(file_path, "wb") as f:
             f.write(msg.as_bytes())
 
-        print(f"Generated {file_path} with Message-ID {message_id}")
+        if verbose:
+            print(f"Generated {file_path} with Message-ID {message_id}")
 
     print(f"\nCreated {count} sample .eml files in {output_dir}")
 
 
+# ----------------------------------------------------------------------
+# Load-test corpus (seeded, parallel)
+# ----------------------------------------------------------------------
+FIRST_NAMES = ["Alice", "Bob", "Carol", "David", "Erin", "Frank", "Grace", "Heidi", "Ivan", "Judy", "Mallory", "Oscar"]
+LAST_NAMES = ["Example", "Demo", "Test", "Chan", "Wong", "Smith", "Garcia", "Muller", "Tanaka", "Ivanova"]
+DOMAINS = ["example.com", "example.org", "corp.example.net", "mail.example.hk"]
+
+# Sample sentences per body charset (each encodable in its charset)
+CHARSET_TEXT = {
+    "utf-8": [
+        "Please review the attached report before Friday.",
+        "Café meeting moved to 3pm — bring the naïve estimates.",
+        "請查收附件中的季度報告。",
+        "Статус проекта: всё по плану.",
+        "Thanks! 👍 Let's ship it.",
+    ],
+    "iso-8859-1": ["Réunion demain à 9h, salle B.", "Grüße aus München, bis später.", "La señal está lista."],
+    "windows-1252": ["Invoice “final” – total €120 due.", "Thanks for the update… see you Monday."],
+    "koi8-r": ["Привет, отчёт во вложении.", "Встреча завтра в девять."],
+    "shift_jis": ["会議は明日の九時です。", "資料を添付しました。"],
+    "gb2312": ["请查收附件中的报告。", "明天上午九点开会。"],
+}
+LEGACY_CHARSETS = [charset for charset in CHARSET_TEXT if charset != "utf-8"]
+
+# (extension, MIME maintype, MIME subtype)
+ATTACHMENT_TYPES = [
+    ("pdf", "application", "pdf"),
+    ("png", "image", "png"),
+    ("zip", "application", "zip"),
+    ("bin", "application", "octet-stream"),
+    ("csv", "text", "csv"),
+]
+MALFORMED_KINDS = ("truncated", "no_message_id", "bad_base64", "garbage")
+CORPUS_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class CorpusSpec(NamedTuple):
+    """
+    Shape of a generated load-test corpus.
+
+    Sizes are lognormal: ``*_bytes`` is the median and ``*_sigma`` the
+    spread; rates are per-email probabilities.
+    """
+    seed: int = 0
+    body_bytes: int = 1024
+    body_sigma: float = 1.0
+    html_rate: float = 0.3
+    legacy_charset_rate: float = 0.2
+    qp_rate: float = 0.3
+    attachment_rate: float = 0.5
+    max_attachments: int = 3
+    attachment_bytes: int = 32 * 1024
+    attachment_sigma: float = 1.5
+    max_attachment_bytes: int = 20 * 1024 * 1024
+    transcript_rate: float = 0.1
+    transcript_lines: int = 200
+    malformed_rate: float = 0.01
+
+
+def _lognormal(rng: random.Random, median: int, sigma: float, cap: int = None) -> int:
+    size = int(rng.lognormvariate(math.log(max(median, 1)), sigma))
+    return min(size, cap) if cap else size
+
+
+def _person(rng: random.Random):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return f"{first} {last}", f"{first}.{last}@{rng.choice(DOMAINS)}".lower()
+
+
+def _sentences(rng: random.Random, charset: str, size: int) -> str:
+    """Roughly ``size`` characters of sentences valid in ``charset``."""
+    sentences = []
+    length = 0
+    while length < size or not sentences:
+        sentence = rng.choice(CHARSET_TEXT[charset])
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def _transcript(rng: random.Random, charset: str, timestamp: datetime, spec: CorpusSpec) -> str:
+    """A chat transcript of lognormal length, one "[HH:MM] Name: text" line per message."""
+    speakers = [_person(rng)[0] for _ in range(rng.randint(2, 5))]
+    lines = []
+    for _ in range(_lognormal(rng, spec.transcript_lines, 0.8, cap=20000) or 1):
+        timestamp += timedelta(seconds=rng.randint(5, 600))
+        lines.append(f"[{timestamp:%H:%M}] {rng.choice(speakers)}: {_sentences(rng, charset, rng.randint(20, 200))}")
+    return "\n".join(lines)
+
+
+def _text_part(text: str, subtype: str, charset: str, cte: str) -> MIMENonMultipart:
+    """Text part with an explicit charset and transfer encoding."""
+    part = MIMENonMultipart("text", subtype, charset=charset)
+    data = text.encode(charset)
+    if cte == "quoted-printable":
+        payload = quopri.encodestring(data).decode("ascii")
+    else:
+        payload = base64.encodebytes(data).decode("ascii")
+    part["Content-Transfer-Encoding"] = cte
+    part.set_payload(payload)
+    return part
+
+
+def _attachment(rng: random.Random, index: int, spec: CorpusSpec) -> MIMEBase:
+    extension, maintype, subtype = rng.choice(ATTACHMENT_TYPES)
+    size = _lognormal(rng, spec.attachment_bytes, spec.attachment_sigma, cap=spec.max_attachment_bytes)
+    if maintype == "text":
+        offset = rng.randrange(99999)
+        rows = [f"{n},{(n * 7919 + offset) % 99999}.{n % 100:02d},HKD" for n in range(size // 20 + 1)]
+        part = MIMEText("id,amount,currency\n" + "\n".join(rows), subtype, "utf-8")
+    else:
+        part = MIMEBase(maintype, subtype)
+        part.set_payload(rng.randbytes(size))
+        encoders.encode_base64(part)
+    part.add_header("Content-ID", f"<{uuid.UUID(int=rng.getrandbits(128), version=4)}@example.com>")
+    part.add_header("Content-Disposition", f'attachment; filename="file_{index}.{extension}"')
+    return part
+
+
+def build_corpus_email(index: int, spec: CorpusSpec = CorpusSpec()):
+    """
+    Build email number ``index`` of a corpus.
+
+    All randomness comes from an RNG seeded with (spec.seed, index), so the
+    bytes only depend on those two values.
+
+    Returns:
+        tuple[bytes, str]: (raw email, malformed kind or None)
+    """
+    rng = random.Random(f"{spec.seed}:{index}")
+    malformed = rng.choice(MALFORMED_KINDS) if rng.random() < spec.malformed_rate else None
+    if malformed == "garbage":
+        return rng.randbytes(rng.randint(64, 4096)), malformed
+
+    sender_name, sender_email = _person(rng)
+    recipient_name, recipient_email = _person(rng)
+    timestamp = CORPUS_EPOCH + timedelta(seconds=rng.randrange(365 * 86400))
+    message_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+    charset = rng.choice(LEGACY_CHARSETS) if rng.random() < spec.legacy_charset_rate else "utf-8"
+    cte = "quoted-printable" if rng.random() < spec.qp_rate else "base64"
+
+    msg = MIMEMultipart("mixed")
+    msg.set_boundary(f"=============={rng.getrandbits(64):020d}==")
+    msg["From"] = f"{sender_name} <{sender_email}>"
+    msg["To"] = f"{recipient_name} <{recipient_email}>"
+    msg["Subject"] = Header(_sentences(rng, charset, 20), charset)
+    msg["Date"] = format_datetime(timestamp)
+    msg["Message-ID"] = f"<{message_id}@example.com>"
+
+    # ------------------------------------------------------------------
+    # Body (plain or HTML; short message or long transcript)
+    # ------------------------------------------------------------------
+    if rng.random() < spec.transcript_rate:
+        content = _transcript(rng, charset, timestamp, spec)
+    else:
+        content = _sentences(rng, charset, _lognormal(rng, spec.body_bytes, spec.body_sigma))
+    header = ""
+    if malformed != "no_message_id":
+        header = f"Message ID: {message_id}\n{timestamp:%Y-%m-%dT%H:%M:%S}Z {sender_name} - {sender_email} says:\n"
+
+    if rng.random() < spec.html_rate:
+        paragraphs = "".join(f"<p>{escape(line)}</p>" for line in (header + content).splitlines())
+        body, subtype = f"<html><body>\n{paragraphs}\n</body></html>\n", "html"
+    else:
+        body, subtype = header + content + "\n", "plain"
+    body_part = _text_part(body, subtype, charset, "base64" if malformed == "bad_base64" else cte)
+    if malformed == "bad_base64":
+        body_part.set_payload("!!not*base64!!" + body_part.get_payload()[7:])
+    msg.attach(body_part)
+
+    # ------------------------------------------------------------------
+    # Attachments
+    # ------------------------------------------------------------------
+    if rng.random() < spec.attachment_rate:
+        for i in range(rng.randint(1, spec.max_attachments)):
+            msg.attach(_attachment(rng, i, spec))
+
+    data = msg.as_bytes()
+    if malformed == "truncated":
+        data = data[:rng.randint(len(data) // 4, len(data) * 3 // 4)]
+    return data, malformed
+
+
+def corpus_path(output_dir: str, index: int, files_per_dir: int = 10000) -> str:
+    """Path of email ``index``; files are spread over part-NNNNN subfolders."""
+    return os.path.join(output_dir, f"part-{index // files_per_dir:05d}", f"corpus_{index:08d}.eml")
+
+
+def _write_corpus_range(output_dir: str, start: int, stop: int, spec: CorpusSpec, files_per_dir: int) -> dict:
+    """Worker task: write emails [start, stop) and return their stats."""
+    stats = {"files": 0, "bytes": 0, "malformed": 0}
+    for index in range(start, stop):
+        data, malformed = build_corpus_email(index, spec)
+        path = corpus_path(output_dir, index, files_per_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        stats["files"] += 1
+        stats["bytes"] += len(data)
+        stats["malformed"] += malformed is not None
+    return stats
+
+
+def generate_corpus(
+    output_dir: str,
+    count: int,
+    spec: CorpusSpec = CorpusSpec(),
+    workers: int = None,
+    files_per_dir: int = 10000,
+    task_size: int = 1000,
+) -> dict:
+    """
+    Generate a reproducible load-test corpus of ``count`` emails in parallel.
+
+    Returns:
+        dict: {"files", "bytes", "malformed"} totals
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    totals = {"files": 0, "bytes": 0, "malformed": 0}
+    ranges = [(start, min(start + task_size, count)) for start in range(0, count, task_size)]
+
+    # spawn: forking a (possibly multi-threaded) parent is unsafe, and the
+    # generator only needs the standard library in its workers
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context) as executor:
+        futures = [
+            executor.submit(_write_corpus_range, output_dir, start, stop, spec, files_per_dir)
+            for start, stop in ranges
+        ]
+        for future in futures:
+            for key, value in future.result().items():
+                totals[key] += value
+
+    print(
+        f"Created {totals['files']} corpus .eml files ({totals['bytes'] / 1024 / 1024:.1f} MiB, "
+        f"{totals['malformed']} malformed, seed {spec.seed}) in {output_dir}"
+    )
+    return totals
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate sample .eml files for ETL testing")
     parser.add_argument("--output", type=str, default="examples/sample_emails", help="Output directory")
     parser.add_argument("--count", type=int, default=5, help="Number of .eml files to generate")
+    parser.add_argument("--html", action="store_true", help="Generate text/html bodies")
+    parser.add_argument("--body-bytes", type=int, default=0, help="Extra filler bytes per body")
+    parser.add_argument("--attachment-every", type=int, default=2, help="Attach a file to every n-th email (0 = none)")
+    parser.add_argument("--attachment-bytes", type=int, default=0, help="Extra filler bytes per attachment")
+    corpus = parser.add_argument_group("load-test corpus (--corpus)")
+    defaults = CorpusSpec._field_defaults
+    corpus.add_argument("--corpus", action="store_true", help="Generate a seeded load-test corpus in parallel")
+    corpus.add_argument("--workers", type=int, default=None, help="Generator processes (default: CPU count)")
+    corpus.add_argument("--seed", type=int, default=defaults["seed"], help="RNG seed")
+    corpus.add_argument("--median-body-bytes", type=int, default=defaults["body_bytes"], help="Median body size")
+    corpus.add_argument("--median-attachment-bytes", type=int, default=defaults["attachment_bytes"], help="Median attachment size")
+    corpus.add_argument("--html-rate", type=float, default=defaults["html_rate"], help="Share of HTML bodies")
+    corpus.add_argument("--legacy-charset-rate", type=float, default=defaults["legacy_charset_rate"], help="Share of non-UTF-8 bodies")
+    corpus.add_argument("--qp-rate", type=float, default=defaults["qp_rate"], help="Share of quoted-printable (vs base64) bodies")
+    corpus.add_argument("--attachment-rate", type=float, default=defaults["attachment_rate"], help="Share of emails with attachments")
+    corpus.add_argument("--transcript-rate", type=float, default=defaults["transcript_rate"], help="Share of long chat transcripts")
+    corpus.add_argument("--malformed-rate", type=float, default=defaults["malformed_rate"], help="Share of malformed files")
     args = parser.parse_args()
 
-    generate_eml(args.output, args.count)
+    if args.corpus:
+        spec = CorpusSpec(
+            seed=args.seed,
+            body_bytes=args.median_body_bytes,
+            html_rate=args.html_rate,
+            legacy_charset_rate=args.legacy_charset_rate,
+            qp_rate=args.qp_rate,
+            attachment_rate=args.attachment_rate,
+            attachment_bytes=args.median_attachment_bytes,
+            transcript_rate=args.transcript_rate,
+            malformed_rate=args.malformed_rate,
+        )
+        generate_corpus(args.output, args.count, spec, workers=args.workers)
+    else:
+        generate_eml(
+            args.output, args.count, html=args.html, body_bytes=args.body_bytes,
+            attachment_every=args.attachment_every, attachment_bytes=args.attachment_bytes,
+        )
@@ -4,22 +4,44 @@ etl/main.py
 Main ETL orchestrator.
 
 Steps:
-1. Extract emails from input directory
+1. Extract emails from input directory (attachments linked to their
+   message inside the parse workers)
 2. Transform (enrich + DQ checks)
-3. Merge & link attachments
-4. Load to CSV & SQLite
-5. Track metadata with BatchControl
+3. Load to CSV & SQLite
+4. Track metadata with BatchControl
+
+Steps 2-4 run once per chunk when streaming mode (--chunk-size) is enabled,
+and overlap in concurrent stages with --staged.
+
+Modes (--mode):
+- run: discover and process the input folder in this process (default)
+- enqueue: add the input folder's files to the durable work queue
+- worker: claim files from the work queue under leases until it is drained;
+  start any number of workers against the same output directory
+- search: full-text search of the loaded messages (--query), printing
+  matching message_ids with snippets
 """
 
 import argparse
+import os
+from dataclasses import replace
 from datetime import datetime
 from etl.core.context import ETLContext
+from etl.core.options import PipelineOptions
 from etl.core.logger import setup_logger, get_logger
-from etl.transform.processor import process_files_parallel, merge_messages_with_attachments
+from etl.core.stages import StagedPipeline
+from etl.core.metrics import StageMetrics
+from etl.core.profiling import profiled, merge_profiles
+from etl.extract.sources import iter_sources
+from etl.transform.processor import iter_file_chunks, iter_queue_chunks, validate_attachment_links
 from etl.transform.enrichments import enrich_messages, enrich_attachments
-from etl.transform.data_quality import run_data_quality
+from etl.transform.data_quality import DataQualityReport
 from etl.load.storage import Storage
 from etl.load.batch_control import BatchControl
+from etl.load.manifest import IngestManifest
+from etl.load.work_queue import WorkQueue, default_worker_id
+from etl.load.sqlite_sink import get_sqlite_sink, close_sqlite_sink
+from etl.load.search_index import search
 from config import settings
 
 # --------------------------------------------------------------------
@@ -29,75 +51,356 @@ setup_logger()
 logger = get_logger(__name__)
 
 
-def run_pipeline(input_dir: str, output_dir: str, max_workers: int = settings.MAX_PARALLELISM):
-    """
-    Run the full ETL pipeline.
-    """
-    ctx = ETLContext.from_args(input_dir, output_dir)
-    logger.info(f"Starting ETL pipeline in {ctx.output_dir}...")
-    start_time = datetime.now()
+class _PipelineRun:
+    """Extract, transform and load steps of one run, sharing its manifest, reports and totals."""
+
+    def __init__(self, ctx: ETLContext, options: PipelineOptions, profile_dir: str = None):
+        self.ctx = ctx
+        self.options = options
+        self.profile_dir = profile_dir
+        self.manifest = IngestManifest(ctx)
+        self.metrics = StageMetrics(ctx.batch_id)
+        self.dq = DataQualityReport(ctx.batch_id)
+        self.work_queue = WorkQueue(ctx) if options.worker else None
+        self.storage = Storage(ctx, csv_compression=options.csv_compression,
+                               csv_rotate_bytes=options.csv_rotate_bytes,
+                               csv_suffix=options.worker_id if options.worker else None,
+                               csv_append=options.incremental or options.worker)
+        self.batches = {}
+        self.totals = {"files": 0, "messages": 0, "attachments": 0, "with_attachments": 0, "without_attachments": 0}
 
     # --------------------------------------------------------------
     # Extract
     # --------------------------------------------------------------
-    messages_df, attachments_df, file_count = process_files_parallel(ctx.input_dir, max_workers=max_workers)
-    logger.info(f"Extracted data from {file_count} files")
+    def chunks(self):
+        """Parsed chunks claimed from the work queue (worker mode) or discovered in the input folder."""
+        options = self.options
+        common = dict(
+            max_workers=options.max_workers,
+            batch_size=options.batch_size,
+            max_inflight=options.max_inflight,
+            ordered=options.ordered,
+            parser_options={"attachment_mode": options.attachment_mode},
+            metrics=self.metrics,
+            profile_dir=self.profile_dir,
+            content_hash=options.incremental,
+        )
+        if options.worker:
+            return iter_queue_chunks(self.work_queue, options.worker_id,
+                                     claim_size=options.chunk_size or settings.QUEUE_CLAIM_SIZE, **common)
+        return iter_file_chunks(
+            self.ctx.input_dir,
+            chunk_size=options.chunk_size or 0,
+            file_filter=self.manifest.filter_pending if options.incremental else None,
+            recursive=options.recursive,
+            shard_index=options.shard_index,
+            shard_count=options.shard_count,
+            **common,
+        )
+
+    def record_files(self, file_rows):
+        self.manifest.record(file_rows)
+        if self.work_queue is not None:
+            self.work_queue.complete(self.options.worker_id, file_rows)
 
     # --------------------------------------------------------------
     # Transform
     # --------------------------------------------------------------
-    if messages_df.empty:
-        logger.warning("No messages parsed from input. Pipeline will exit early.")
-        return
+    def transform(self, chunk):
+        messages_df, attachments_df, file_rows = chunk
+        self.totals["files"] += len(file_rows)
+        logger.info(f"Extracted data from {len(file_rows)} files")
+
+        if messages_df.empty:
+            logger.warning("No messages parsed from chunk. Skipping.")
+            self.record_files(file_rows)
+            return None
+
+        # Attachments are linked at parse time; optionally cross-check with the global merge
+        if self.options.validate_links:
+            with self.metrics.stage("validate_links", rows=len(messages_df) + len(attachments_df)):
+                validate_attachment_links(messages_df, attachments_df)
+
+        # Enrichment data with batch partition date
+        with self.metrics.stage("enrich", rows=len(messages_df) + len(attachments_df)):
+            messages_df = enrich_messages(messages_df)
+            attachments_df = enrich_attachments(attachments_df)
 
-    # Merge + link attachments
-    messages_df, attachments_df = merge_messages_with_attachments(messages_df, attachments_df)
+        # Data Quality checks
+        with self.metrics.stage("dq", rows=len(messages_df) + len(attachments_df)):
+            violations = self.dq.check(messages_df, "messages")
+            violations += self.dq.check(attachments_df, "attachments", refs={"messages": messages_df})
+        if violations:
+            logger.warning(f"Data quality issues detected: {violations} rule violations")
 
-    # Enrichment data with batch partition date
-    messages_df = enrich_messages(messages_df)
-    attachments_df = enrich_attachments(attachments_df)
+        if not self.batches:
+            self.batches["messages"] = BatchControl("messages_load", self.ctx)
+            self.batches["messages"].start(rows_expected=len(messages_df))
+            self.batches["attachments"] = BatchControl("attachments_load", self.ctx)
+            self.batches["attachments"].start(rows_expected=len(attachments_df))
+        else:
+            self.batches["messages"].rows_expected += len(messages_df)
+            self.batches["attachments"].rows_expected += len(attachments_df)
 
-    # Data Quality checks
-    issues_df = run_data_quality(messages_df, name="Messages")
-    if not issues_df.empty:
-        logger.warning(f"Data quality issues detected: {len(issues_df)} rows")
+        return messages_df, attachments_df, file_rows
 
     # --------------------------------------------------------------
     # Load
     # --------------------------------------------------------------
-    storage = Storage(ctx)
-
-    # Messages
-    msg_batch = BatchControl("messages_load", ctx)
-    msg_batch.start(rows_expected=len(messages_df))
-    storage.write_csv(messages_df, "messages")
-    storage.write_sqlite(messages_df, "messages")
-    msg_batch.end(rows_loaded=len(messages_df))
-
-    # Attachments
-    att_batch = BatchControl("attachments_load", ctx)
-    att_batch.start(rows_expected=len(attachments_df))
-    storage.write_csv(attachments_df, "attachments")
-    storage.write_sqlite(attachments_df, "attachments")
-    att_batch.end(rows_loaded=len(attachments_df))
+    def loader(self, sink):
+        def load(chunk):
+            messages_df, attachments_df, _ = chunk
+            with self.metrics.stage(f"load_{sink}", rows=len(messages_df) + len(attachments_df)):
+                # Attachments first: the search index then picks up their names
+                # when each message is indexed, instead of re-indexing the message
+                self.storage.write(attachments_df, "attachments", sinks=[sink], sqlite_mode=self.options.load_mode)
+                self.storage.write(messages_df, "messages", sinks=[sink], sqlite_mode=self.options.load_mode)
+        return load
 
-    # --------------------------------------------------------------
-    # Summary
-    # --------------------------------------------------------------
-    end_time = datetime.now()
-    elapsed = (end_time - start_time).total_seconds()
+    def loaded(self, chunk):
+        messages_df, attachments_df, file_rows = chunk
+        self.record_files(file_rows)
+
+        self.totals["messages"] += len(messages_df)
+        self.totals["attachments"] += len(attachments_df)
+        self.totals["with_attachments"] += messages_df[messages_df["with_attachment"] == True].shape[0]
+        self.totals["without_attachments"] += messages_df[messages_df["with_attachment"] == False].shape[0]
+
+    def process(self, chunks):
+        """Transform and load every chunk, concurrently by stage with ``staged``."""
+        if self.options.staged:
+            StagedPipeline(queue_size=self.options.stage_queue_size, item_rows=lambda chunk: len(chunk[2])).run(
+                chunks,
+                stages=[("transform", self.transform)],
+                writers={f"load_{sink}": self.loader(sink) for sink in self.options.sinks},
+                on_loaded=self.loaded,
+            )
+            return
+        for chunk in chunks:
+            chunk = self.transform(chunk)
+            if chunk is None:
+                continue
+            for sink in self.options.sinks:
+                self.loader(sink)(chunk)
+            self.loaded(chunk)
 
-    with_attachments = messages_df[messages_df["with_attachment"] == True].shape[0]
-    without_attachments = messages_df[messages_df["with_attachment"] == False].shape[0]
+    def report(self):
+        """Log and persist the stage metrics and data quality results."""
+        self.metrics.log_summary()
+        self.metrics.persist(self.ctx.db_path)
+        self.dq.log_summary()
+        self.dq.persist(self.ctx.db_path)
+        if self.options.metrics_textfile:
+            self.metrics.write_prometheus(self.options.metrics_textfile)
 
-    logger.info("------------------------------------------------------------")
-    logger.info("ETL pipeline complete")
-    logger.info(f"Processed {file_count} .eml files in {elapsed:.2f} seconds")
-    logger.info(f"Messages total: {len(messages_df)}")
-    logger.info(f" - with attachments: {with_attachments}")
-    logger.info(f" - without attachments: {without_attachments}")
-    logger.info(f"Attachments total: {len(attachments_df)}")
-    logger.info("------------------------------------------------------------")
+    def close(self, start_time: datetime):
+        """Close the batch records and outputs, then log the run summary."""
+        if not self.batches:
+            logger.warning("No messages parsed from input. Pipeline will exit early.")
+            self.storage.close()
+            return
+
+        self.batches["messages"].end(rows_loaded=self.totals["messages"])
+        self.batches["attachments"].end(rows_loaded=self.totals["attachments"])
+        self.storage.close()
+
+        # --------------------------------------------------------------
+        # Summary
+        # --------------------------------------------------------------
+        elapsed = (datetime.now() - start_time).total_seconds()
+        totals = self.totals
+
+        logger.info("------------------------------------------------------------")
+        logger.info("ETL pipeline complete")
+        logger.info(f"Processed {totals['files']} .eml files in {elapsed:.2f} seconds")
+        logger.info(f"Messages total: {totals['messages']}")
+        logger.info(f" - with attachments: {totals['with_attachments']}")
+        logger.info(f" - without attachments: {totals['without_attachments']}")
+        logger.info(f"Attachments total: {totals['attachments']}")
+        logger.info("------------------------------------------------------------")
+
+
+def run_pipeline(input_dir: str, output_dir: str, options: PipelineOptions = None, **overrides):
+    """
+    Run the full ETL pipeline.
+
+    ``options`` (a PipelineOptions, see there for every setting) defaults to
+    config/settings.py; keyword ``overrides`` replace single options, e.g.
+    ``run_pipeline(input_dir, output_dir, chunk_size=2, staged=True)``.
+
+    Every processed file is recorded in the ``ingest_manifest`` table once its
+    chunk is loaded. Sharded runs write to the ``shard=<index>-of-<count>``
+    partition of ``output_dir``.
+
+    In worker mode files are claimed from the work queue (see enqueue_inputs)
+    instead of discovered, each claim is one chunk, and CSV files are suffixed
+    with the worker id so concurrent workers never share one. A worker
+    restarted with the same id appends to its CSV files: their rows belong to
+    files the queue already marks DONE and that are never re-read.
+
+    Wall/CPU time, rows, bytes and peak RSS of every stage (discover,
+    per-worker parse, enrich, dq, each sink) are appended to the
+    ``stage_metrics`` table. Every chunk is checked against the data quality
+    rules in config/data_quality.py; per-rule counts and samples of offending
+    keys are appended to the ``dq_results`` table.
+
+    With ``profile`` the merged ``combined.pstats`` and a top-N report are
+    written to ``<output>/profile/<batch_id>``.
+    """
+    options = replace(options or PipelineOptions(), **overrides)
+    if options.worker and not options.worker_id:
+        options = replace(options, worker_id=default_worker_id())
+    ctx = ETLContext.from_args(input_dir, output_dir, shard_index=options.shard_index,
+                               shard_count=options.shard_count)
+    logger.info(f"Starting ETL pipeline in {ctx.output_dir}...")
+    start_time = datetime.now()
+    get_sqlite_sink(ctx.db_path, search_index=options.search_index)
+
+    profile_dir = os.path.join(ctx.output_dir, "profile", ctx.batch_id) if options.profile else None
+    pipeline = _PipelineRun(ctx, options, profile_dir)
+    heartbeat = pipeline.work_queue.start_heartbeat(options.worker_id) if options.worker else None
+    with profiled(profile_dir):
+        try:
+            pipeline.process(pipeline.chunks())
+        finally:
+            if heartbeat is not None:
+                heartbeat.set()
+
+    # Workers have exited (pool closed with the chunk iterator), so their dumps exist
+    if profile_dir is not None:
+        merge_profiles(profile_dir)
+
+    pipeline.report()
+    pipeline.close(start_time)
+
+
+def enqueue_inputs(
+    input_dir: str,
+    output_dir: str,
+    incremental: bool = settings.INCREMENTAL,
+    recursive: bool = settings.RECURSIVE_INPUT,
+    shard_index: int = settings.SHARD_INDEX,
+    shard_count: int = settings.SHARD_COUNT,
+    group_size: int = 1000,
+):
+    """
+    Add the input folder's email sources to the work queue in ``output_dir``.
+
+    Sources already queued are left as they are; with ``incremental=True``
+    files already loaded according to the ingest manifest are not queued.
+
+    Returns:
+        int: Number of newly queued sources
+    """
+    ctx = ETLContext.from_args(input_dir, output_dir, shard_index=shard_index, shard_count=shard_count)
+    work_queue = WorkQueue(ctx)
+    manifest = IngestManifest(ctx) if incremental else None
+
+    added = 0
+    group = []
+    for source in iter_sources(ctx.input_dir, recursive, shard_index, shard_count):
+        group.append(source)
+        if len(group) >= group_size:
+            added += work_queue.enqueue(manifest.filter_pending(group) if manifest else group)
+            group = []
+    if group:
+        added += work_queue.enqueue(manifest.filter_pending(group) if manifest else group)
+
+    logger.info(f"Work queue in {ctx.db_path}: {work_queue.counts()}")
+    close_sqlite_sink(ctx.db_path)
+    return added
+
+
+def search_messages(
+    output_dir: str,
+    query: str,
+    limit: int = 20,
+    shard_index: int = settings.SHARD_INDEX,
+    shard_count: int = settings.SHARD_COUNT,
+):
+    """
+    Print the messages in ``output_dir`` matching the FTS5 ``query``, best first.
+
+    Returns:
+        pd.DataFrame: message_id, email_id, speaker_name, snippet and rank
+
+    Raises:
+        FileNotFoundError: No database in ``output_dir``
+        ValueError: No search index, or a malformed query
+    """
+    ctx = ETLContext.from_args(None, output_dir, shard_index=shard_index, shard_count=shard_count, create_dirs=False)
+    results = search(ctx.db_path, query, limit=limit)
+    for row in results.itertuples():
+        print(f"{row.message_id}  {row.speaker_name}  {row.snippet}")
+    logger.info(f"{len(results)} messages matching {query!r} in {ctx.db_path}")
+    return results
+
+
+# --------------------------------------------------------------------
+# CLI modes
+# --------------------------------------------------------------------
+def pipeline_options(args: argparse.Namespace) -> PipelineOptions:
+    """Build the pipeline options from the parsed command line."""
+    return PipelineOptions(
+        max_workers=args.workers,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        max_inflight=args.max_inflight,
+        ordered=args.ordered,
+        attachment_mode=args.attachment_mode,
+        incremental=args.incremental,
+        load_mode=args.load_mode,
+        search_index=args.search_index,
+        sinks=args.sinks,
+        csv_compression=args.csv_compression,
+        csv_rotate_bytes=args.csv_rotate_bytes,
+        staged=args.staged,
+        stage_queue_size=args.stage_queue_size,
+        recursive=args.recursive,
+        shard_index=args.shard_index,
+        shard_count=args.shard_count,
+        worker=args.mode == "worker",
+        worker_id=args.worker_id,
+        metrics_textfile=args.metrics_textfile,
+        profile=args.profile,
+        validate_links=args.validate_links,
+    )
+
+
+def run_mode(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    """--mode run / worker: process the input folder or the work queue."""
+    run_pipeline(input_dir=args.input, output_dir=args.output, options=pipeline_options(args))
+
+
+def enqueue_mode(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    """--mode enqueue: fill the work queue from the input folder."""
+    enqueue_inputs(
+        input_dir=args.input,
+        output_dir=args.output,
+        incremental=args.incremental,
+        recursive=args.recursive,
+        shard_index=args.shard_index,
+        shard_count=args.shard_count,
+    )
+
+
+def search_mode(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    """--mode search: print the messages matching --query; bad input is a usage error."""
+    if not args.query:
+        parser.error("--mode search requires --query")
+    try:
+        search_messages(
+            output_dir=args.output,
+            query=args.query,
+            limit=args.limit,
+            shard_index=args.shard_index,
+            shard_count=args.shard_count,
+        )
+    except (FileNotFoundError, ValueError) as e:
+        parser.error(str(e))
+
+
+MODES = {"run": run_mode, "enqueue": enqueue_mode, "worker": run_mode, "search": search_mode}
 
 
 # --------------------------------------------------------------------
@@ -105,12 +408,62 @@ def run_pipeline(input_dir: str, output_dir: str, max_workers: int = settings.MA
 # --------------------------------------------------------------------
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run ETL pipeline for email parsing")
+    parser.add_argument("--mode", choices=list(MODES), default="run",
+                        help="run: process the input folder; enqueue: fill the work queue; "
+                             "worker: process files claimed from the work queue; "
+                             "search: full-text search of the loaded messages")
+    parser.add_argument("--query", type=str, default=None,
+                        help='Search mode: FTS5 query, e.g. \'invoice AND "wire transfer"\' or \'attachment_names: report*\'')
+    parser.add_argument("--limit", type=int, default=20,
+                        help="Search mode: max results")
+    parser.add_argument("--worker-id", type=str, default=None,
+                        help="Work-queue worker id (default: <hostname>-<pid>)")
     parser.add_argument("--input", type=str, default=settings.LOCAL_INPUT_DIR,
                         help="Directory containing .eml files")
     parser.add_argument("--output", type=str, default=settings.LOCAL_OUTPUT_DIR,
                         help="Directory for output CSV/SQLite")
     parser.add_argument("--workers", type=int, default=settings.MAX_PARALLELISM,
                         help="Number of parallel workers")
+    parser.add_argument("--batch-size", type=int, default=settings.PARSE_BATCH_SIZE,
+                        help="Max files per worker task")
+    parser.add_argument("--max-inflight", type=int, default=settings.MAX_INFLIGHT_TASKS,
+                        help="Max outstanding worker tasks (0 = 2 x workers)")
+    parser.add_argument("--ordered", action="store_true", default=settings.ORDERED_OUTPUT,
+                        help="Keep output rows in input file order (deterministic output)")
+    parser.add_argument("--attachment-mode", choices=["full", "metadata"], default=settings.ATTACHMENT_MODE,
+                        help="'metadata' skips attachment payloads to bound memory per worker")
+    parser.add_argument("--incremental", action="store_true", default=settings.INCREMENTAL,
+                        help="Skip files already loaded according to the ingest manifest")
+    parser.add_argument("--load-mode", choices=["append", "upsert"], default=settings.SQLITE_LOAD_MODE,
+                        help="SQLite load mode: plain append or keyed upsert on message_id / (email_id, attachment_name)")
+    parser.add_argument("--search-index", action=argparse.BooleanOptionalAction, default=settings.SQLITE_SEARCH_INDEX,
+                        help="Maintain the messages_fts full-text index used by --mode search (slower SQLite loads)")
+    parser.add_argument("--sinks", type=lambda value: [s.strip() for s in value.split(",") if s.strip()],
+                        default=settings.OUTPUT_SINKS,
+                        help="Comma-separated outputs: csv, sqlite, parquet")
+    parser.add_argument("--csv-compression", choices=["none", "gzip", "bz2", "lzma"],
+                        default=settings.CSV_COMPRESSION,
+                        help="Compress CSV output with the standard library codec")
+    parser.add_argument("--csv-rotate-bytes", type=int, default=settings.CSV_ROTATE_BYTES,
+                        help="Start a new CSV file after this many uncompressed bytes (0 = never)")
+    parser.add_argument("--staged", action="store_true", default=settings.STAGED,
+                        help="Run extract, transform and per-sink writers concurrently (use with --chunk-size)")
+    parser.add_argument("--stage-queue-size", type=int, default=settings.STAGE_QUEUE_SIZE,
+                        help="Chunks buffered between pipeline stages")
+    parser.add_argument("--recursive", action=argparse.BooleanOptionalAction, default=settings.RECURSIVE_INPUT,
+                        help="Scan sub-directories of the input folder")
+    parser.add_argument("--shard-index", type=int, default=settings.SHARD_INDEX,
+                        help="Shard processed by this host (0-based)")
+    parser.add_argument("--shard-count", type=int, default=settings.SHARD_COUNT,
+                        help="Number of hosts splitting the input by stable hash of email_id")
+    parser.add_argument("--metrics-textfile", type=str, default=settings.METRICS_TEXTFILE,
+                        help="Also write stage metrics to this Prometheus textfile")
+    parser.add_argument("--profile", action="store_true", default=settings.PROFILE,
+                        help="cProfile the parent and every worker; write merged stats and a top-N report "
+                             "to <output>/profile/<batch_id>")
+    parser.add_argument("--validate-links", action="store_true", default=settings.VALIDATE_ATTACHMENT_LINKS,
+                        help="Cross-check the parse-time attachment linkage against a global merge per chunk")
+    parser.add_argument("--chunk-size", type=int, default=settings.CHUNK_SIZE,
+                        help="Files per streaming chunk (0 = process all files at once)")
     args = parser.parse_args()
-
-    run_pipeline(input_dir=args.input, output_dir=args.output, max_workers=args.workers)
+    MODES[args.mode](parser, args)
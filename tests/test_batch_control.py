@@ -26,3 +26,22 @@ def test_batch_control_persistence(tmp_path):
     assert not df_csv.empty
     assert not df_db.empty
     assert "batch_name" in df_db.columns
+
+
+def test_batch_control_widens_old_csv_header(tmp_path):
+    """Records carry the run's batch_id; an older CSV header is rewritten instead of dropping columns."""
+    ctx = ETLContext.from_args(input_dir=str(tmp_path), output_dir=str(tmp_path))
+    csv_path = os.path.join(ctx.output_dir, "batch_control.csv")
+    pd.DataFrame([{"batch_name": "old_load", "status": "SUCCESS"}]).to_csv(csv_path, index=False)
+
+    batch = BatchControl("test_load", ctx)
+    batch.start(rows_expected=1)
+    batch.end(rows_loaded=1)
+    batch.start(rows_expected=2)
+    batch.end(rows_loaded=2)
+
+    df_csv = pd.read_csv(csv_path)
+    assert df_csv["batch_name"].tolist() == ["old_load", "test_load", "test_load"]
+    assert df_csv["batch_id"].tolist()[1:] == [ctx.batch_id] * 2
+    assert df_csv["shard_count"].tolist()[1:] == [1, 1]
+    assert pd.isna(df_csv["batch_id"].iloc[0])
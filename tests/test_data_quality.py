@@ -0,0 +1,72 @@
+import json
+import pandas as pd
+from etl.core.dtypes import apply_schema_dtypes
+from etl.transform.data_quality import DataQualityReport, check_duplicates, check_nulls, run_data_quality
+
+MESSAGE_ID = "8d798677-9a33-47d1-876c-a0efe27a7222"
+
+
+def _messages():
+    return apply_schema_dtypes(pd.DataFrame({
+        "email_id": ["e1", "e1", "e2", "e3"],
+        "timestamp": ["2025-09-14T05:19:14Z", "2025-09-14T05:19:14Z", "1990-01-01T00:00:00Z", None],
+        "speaker_name": ["Bob", "Bob", "Ann", "Ann"],
+        "speaker_contact": ["bob@example.com", "bob@example.com", "not-an-email", "ann@example.com"],
+        "message": ["hi", "hi", "yo", "hey"],
+        "message_id": [MESSAGE_ID, MESSAGE_ID, "bad-id", MESSAGE_ID.replace("8", "9")],
+    }), "messages")
+
+
+def test_rules_count_failures_per_rule():
+    """Each rule reports its own failed rows; nulls only fail not_null rules."""
+    messages = _messages()
+    attachments = apply_schema_dtypes(pd.DataFrame({
+        "email_id": ["e1", "e4"],
+        "attachment_name": ["a.txt", "b.txt"],
+        "message_id": [MESSAGE_ID, "00000000-0000-0000-0000-000000000000"],
+    }), "attachments")
+
+    dq = DataQualityReport("batch")
+    violations = dq.check(messages, "messages")
+    violations += dq.check(attachments, "attachments", refs={"messages": messages})
+
+    failed = dq.to_frame().set_index("rule")["rows_failed"].to_dict()
+    assert failed == {
+        "messages_required_fields": 1,
+        "messages_unique_message": 2,
+        "messages_message_id_format": 1,
+        "messages_speaker_contact_format": 1,
+        "messages_timestamp_range": 1,
+        "attachments_required_fields": 0,
+        "attachments_unique_name": 0,
+        "attachments_message_exists": 1,
+    }
+    assert violations == sum(failed.values())
+
+
+def test_samples_are_capped_across_chunks():
+    """Counts add up over chunks while the sample of offending keys stays capped."""
+    dq = DataQualityReport("batch", sample_size=3)
+    for _ in range(3):
+        dq.check(_messages(), "messages")
+
+    row = dq.to_frame().set_index("rule").loc["messages_unique_message"]
+    assert row["rows_checked"] == 12
+    assert row["rows_failed"] == 6
+    assert json.loads(row["sample"]) == [{"email_id": "e1", "message_id": MESSAGE_ID}] * 3
+
+
+def test_run_data_quality_returns_rows_with_issues():
+    """The interactive wrapper returns each offending row once."""
+    issues = run_data_quality(_messages(), name="Messages")
+    assert list(issues.index) == [0, 1, 2, 3]
+    assert run_data_quality(_messages().iloc[[3]].assign(timestamp=pd.Timestamp("2025-01-01", tz="UTC"))).empty
+
+
+def test_check_nulls_and_duplicates_wrappers():
+    """The single-check helpers return the offending rows."""
+    messages = _messages()
+    assert list(check_nulls(messages).index) == [3]
+    assert check_nulls(messages, exclude=["timestamp"]).empty
+    assert list(check_duplicates(messages).index) == [0, 1]
+    assert list(check_duplicates(messages, subset=["speaker_name"]).index) == [0, 1, 2, 3]
@@ -0,0 +1,51 @@
+import logging
+import pandas as pd
+from etl.core.dtypes import apply_schema_dtypes, frame_bytes
+from etl.core.utils import format_utc_timestamps
+from etl.extract.parser import records_to_frames
+from etl.transform.enrichments import enrich_messages, normalize_text
+
+
+def _message_rows(count):
+    return [
+        (f"email_{i}", f"id-{i}", "2025-09-14T05:19:14Z", "Alice Example", "alice@example.com", f"text {i}", None)
+        for i in range(count)
+    ]
+
+
+def test_records_to_frames_uses_schema_dtypes():
+    """Frames come out with categoricals, UTC datetimes, nullable booleans and string dtype."""
+    messages_df, attachments_df = records_to_frames(
+        _message_rows(3), [("email_0", "a.txt", None, "text/plain", "id-0")]
+    )
+    assert isinstance(messages_df["speaker_name"].dtype, pd.CategoricalDtype)
+    assert isinstance(messages_df["speaker_contact"].dtype, pd.CategoricalDtype)
+    assert str(messages_df["timestamp"].dt.tz) == "UTC"
+    assert str(messages_df["with_attachment"].dtype) == "boolean"
+    assert isinstance(messages_df["message"].dtype, pd.StringDtype)
+    assert isinstance(attachments_df["content_type"].dtype, pd.CategoricalDtype)
+    assert attachments_df["content_id"].isna().all()
+
+    enriched = enrich_messages(messages_df)
+    assert isinstance(enriched["batch_dt"].dtype, pd.CategoricalDtype)
+    assert format_utc_timestamps(enriched["timestamp"]).tolist() == ["2025-09-14T05:19:14Z"] * 3
+
+
+def test_normalize_text_keeps_missing_values():
+    """Missing messages stay missing instead of becoming the string 'None'."""
+    df = normalize_text(pd.DataFrame({"message": ["  hi ", None]}, dtype=object), "message")
+    assert df["message"].iloc[0] == "hi"
+    assert df["message"].isna().iloc[1]
+
+
+def test_schema_dtypes_shrink_frames(caplog):
+    """Coercion reports memory before/after and shrinks object frames."""
+    df = pd.DataFrame.from_records(
+        _message_rows(2000),
+        columns=["email_id", "message_id", "timestamp", "speaker_name", "speaker_contact", "message", "with_attachment"],
+    ).astype(object)
+    before = frame_bytes(df)
+    with caplog.at_level(logging.INFO, logger="etl.core.dtypes"):
+        typed = apply_schema_dtypes(df, "messages", report=True)
+    assert frame_bytes(typed) < before / 2
+    assert "Memory of messages (2000 rows)" in caplog.text
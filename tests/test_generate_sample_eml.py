@@ -1,5 +1,7 @@
 import os
-from examples.generate_sample_eml import generate_eml
+from examples.generate_sample_eml import CorpusSpec, build_corpus_email, generate_corpus, generate_eml
+from etl.extract.parser import EmailParser
+from etl.extract.sources import EmailSource
 
 def test_generate_sample_eml(tmp_path):
     """Verify .eml files are generated."""
@@ -8,3 +10,44 @@ def test_generate_sample_eml(tmp_path):
     files = list(output_dir.glob("*.eml"))
     assert len(files) == 2
     assert all(f.stat().st_size > 0 for f in files)
+
+
+def test_generate_sample_eml_sizes_and_attachment_mix(tmp_path, capsys):
+    """Body/attachment padding and the attachment mix are configurable."""
+    small, large = tmp_path / "small", tmp_path / "large"
+    generate_eml(str(small), count=3, attachment_every=0, verbose=False)
+    generate_eml(str(large), count=3, body_bytes=4000, attachment_every=1, attachment_bytes=2000, verbose=False)
+    assert "Generated" not in capsys.readouterr().out
+
+    for name in ("sample_1.eml", "sample_2.eml", "sample_3.eml"):
+        assert "attachment_" not in (small / name).read_text()
+        assert "attachment_" in (large / name).read_text()
+        assert (large / name).stat().st_size > (small / name).stat().st_size + 6000
+
+
+def test_generate_corpus_is_reproducible_and_parseable(tmp_path, capsys):
+    """Same seed gives identical bytes for any worker count; legacy charsets decode."""
+    spec = CorpusSpec(seed=7, attachment_bytes=2048, legacy_charset_rate=0.5, malformed_rate=0.2)
+    serial, parallel = tmp_path / "serial", tmp_path / "parallel"
+    totals = generate_corpus(str(serial), 40, spec, workers=1, files_per_dir=16, task_size=7)
+    generate_corpus(str(parallel), 40, spec, workers=2, files_per_dir=16, task_size=5)
+
+    files = sorted(serial.rglob("*.eml"))
+    assert totals["files"] == len(files) == 40
+    assert len(list(serial.glob("part-*"))) == 3
+    assert 0 < totals["malformed"] < 40
+    for file in files:
+        assert file.read_bytes() == (parallel / file.relative_to(serial)).read_bytes()
+    assert build_corpus_email(3, spec) != build_corpus_email(3, spec._replace(seed=8))
+
+    parser = EmailParser()
+    parsed = 0
+    for index in range(40):
+        data, malformed = build_corpus_email(index, spec)
+        if malformed:
+            continue
+        messages, _ = parser.parse_records(EmailSource(f"corpus_{index}", "bytes", email_id=str(index), data=data))
+        assert messages and messages[0][1]  # message_id extracted
+        assert "�" not in messages[0][5]
+        parsed += 1
+    assert parsed == 40 - totals["malformed"]
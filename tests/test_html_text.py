@@ -0,0 +1,44 @@
+import pytest
+from etl.extract.html_text import fast_html_to_text, bs4_html_to_text
+from etl.extract.parser import EmailParser
+from examples.generate_sample_eml import generate_eml
+
+HTML_SAMPLES = [
+    "<html><body><p>Hello <b>team</b></p>\n<p>Second&nbsp;line</p></body></html>",
+    "<!DOCTYPE html><html><head><title>T</title><style>p { color: red; }</style></head><body>x</body></html>",
+    "<div>a<script type='text/javascript'>var s = '<p>no</p>';</script>b</div>",
+    "<p title=\"a>b\">quoted &amp; escaped &lt;tag&gt;</p><!-- comment --><br/>tail",
+    "plain text with a < b and Q&A",
+    "AT&T &amp; Q&A <p>mid</p> trailing &amp",
+    "<p>x<![CDATA[y]]>z</p>",  # falls back to bs4
+    "<p>unclosed <b",  # falls back to bs4
+    "<template><p>hidden</p></template><P>Upper</P>",
+    "<p>a&ampb</p>tail",  # bare entity names fall back to bs4
+    "<p>&copya &notit; &AMP; &Amp;</p>tail",
+    "<p>&#65; &#x41; &#65x &eacute;</p>tail",
+    "<p>a<b c d</p> after",  # unmatched "<" falls back to bs4
+    "<p>1 < 2 and x<y</p> z",
+    "a&<b>x</b> Q&<br>y",  # bare "&" right before a tag
+    "<br>text</br>x y\nz",  # void end tags fall back to bs4
+    "<p>a</p></br>\n text\nmore",
+    "<x a/\"  \n;a;>>\">",  # quote outside an attribute value falls back to bs4
+]
+
+
+@pytest.mark.parametrize("body", HTML_SAMPLES)
+def test_fast_engine_matches_bs4(body):
+    """The fast engine extracts the same text as BeautifulSoup."""
+    assert fast_html_to_text(body) == bs4_html_to_text(body)
+
+
+@pytest.mark.parametrize("html", [False, True])
+def test_parser_engines_extract_identical_fields(tmp_path, html):
+    """Generated plain and HTML emails parse to identical rows with either engine."""
+    generate_eml(str(tmp_path), count=5, html=html)
+    fast, reference = EmailParser(html_engine="fast"), EmailParser(html_engine="bs4")
+
+    for file_path in sorted(tmp_path.glob("*.eml")):
+        messages, _ = fast.parse_records(str(file_path))
+        assert len(messages) == 1
+        assert messages == reference.parse_records(str(file_path))[0]
+        assert all(value is not None for value in messages[0][:6])
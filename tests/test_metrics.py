@@ -0,0 +1,42 @@
+import sqlite3
+from etl.core.metrics import StageMetrics
+from main import run_pipeline
+from examples.generate_sample_eml import generate_eml
+
+
+def test_stage_metrics_aggregate_samples(tmp_path):
+    """Samples of one stage are summed; per-worker samples also feed the 'all' row."""
+    metrics = StageMetrics("b1")
+    with metrics.stage("merge", rows=2) as sample:
+        sample.rows += 1
+    metrics.add("merge", wall_sec=1.0, cpu_sec=0.5, rows=4)
+    metrics.add_worker("parse", {"worker": 11, "rows": 3, "bytes_read": 30, "wall_sec": 1.0, "cpu_sec": 1.0, "peak_rss_kb": 5})
+    metrics.add_worker("parse", {"worker": 12, "rows": 1, "bytes_read": 10, "wall_sec": 1.0, "cpu_sec": 1.0, "peak_rss_kb": 9})
+    assert list(metrics.timed_iter("discover", [1, 2, 3], size=lambda x: x)) == [1, 2, 3]
+
+    df = metrics.to_frame().set_index(["stage", "worker"])
+    assert df.loc[("merge", "all"), "calls"] == 2
+    assert df.loc[("merge", "all"), "rows"] == 7
+    assert df.loc[("parse", "all"), ["rows", "bytes_read", "peak_rss_kb"]].tolist() == [4, 40, 9]
+    assert df.loc[("parse", "12"), "rows"] == 1
+    assert df.loc[("discover", "all"), ["rows", "bytes_read"]].tolist() == [3, 6]
+
+
+def test_pipeline_persists_stage_metrics(tmp_path):
+    """A run records every stage in stage_metrics and the Prometheus textfile."""
+    generate_eml(str(tmp_path / "in"), count=3)
+    prom = tmp_path / "metrics" / "etl.prom"
+    run_pipeline(str(tmp_path / "in"), str(tmp_path / "out"), metrics_textfile=str(prom))
+
+    conn = sqlite3.connect(tmp_path / "out" / "etl_demo.db")
+    stages = {row[0]: row[1:] for row in conn.execute(
+        "SELECT stage, rows, wall_sec FROM stage_metrics WHERE worker = 'all'"
+    )}
+    workers = conn.execute("SELECT COUNT(*) FROM stage_metrics WHERE stage = 'parse' AND worker != 'all'").fetchone()[0]
+    conn.close()
+
+    assert {"discover", "parse", "enrich", "dq", "load_csv", "load_sqlite"} <= set(stages)
+    assert stages["parse"][0] == 3 and stages["discover"][0] == 3
+    assert workers >= 1
+    text = prom.read_text()
+    assert 'eml_etl_stage_wall_seconds{stage="parse",worker="all"' in text
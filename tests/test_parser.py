@@ -0,0 +1,65 @@
+from etl.extract.parser import EmailParser, MESSAGE_COLUMNS, ATTACHMENT_COLUMNS
+from examples.generate_sample_eml import generate_eml
+
+
+def test_parse_records_matches_parse_email(tmp_path):
+    """parse_records returns plain tuples equivalent to the parse_email DataFrames."""
+    generate_eml(str(tmp_path), count=1)
+    file_path = str(tmp_path / "sample_1.eml")
+
+    parser = EmailParser()
+    message_rows, attachment_rows = parser.parse_records(file_path)
+    messages_df, attachments_df = parser.parse_email(file_path)
+
+    assert len(message_rows) == 1 and len(message_rows[0]) == len(MESSAGE_COLUMNS)
+    assert len(attachment_rows) == 1 and len(attachment_rows[0]) == len(ATTACHMENT_COLUMNS)
+    assert list(messages_df.columns) == list(MESSAGE_COLUMNS)
+    assert messages_df.iloc[0]["message_id"] == message_rows[0][1]
+    assert attachments_df.iloc[0]["attachment_name"] == "attachment_0.txt"
+
+
+def _write_rich_email(path, message_id):
+    """Nested multipart/alternative body, an inline image and a large binary attachment."""
+    from email.message import EmailMessage
+
+    msg = EmailMessage()
+    msg["Subject"] = "Rich"
+    msg["From"] = "Bob Demo <bob@example.com>"
+    text = f"Message ID: {message_id}\n2025-09-14T05:19:14Z Bob Demo - bob@example.com says:\nSee the PDF.\n"
+    msg.set_content(text)
+    msg.add_alternative(f"<html><body><p>{text}</p></body></html>", subtype="html")
+    msg.add_attachment(b"\x89PNG" * 100, maintype="image", subtype="png",
+                       filename="logo.png", cid="<logo@example.com>", disposition="inline")
+    msg.add_attachment(bytes(range(256)) * 8192, maintype="application", subtype="pdf", filename="report.pdf")
+    path.write_bytes(msg.as_bytes())
+
+
+def test_metadata_mode_matches_full_parse(tmp_path):
+    """Attachment-metadata mode extracts the same rows as the full MIME parse."""
+    generate_eml(str(tmp_path), count=4)
+    generate_eml(str(tmp_path / "html"), count=2, html=True)
+    _write_rich_email(tmp_path / "rich.eml", "8d798677-9a33-47d1-876c-a0efe27a7222")
+
+    full = EmailParser(attachment_mode="full")
+    metadata = EmailParser(attachment_mode="metadata")
+    for file_path in sorted(tmp_path.rglob("*.eml")):
+        assert metadata.parse_records(str(file_path)) == full.parse_records(str(file_path))
+
+    _, attachments = metadata.parse_records(str(tmp_path / "rich.eml"))
+    message_id = "8d798677-9a33-47d1-876c-a0efe27a7222"
+    assert [a[1:] for a in attachments] == [
+        ("logo.png", "logo@example.com", "image/png", message_id),
+        ("report.pdf", None, "application/pdf", message_id),
+    ]
+
+
+def test_metadata_scan_discards_attachment_payloads(tmp_path):
+    """Only body candidates are buffered by the streaming scanner."""
+    from etl.extract.mime_scan import scan_message
+
+    _write_rich_email(tmp_path / "rich.eml", "8d798677-9a33-47d1-876c-a0efe27a7222")
+    with open(tmp_path / "rich.eml", "rb") as f:
+        scan = scan_message(f, max_line=1024)
+
+    assert set(scan.bodies) == {"plain", "html"}
+    assert sum(len(raw) for raw in scan.bodies.values()) < 2048
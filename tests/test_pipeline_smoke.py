@@ -1,4 +1,5 @@
 import os
+import pytest
 from main import run_pipeline
 from examples.generate_sample_eml import generate_eml
 
@@ -14,3 +15,192 @@ def test_pipeline_smoke(tmp_path):
     assert (output_dir / "messages.csv").exists()
     assert (output_dir / "attachments.csv").exists()
     assert (output_dir / "etl_demo.db").exists()
+
+
+def test_pipeline_options_and_overrides(tmp_path):
+    """PipelineOptions carry the run settings; keyword overrides replace single options."""
+    import sqlite3
+    from etl.core.options import PipelineOptions
+
+    input_dir = tmp_path / "emails"
+    generate_eml(str(input_dir), count=3)
+    options = PipelineOptions(sinks=["sqlite"], chunk_size=2)
+    run_pipeline(str(input_dir), str(tmp_path / "out"), options, staged=True)
+
+    assert not (tmp_path / "out" / "messages.csv").exists()
+    conn = sqlite3.connect(tmp_path / "out" / "etl_demo.db")
+    assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 3
+    conn.close()
+    assert options.staged is False
+    with pytest.raises(TypeError):
+        run_pipeline(str(input_dir), str(tmp_path / "out"), chunk_sizes=2)
+
+
+def test_pipeline_streaming_chunks(tmp_path):
+    """Streaming mode loads every chunk and matches the single-batch output."""
+    import pandas as pd
+
+    input_dir = tmp_path / "emails"
+    full_dir = tmp_path / "full"
+    chunked_dir = tmp_path / "chunked"
+
+    generate_eml(str(input_dir), count=5)
+    run_pipeline(input_dir=str(input_dir), output_dir=str(full_dir))
+    run_pipeline(input_dir=str(input_dir), output_dir=str(chunked_dir), chunk_size=2)
+
+    for name in ("messages", "attachments"):
+        full = pd.read_csv(full_dir / f"{name}.csv", encoding="utf-8-sig")
+        chunked = pd.read_csv(chunked_dir / f"{name}.csv", encoding="utf-8-sig")
+        assert len(chunked) == len(full)
+        assert sorted(chunked["email_id"]) == sorted(full["email_id"])
+
+
+def test_pipeline_incremental_skips_loaded_files(tmp_path):
+    """Incremental re-runs only load new or changed files."""
+    import sqlite3
+
+    input_dir = tmp_path / "emails"
+    output_dir = tmp_path / "output"
+    generate_eml(str(input_dir), count=3)
+
+    run_pipeline(input_dir=str(input_dir), output_dir=str(output_dir), incremental=True)
+    os.utime(input_dir / "sample_1.eml")  # touched, content unchanged
+    run_pipeline(input_dir=str(input_dir), output_dir=str(output_dir), incremental=True)
+
+    generate_eml(str(tmp_path / "more"), count=4)
+    os.replace(tmp_path / "more" / "sample_4.eml", input_dir / "sample_4.eml")
+    run_pipeline(input_dir=str(input_dir), output_dir=str(output_dir), incremental=True)
+
+    conn = sqlite3.connect(output_dir / "etl_demo.db")
+    messages = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    manifest = conn.execute("SELECT COUNT(*), COUNT(DISTINCT batch_id) FROM ingest_manifest").fetchone()
+    conn.close()
+
+    assert messages == 4
+    assert manifest == (4, 2)
+
+
+def test_pipeline_hashes_files_only_when_incremental(tmp_path):
+    """Content hashes are an extra read per file, so only incremental runs compute them."""
+    import sqlite3
+
+    input_dir = tmp_path / "emails"
+    generate_eml(str(input_dir), count=2)
+
+    def hashes(output_dir):
+        conn = sqlite3.connect(output_dir / "etl_demo.db")
+        rows = conn.execute("SELECT content_hash FROM ingest_manifest").fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+
+    run_pipeline(input_dir=str(input_dir), output_dir=str(tmp_path / "full"))
+    run_pipeline(input_dir=str(input_dir), output_dir=str(tmp_path / "incremental"), incremental=True)
+
+    assert hashes(tmp_path / "full") == [None, None]
+    assert all(len(value) == 64 for value in hashes(tmp_path / "incremental"))
+
+
+def test_pipeline_staged_matches_sequential(tmp_path):
+    """Staged mode loads the same rows to every sink as the sequential runner."""
+    import sqlite3
+    import pandas as pd
+
+    input_dir = tmp_path / "emails"
+    generate_eml(str(input_dir), count=5)
+    run_pipeline(input_dir=str(input_dir), output_dir=str(tmp_path / "seq"), chunk_size=2)
+    run_pipeline(input_dir=str(input_dir), output_dir=str(tmp_path / "staged"), chunk_size=2, staged=True)
+
+    for name in ("messages", "attachments"):
+        seq = pd.read_csv(tmp_path / "seq" / f"{name}.csv", encoding="utf-8-sig")
+        staged = pd.read_csv(tmp_path / "staged" / f"{name}.csv", encoding="utf-8-sig")
+        assert sorted(staged["email_id"]) == sorted(seq["email_id"])
+
+    conn = sqlite3.connect(tmp_path / "staged" / "etl_demo.db")
+    assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 5
+    assert conn.execute("SELECT COUNT(*) FROM ingest_manifest").fetchone()[0] == 5
+    conn.close()
+
+
+def test_pipeline_shards_write_own_partitions(tmp_path):
+    """Each shard loads a disjoint subset into its own output partition and batch record."""
+    import sqlite3
+
+    input_dir = tmp_path / "emails"
+    generate_eml(str(input_dir / "nested"), count=6)
+
+    loaded = []
+    for shard_index in range(2):
+        run_pipeline(input_dir=str(input_dir), output_dir=str(tmp_path / "out"),
+                     shard_index=shard_index, shard_count=2)
+        conn = sqlite3.connect(tmp_path / "out" / f"shard={shard_index:03d}-of-002" / "etl_demo.db")
+        loaded += [row[0] for row in conn.execute("SELECT email_id FROM messages")]
+        shards = conn.execute("SELECT DISTINCT shard_index, shard_count FROM batch_control").fetchall()
+        conn.close()
+        assert shards == [(shard_index, 2)]
+
+    assert sorted(loaded) == sorted(f"sample_{i}" for i in range(1, 7))
+
+
+def test_pipeline_profile_merges_worker_profiles(tmp_path):
+    """--profile writes per-worker and parent stats, merged with a top-N report."""
+    import pstats
+
+    input_dir = tmp_path / "emails"
+    output_dir = tmp_path / "output"
+    generate_eml(str(input_dir), count=4)
+    run_pipeline(input_dir=str(input_dir), output_dir=str(output_dir), max_workers=2, batch_size=1, profile=True)
+
+    (profile_dir,) = (output_dir / "profile").iterdir()
+    names = sorted(path.name for path in profile_dir.iterdir())
+    assert any(name.startswith("parent-") for name in names)
+    assert any(name.startswith("worker-") for name in names)
+    assert "top_functions.txt" in names
+
+    stats = pstats.Stats(str(profile_dir / "combined.pstats"))
+    assert any(func[2] == "parse_records" for func in stats.stats)  # only seen inside workers
+    assert "Top" in (profile_dir / "top_functions.txt").read_text()
+
+
+def test_pipeline_search_finds_loaded_attachments(tmp_path):
+    """Search mode finds messages by the names of attachments loaded with them."""
+    from main import search_messages
+
+    generate_eml(str(tmp_path / "in"), count=4)
+    run_pipeline(str(tmp_path / "in"), str(tmp_path / "out"), sinks=["sqlite"], search_index=True)
+
+    results = search_messages(str(tmp_path / "out"), "attachment_names: attachment*")
+    assert sorted(results["email_id"]) == ["sample_1", "sample_3"]
+    assert results["message_id"].notna().all()
+    assert results["snippet"].str.startswith("[attachment]_").all()
+
+    with pytest.raises(FileNotFoundError):
+        search_messages(str(tmp_path / "missing"), "anything")
+    assert not (tmp_path / "missing").exists()
+
+
+def test_pipeline_incremental_appends_csv(tmp_path):
+    """Incremental re-runs add their rows to the CSV files of earlier runs."""
+    import sqlite3
+    import pandas as pd
+
+    input_dir = tmp_path / "emails"
+    output_dir = tmp_path / "output"
+    generate_eml(str(input_dir), count=3)
+    run_pipeline(input_dir=str(input_dir), output_dir=str(output_dir), incremental=True)
+
+    generate_eml(str(tmp_path / "more"), count=5)
+    for name in ("sample_4.eml", "sample_5.eml"):
+        os.replace(tmp_path / "more" / name, input_dir / name)
+    run_pipeline(input_dir=str(input_dir), output_dir=str(output_dir), incremental=True)
+    run_pipeline(input_dir=str(input_dir), output_dir=str(output_dir), incremental=True)  # nothing new
+
+    messages = pd.read_csv(output_dir / "messages.csv", encoding="utf-8-sig")
+    attachments = pd.read_csv(output_dir / "attachments.csv", encoding="utf-8-sig")
+    conn = sqlite3.connect(output_dir / "etl_demo.db")
+    loaded = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    conn.close()
+
+    assert len(messages) == loaded == 5
+    assert sorted(messages["email_id"]) == [f"sample_{i}" for i in range(1, 6)]
+    assert messages.columns[0] == "email_id"
+    assert sorted(attachments["email_id"]) == ["sample_1", "sample_3", "sample_5"]
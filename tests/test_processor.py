@@ -0,0 +1,54 @@
+from etl.transform.processor import _iter_batches, process_file_batch
+from examples.generate_sample_eml import generate_eml
+
+
+def test_iter_batches_balances_by_count_and_size(tmp_path):
+    """Batches close at batch_size files or batch_bytes total, whichever comes first."""
+    small = [tmp_path / f"small_{i}.eml" for i in range(5)]
+    for path in small:
+        path.write_bytes(b"x" * 10)
+    large = tmp_path / "large.eml"
+    large.write_bytes(b"x" * 1000)
+
+    assert [len(b) for b in _iter_batches(small, batch_size=2, batch_bytes=10_000)] == [2, 2, 1]
+    assert [len(b) for b in _iter_batches(iter([large] + small), batch_size=10, batch_bytes=500)] == [1, 5]
+
+
+def test_process_file_batch_aggregates_rows(tmp_path):
+    """One batch returns the rows of all its files and skips unreadable ones."""
+    generate_eml(str(tmp_path), count=3)
+    files = sorted(str(p) for p in tmp_path.glob("*.eml")) + [str(tmp_path / "missing.eml")]
+
+    message_rows, attachment_rows, file_rows = process_file_batch(files)
+
+    assert len(message_rows) == 3
+    assert len(attachment_rows) == 2
+    assert [row[-1] for row in file_rows] == ["SUCCESS"] * 3 + ["FAILED"]
+
+
+def test_ordered_results_follow_file_order(tmp_path):
+    """ordered=True yields rows in input file order regardless of completion order."""
+    from etl.transform.processor import process_files_parallel
+
+    generate_eml(str(tmp_path), count=6)
+    messages_df, _, file_count = process_files_parallel(
+        str(tmp_path), max_workers=3, batch_size=1, max_inflight=2, ordered=True
+    )
+
+    assert file_count == 6
+    assert list(messages_df["email_id"]) == sorted(p.stem for p in tmp_path.glob("*.eml"))
+
+
+def test_parse_time_linkage_matches_global_merge(tmp_path):
+    """Attachments are linked to their message in the workers, as the global merge would link them."""
+    from etl.transform.processor import process_files_parallel, validate_attachment_links
+
+    generate_eml(str(tmp_path), count=6, attachment_every=2)
+    messages_df, attachments_df, _ = process_files_parallel(str(tmp_path), max_workers=2)
+
+    assert messages_df["with_attachment"].sum() == 3
+    assert attachments_df["message_id"].notna().all()
+    assert validate_attachment_links(messages_df, attachments_df) == 0
+
+    attachments_df.loc[0, "message_id"] = None
+    assert validate_attachment_links(messages_df, attachments_df) == 1
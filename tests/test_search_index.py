@@ -0,0 +1,96 @@
+import pytest
+import sqlite3
+import pandas as pd
+from etl.load.search_index import rebuild_search_index, search
+from etl.load.sqlite_sink import SQLiteSink
+
+
+def _messages(text):
+    return pd.DataFrame({
+        "email_id": ["e1", "e2"],
+        "message_id": ["m1", "m2"],
+        "speaker_name": ["Bob Demo", "Ann Example"],
+        "message": [f"{text} wire transfer pending", f"{text} lunch on friday"],
+    })
+
+
+def _attachments():
+    return pd.DataFrame({"email_id": ["e1"], "attachment_name": ["quarterly_report.pdf"], "message_id": ["m1"]})
+
+
+def test_search_index_follows_appends_and_upserts(tmp_path):
+    """Each load updates the index, whichever table is loaded first."""
+    db_path = str(tmp_path / "etl.db")
+    sink = SQLiteSink(db_path, search_index=True)
+    sink.append(_messages("first"), "messages")
+    sink.append(_attachments(), "attachments")
+
+    results = search(db_path, '"wire transfer"')
+    assert list(results["message_id"]) == ["m1"]
+    assert results["snippet"][0] == "first [wire transfer] pending"
+    assert list(search(db_path, "attachment_names: quarterly*")["message_id"]) == ["m1"]
+    assert list(search(db_path, "ann")["message_id"]) == ["m2"]
+
+    sink.upsert(_messages("second"), "messages")
+    assert list(search(db_path, "second AND lunch")["message_id"]) == ["m2"]
+    assert search(db_path, "first").empty
+
+    other = str(tmp_path / "other.db")
+    sink = SQLiteSink(other, search_index=True)
+    sink.append(_attachments(), "attachments")
+    sink.append(_messages("first"), "messages")
+    assert list(search(other, "report*")["message_id"]) == ["m1"]
+    sink.close()
+
+
+def test_search_index_backfills_existing_rows(tmp_path):
+    """The index is opt-in; creating it on an existing database indexes rows loaded without it."""
+    db_path = str(tmp_path / "etl.db")
+    SQLiteSink(db_path).append(_messages("legacy"), "messages")
+    with pytest.raises(ValueError, match="SQLITE_SEARCH_INDEX=true"):
+        search(db_path, "legacy")
+
+    sink = SQLiteSink(db_path, search_index=True)
+    sink.append(_attachments(), "attachments")
+    assert len(search(db_path, "legacy")) == 2
+    assert list(search(db_path, "quarterly*")["message_id"]) == ["m1"]
+
+    with sink.transaction() as conn:
+        assert rebuild_search_index(conn) == 2
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM messages_fts").fetchone()[0] == 2
+    conn.close()
+    sink.close()
+
+
+def test_message_id_is_indexed_once(tmp_path):
+    """The lookup index is skipped, or dropped later, when the upsert key already indexes message_id."""
+    def message_id_indexes(db_path):
+        conn = sqlite3.connect(db_path)
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'messages' AND sql LIKE '%(\"message_id\")'"
+        )]
+        conn.close()
+        return names
+
+    upserted = str(tmp_path / "upserted.db")
+    SQLiteSink(upserted, search_index=True).upsert(_messages("first"), "messages")
+    assert message_id_indexes(upserted) == ["ux_messages_message_id"]
+
+    appended = str(tmp_path / "appended.db")
+    sink = SQLiteSink(appended, search_index=True)
+    sink.append(_messages("first"), "messages")
+    assert message_id_indexes(appended) == ["ix_messages_message_id"]
+    sink.upsert(_messages("second"), "messages")
+    assert message_id_indexes(appended) == ["ux_messages_message_id"]
+    assert list(search(appended, "second AND lunch")["message_id"]) == ["m2"]
+
+
+def test_search_reports_bad_queries(tmp_path):
+    """Malformed FTS5 queries raise a ValueError instead of a raw database error."""
+    db_path = str(tmp_path / "etl.db")
+    SQLiteSink(db_path, search_index=True).append(_messages("first"), "messages")
+
+    for query in ['"unbalanced', "AND"]:
+        with pytest.raises(ValueError, match="Invalid search query"):
+            search(db_path, query)
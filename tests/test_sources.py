@@ -0,0 +1,110 @@
+import tarfile
+from io import BytesIO
+import zipfile
+from etl.extract.sources import iter_sources, as_source
+from etl.transform.processor import process_files_parallel
+from examples.generate_sample_eml import generate_eml
+
+
+def _emails(tmp_path, count=3):
+    eml_dir = tmp_path / "eml"
+    generate_eml(str(eml_dir), count=count)
+    return sorted(eml_dir.glob("*.eml"))
+
+
+def test_archive_members_read_back_exact_bytes(tmp_path):
+    """Zip (stored/deflated), tar, tar.gz and mbox members yield the original message bytes."""
+    emails = _emails(tmp_path)
+    originals = {path.stem: path.read_bytes() for path in emails}
+    archives = tmp_path / "archives"
+    archives.mkdir()
+
+    with zipfile.ZipFile(archives / "export.zip", "w") as zf:
+        zf.write(emails[0], "a/" + emails[0].name, compress_type=zipfile.ZIP_STORED)
+        zf.write(emails[1], emails[1].name, compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr("notes.txt", "ignored")
+    for name, mode in (("export.tar", "w"), ("export.tar.gz", "w:gz")):
+        with tarfile.open(archives / name, mode) as tf:
+            tf.add(emails[2], emails[2].name)
+    with open(archives / "inbox.mbox", "wb") as f:
+        for path in emails:
+            f.write(b"From sender@example.com Mon Sep 15 10:00:00 2025\n" + path.read_bytes() + b"\n")
+
+    sources = list(iter_sources(str(archives)))
+    kinds = [(s.kind, s.email_id) for s in sources]
+    assert kinds == [
+        ("range", emails[2].stem), ("bytes", emails[2].stem),
+        ("zip", emails[0].stem), ("zip", emails[1].stem),
+        ("range", "inbox_000000"), ("range", "inbox_000001"), ("range", "inbox_000002"),
+    ]
+    for source in sources[:4]:
+        assert source.read_bytes() == originals[source.email_id]
+        assert source.materialize().digest() == source.digest()
+    for source, path in zip(sources[4:], emails):
+        assert source.read_bytes() == path.read_bytes() + b"\n"
+    assert sources[2].key.endswith("export.zip!a/" + emails[0].name)
+    assert as_source(emails[0]).key == str(emails[0].resolve())
+
+
+def test_archive_members_are_streamed(tmp_path):
+    """Zip and mbox members open as bounded streams that read back line by line."""
+    body = b"".join(b"line %06d of a long message body\r\n" % i for i in range(20000))
+    message = b"Subject: big\r\n\r\n" + body
+    with zipfile.ZipFile(tmp_path / "big.zip", "w") as zf:
+        zf.writestr("stored.eml", message, compress_type=zipfile.ZIP_STORED)
+        zf.writestr("deflated.eml", message, compress_type=zipfile.ZIP_DEFLATED)
+    with open(tmp_path / "big.mbox", "wb") as f:
+        f.write(b"From a@example.com Mon Sep 15 10:00:00 2025\n" + message + b"\n")
+        f.write(b"From b@example.com Mon Sep 15 10:00:00 2025\nSubject: next\n\nbye\n")
+
+    sources = sorted(iter_sources(str(tmp_path)), key=lambda s: s.kind != "zip")
+    assert [s.kind for s in sources] == ["zip", "zip", "range", "range"]
+    for source in sources[:3]:
+        with source.open() as f:
+            assert not isinstance(f, BytesIO)
+            assert f.readline() == b"Subject: big\r\n"
+            assert f.read(4) == b"\r\nli"
+            rest = b"".join(iter(lambda: f.read(1000), b""))
+        assert b"Subject: big\r\n\r\nli" + rest == source.read_bytes()
+        assert source.read_bytes().rstrip(b"\n") == message.rstrip(b"\n")
+        assert source.digest() == source.materialize().digest()
+    with sources[3].open() as f:
+        assert f.read() == b"Subject: next\n\nbye\n"
+
+
+def test_parallel_processing_reads_archives(tmp_path):
+    """Messages parsed from a zip and an mbox match the loose .eml files."""
+    emails = _emails(tmp_path, count=4)
+    archives = tmp_path / "archives"
+    archives.mkdir()
+    with zipfile.ZipFile(archives / "export.zip", "w", zipfile.ZIP_DEFLATED) as zf:
+        for path in emails[:2]:
+            zf.write(path, path.name)
+    with open(archives / "inbox.mbox", "wb") as f:
+        for path in emails[2:]:
+            f.write(b"From sender@example.com Mon Sep 15 10:00:00 2025\n" + path.read_bytes() + b"\n")
+
+    expected, _, _ = process_files_parallel(str(tmp_path / "eml"), max_workers=2)
+    messages_df, attachments_df, file_count = process_files_parallel(str(archives), max_workers=2, ordered=True)
+
+    assert file_count == 4
+    assert sorted(messages_df["message_id"]) == sorted(expected["message_id"])
+    assert list(messages_df["email_id"][:2]) == [p.stem for p in emails[:2]]
+
+
+def test_recursive_walk_and_shards_partition_the_input(tmp_path):
+    """The scandir walk finds nested files; shards are disjoint and cover every email."""
+    from etl.extract.sources import iter_input_files
+
+    generate_eml(str(tmp_path / "a"), count=3)
+    generate_eml(str(tmp_path / "a" / "b"), count=4)
+    (tmp_path / "a" / "notes.txt").write_text("ignored")
+
+    files = list(iter_input_files(str(tmp_path / "a")))
+    assert len(files) == 7
+    assert len(list(iter_input_files(str(tmp_path / "a"), recursive=False))) == 3
+
+    all_ids = sorted(s.key for s in iter_sources(str(tmp_path / "a")))
+    shards = [sorted(s.key for s in iter_sources(str(tmp_path / "a"), shard_index=i, shard_count=3)) for i in range(3)]
+    assert sorted(sum(shards, [])) == all_ids
+    assert sum(len(shard) for shard in shards) == len(all_ids)
@@ -0,0 +1,47 @@
+import threading
+import time
+import pytest
+from etl.core.stages import StagedPipeline
+
+
+def test_staged_pipeline_runs_every_item_through_all_writers():
+    """Every item reaches every writer; on_loaded fires once per item after all writers."""
+    written = {"a": [], "b": []}
+    loaded = []
+
+    def write(name):
+        def writer(item):
+            time.sleep(0.001)
+            written[name].append(item)
+        return writer
+
+    def on_loaded(item):
+        assert item in written["a"] and item in written["b"]
+        loaded.append(item)
+
+    report = StagedPipeline(queue_size=1).run(
+        range(20),
+        stages=[("double", lambda x: x * 2), ("drop_tens", lambda x: None if x % 10 == 0 else x)],
+        writers={"a": write("a"), "b": write("b")},
+        on_loaded=on_loaded,
+    )
+
+    expected = [x * 2 for x in range(20) if (x * 2) % 10 != 0]
+    assert written["a"] == expected and written["b"] == expected
+    assert sorted(loaded) == expected
+    stages = {row["stage"]: row for row in report}
+    assert stages["extract"]["items"] == 20
+    assert stages["drop_tens"]["rows"] == len(expected)
+    assert all(row["max_queue_depth"] <= 1 for row in report)
+
+
+def test_staged_pipeline_propagates_stage_errors():
+    """A failing stage stops the others and re-raises in the caller."""
+    def fail(item):
+        if item == 3:
+            raise RuntimeError("boom")
+        return item
+
+    with pytest.raises(RuntimeError, match="boom"):
+        StagedPipeline(queue_size=1).run(range(100), stages=[("fail", fail)], writers={"w": lambda item: None})
+    assert not [t for t in threading.enumerate() if t.name.startswith("stage-")]
@@ -0,0 +1,198 @@
+import pytest
+import sqlite3
+import pandas as pd
+from etl.core.context import ETLContext
+from etl.core.utils import convert_utc_to_local
+from etl.load.storage import Storage
+
+
+def _messages(text):
+    return pd.DataFrame({
+        "email_id": ["e1", "e2"],
+        "message_id": ["m1", "m2"],
+        "message": [text, text],
+        "with_attachment": [True, False],
+        "batch_dt": ["2025-09-14", "2025-09-14"],
+    })
+
+
+def test_upsert_is_idempotent_and_indexed(tmp_path):
+    """Upsert loads merge on the key instead of duplicating rows."""
+    ctx = ETLContext.from_args(input_dir=str(tmp_path), output_dir=str(tmp_path))
+    storage = Storage(ctx)
+
+    storage.write_sqlite(_messages("first"), "messages", mode="upsert")
+    storage.write_sqlite(_messages("second"), "messages", mode="upsert")
+
+    conn = sqlite3.connect(ctx.db_path)
+    rows = conn.execute("SELECT message_id, message FROM messages ORDER BY message_id").fetchall()
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM messages WHERE message_id = 'm1'").fetchall()
+    conn.close()
+
+    assert rows == [("m1", "second"), ("m2", "second")]
+    assert "USING INDEX ux_messages_message_id" in plan[0][-1]
+
+
+def test_upsert_upgrades_appended_table(tmp_path):
+    """A table created by append loads gets the key index on the first upsert."""
+    ctx = ETLContext.from_args(input_dir=str(tmp_path), output_dir=str(tmp_path))
+    storage = Storage(ctx)
+    attachments = pd.DataFrame({"email_id": ["e1"], "attachment_name": ["a.txt"], "content_id": [None]})
+
+    storage.write_sqlite(attachments, "attachments", mode="append")
+    storage.write_sqlite(attachments.assign(content_id="cid"), "attachments", mode="upsert")
+
+    conn = sqlite3.connect(ctx.db_path)
+    rows = conn.execute("SELECT email_id, attachment_name, content_id FROM attachments").fetchall()
+    conn.close()
+
+    assert rows == [("e1", "a.txt", "cid")]
+
+
+def test_upsert_refuses_or_deduplicates_appended_reruns(tmp_path):
+    """Keys duplicated by append re-runs block the key index unless deduplication is opted into."""
+    from etl.load.sqlite_sink import SQLiteSink
+
+    db_path = str(tmp_path / "etl.db")
+    attachments = pd.DataFrame({
+        "email_id": ["e1", "e1", "e2"], "attachment_name": ["a.txt", "b.txt", "a.txt"], "content_id": [None] * 3,
+    })
+    sink = SQLiteSink(db_path)
+    sink.append(attachments.assign(content_id="run1"), "attachments")
+    sink.append(attachments.assign(content_id="run2"), "attachments")
+
+    with pytest.raises(ValueError, match=r"3 keys are loaded more than once.*email_id='e1', attachment_name='a.txt' \(2 rows\)"):
+        sink.upsert(attachments.iloc[:1].assign(content_id="run3"), "attachments")
+    assert sink.conn.execute("SELECT COUNT(*) FROM attachments").fetchone()[0] == 6
+
+    sink = SQLiteSink(db_path, deduplicate_keys=True)
+    sink.upsert(attachments.iloc[:1].assign(content_id="run3"), "attachments")
+    rows = sink.conn.execute(
+        "SELECT email_id, attachment_name, content_id FROM attachments ORDER BY email_id, attachment_name"
+    ).fetchall()
+    assert rows == [("e1", "a.txt", "run3"), ("e1", "b.txt", "run2"), ("e2", "a.txt", "run2")]
+
+
+def test_append_merges_into_keyed_table(tmp_path):
+    """After an upsert run has keyed the table, a later append run merges on the key instead of failing."""
+    ctx = ETLContext.from_args(input_dir=str(tmp_path), output_dir=str(tmp_path))
+    storage = Storage(ctx)
+    storage.write_sqlite(_messages("first"), "messages", mode="upsert")
+    storage.close()
+
+    storage = Storage(ctx)
+    storage.write_sqlite(_messages("second"), "messages", mode="append")
+    storage.write_sqlite(_messages("third").iloc[:1], "messages", mode="append")
+    storage.close()
+
+    conn = sqlite3.connect(ctx.db_path)
+    rows = conn.execute("SELECT message_id, message FROM messages ORDER BY message_id").fetchall()
+    conn.close()
+    assert rows == [("m1", "third"), ("m2", "second")]
+
+
+def test_sqlite_sink_is_shared_and_tuned(tmp_path):
+    """One sink per database file, opened in WAL mode, converting nulls and datetimes."""
+    from etl.load.sqlite_sink import get_sqlite_sink, close_sqlite_sink
+
+    db_path = str(tmp_path / "etl_demo.db")
+    sink = get_sqlite_sink(db_path)
+    assert get_sqlite_sink(db_path) is sink
+    assert sink.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    df = pd.DataFrame({
+        "name": ["a", None],
+        "rows": [1, 2],
+        "started": pd.to_datetime(["2025-09-14 05:19:14", None]),
+    })
+    assert sink.append(df, "control") == 2
+    close_sqlite_sink(db_path)
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT name, rows, started FROM control").fetchall()
+    conn.close()
+    assert rows == [("a", 1, "2025-09-14 05:19:14.000000"), (None, 2, None)]
+
+
+def test_parquet_sink_appends_partitioned_files(tmp_path):
+    """Each chunk adds part files under batch_dt partitions with schema types."""
+    pytest.importorskip("pyarrow")
+
+    ctx = ETLContext.from_args(input_dir=str(tmp_path), output_dir=str(tmp_path))
+    storage = Storage(ctx)
+    chunk = _messages("hello").assign(timestamp="2025-09-14T05:19:14.864688Z")
+
+    storage.write_parquet(chunk, "messages")
+    storage.write_parquet(chunk.assign(batch_dt="2025-09-15"), "messages")
+
+    files = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*.parquet"))
+    assert [f.split("/")[1] for f in files] == ["batch_dt=2025-09-14", "batch_dt=2025-09-15"]
+
+    day = pd.read_parquet(tmp_path / "messages" / "batch_dt=2025-09-15", columns=["message_id", "timestamp"])
+    assert list(day["message_id"]) == ["m1", "m2"]
+    assert str(day["timestamp"].dtype) == "datetime64[us, UTC]"
+    assert len(pd.read_parquet(tmp_path / "messages")) == 4
+
+
+def test_csv_sink_appends_compressed_chunks(tmp_path):
+    """Chunks append to one gzip file with a single header."""
+    ctx = ETLContext.from_args(input_dir=str(tmp_path), output_dir=str(tmp_path))
+    storage = Storage(ctx, csv_compression="gzip")
+    storage.write_csv(_messages("first"), "messages")
+    storage.write_csv(_messages("second")[["message", "email_id", "message_id", "with_attachment", "batch_dt"]], "messages")
+    storage.close()
+
+    df = pd.read_csv(tmp_path / "messages.csv.gz", encoding="utf-8-sig")
+    assert list(df.columns) == list(_messages("x").columns)
+    assert df["message"].tolist() == ["first", "first", "second", "second"]
+
+
+def test_sinks_write_local_timestamps_as_local_time(tmp_path):
+    """Columns converted with convert_utc_to_local keep their local time in CSV and SQLite."""
+    ctx = ETLContext.from_args(input_dir=str(tmp_path), output_dir=str(tmp_path))
+    storage = Storage(ctx)
+    df = _messages("hi").assign(timestamp=["2025-09-14T20:00:00Z", None])
+    df = convert_utc_to_local(df, "timestamp", tz="Asia/Hong_Kong")
+    storage.write_csv(df, "messages")
+    storage.write_sqlite(df, "messages")
+    storage.close()
+
+    assert pd.read_csv(tmp_path / "messages.csv", encoding="utf-8-sig")["timestamp"].tolist()[0] == "2025-09-15 04:00:00"
+    conn = sqlite3.connect(ctx.db_path)
+    rows = conn.execute("SELECT timestamp FROM messages ORDER BY message_id").fetchall()
+    conn.close()
+    assert rows == [("2025-09-15 04:00:00",), (None,)]
+
+
+def test_write_csv_is_readable_before_close(tmp_path):
+    """Each write_csv call flushes its file; the context manager closes everything."""
+    ctx = ETLContext.from_args(input_dir=str(tmp_path), output_dir=str(tmp_path))
+    with Storage(ctx) as storage:
+        storage.write_csv(_messages("first"), "messages")
+        assert pd.read_csv(tmp_path / "messages.csv", encoding="utf-8-sig")["message"].tolist() == ["first"] * 2
+        storage.write_csv(_messages("second"), "messages")
+        assert len(pd.read_csv(tmp_path / "messages.csv", encoding="utf-8-sig")) == 4
+    assert not storage._csv._files
+
+
+def test_csv_sink_rotates_by_size_and_batch_dt(tmp_path):
+    """Rotated files each carry their own header."""
+    from etl.load.csv_sink import CsvSink
+
+    sink = CsvSink(str(tmp_path), compression="bz2", rotate_bytes=1, rotate_by_batch_dt=True)
+    sink.write(_messages("first"), "messages")
+    sink.write(_messages("second").assign(batch_dt="2025-09-15"), "messages")
+    sink.write(_messages("third"), "messages")
+    sink.close()
+
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert names == [
+        "messages_2025-09-14.0000.csv.bz2",
+        "messages_2025-09-14.0001.csv.bz2",
+        "messages_2025-09-15.0000.csv.bz2",
+    ]
+    df = pd.read_csv(tmp_path / "messages_2025-09-14.0001.csv.bz2", encoding="utf-8-sig")
+    assert df["message"].tolist() == ["third", "third"]
+
+    with pytest.raises(ValueError):
+        CsvSink(str(tmp_path), compression="zip")
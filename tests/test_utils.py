@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+from etl.core.utils import (
+    convert_utc_to_local,
+    extract_message_fields,
+    extract_message_id,
+    extract_message_timestamp,
+    extract_speaker_name,
+    extract_speaker_contact,
+    extract_message_content,
+    format_utc_timestamps,
+    get_timezone,
+    parse_utc_timestamps,
+)
+
+MESSAGE_ID = "8d798677-9a33-47d1-876c-a0efe27a7222"
+SAYS_LINE = "2025-09-14T05:19:14.864688Z Bob Demo - bob@example.com says:"
+
+BODIES = [
+    f"Message ID: {MESSAGE_ID}\n{SAYS_LINE}\nHello team,\nsee attached.\n",
+    f"Message ID: {MESSAGE_ID} {SAYS_LINE} Hello team",  # HTML-stripped, single line
+    f"message id:{MESSAGE_ID}\r\n{SAYS_LINE}   \r\n",  # lowercase label, empty content
+    f"Message ID: {MESSAGE_ID}\n2025-09-14T05:19:14Z Mary-Jane O'Neil - mj@example.com says: hi",
+    f"Intro says: hello\nMessage ID: {MESSAGE_ID}\n{SAYS_LINE}\nbody",  # preamble conflict
+    f"Message ID: not-a-uuid\n{SAYS_LINE}\nbody",
+    f"Message ID: {MESSAGE_ID}\nno metadata line here",
+]
+
+
+@pytest.mark.parametrize("text", BODIES)
+def test_extract_message_fields_matches_per_field_extractors(text):
+    """The single-pass extractor returns exactly what the per-field extractors return."""
+    assert extract_message_fields(text) == (
+        extract_message_id(text),
+        extract_message_timestamp(text),
+        extract_speaker_name(text),
+        extract_speaker_contact(text),
+        extract_message_content(text),
+    )
+
+
+def test_extract_message_fields_without_label():
+    """Bodies without a 'Message ID:' label yield no message."""
+    assert extract_message_fields(f"{SAYS_LINE} hello") is None
+
+
+def test_utc_timestamps_round_trip():
+    """ISO-8601 ...Z text parses to UTC datetimes and formats back unchanged; bad values become None."""
+    text = pd.Series(["2025-09-14T05:19:14.864688Z", "2025-09-14T05:19:14Z", "not a date", None])
+    parsed = parse_utc_timestamps(text)
+    assert str(parsed.dt.tz) == "UTC"
+    assert format_utc_timestamps(parsed).tolist() == [
+        "2025-09-14T05:19:14.864688Z", "2025-09-14T05:19:14Z", None, None,
+    ]
+
+
+def test_utc_timestamps_text_format():
+    """Fractions are written as six digits; years 0001-9999 survive nanosecond input, later years do not parse."""
+    text = pd.Series([
+        "2025-09-14T05:19:14.5Z", "1600-01-01T00:00:00Z", "2025-09-14T05:19:14.123456789Z", "10000-01-01T00:00:00Z",
+    ])
+    assert format_utc_timestamps(parse_utc_timestamps(text)).tolist() == [
+        "2025-09-14T05:19:14.500000Z", "1600-01-01T00:00:00Z", "2025-09-14T05:19:14.123456Z", None,
+    ]
+
+
+def test_convert_utc_to_local_keeps_datetimes():
+    """The converted column stays tz-aware; the zone object is resolved once."""
+    df = pd.DataFrame({"timestamp": ["2025-09-14T20:00:00Z"]})
+    df = convert_utc_to_local(df, "timestamp", tz="Asia/Hong_Kong")
+    assert str(df["timestamp"].dt.tz) == "Asia/Hong_Kong"
+    assert df["timestamp"].iloc[0].strftime("%Y-%m-%d %H:%M") == "2025-09-15 04:00"
+    assert get_timezone("Asia/Hong_Kong") is get_timezone("Asia/Hong_Kong")
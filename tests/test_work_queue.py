@@ -0,0 +1,83 @@
+import sqlite3
+from etl.core.context import ETLContext
+from etl.extract.sources import iter_sources
+from etl.load.work_queue import WorkQueue
+from examples.generate_sample_eml import generate_eml
+
+
+def _queue(tmp_path, **kwargs):
+    generate_eml(str(tmp_path / "in"), count=4)
+    ctx = ETLContext.from_args(input_dir=str(tmp_path / "in"), output_dir=str(tmp_path / "out"))
+    queue = WorkQueue(ctx, **kwargs)
+    return queue, list(iter_sources(ctx.input_dir))
+
+
+def test_claims_are_exclusive_and_completion_checks_owner(tmp_path):
+    """Workers never get the same file; only the lease owner can complete it."""
+    queue, sources = _queue(tmp_path)
+    assert queue.enqueue(sources) == 4
+    assert queue.enqueue(sources) == 0
+
+    first = queue.claim("w1", 3)
+    second = queue.claim("w2", 3)
+    assert [s.key for s in first] == [s.key for s in sources[:3]]
+    assert [s.key for s in second] == [sources[3].key]
+    assert queue.claim("w3", 3) == []
+
+    queue.complete("w2", [(first[0].key, 1, 1, "h", "SUCCESS")])  # not w2's lease
+    queue.complete("w1", [(s.key, 1, 1, "h", "SUCCESS") for s in first])
+    queue.complete("w2", [(second[0].key, None, None, None, "FAILED")])
+    assert queue.counts() == {"DONE": 3, "FAILED": 1}
+    assert not queue.has_open_work()
+
+
+def test_expired_leases_are_requeued_then_failed(tmp_path):
+    """A dead worker's files return to PENDING until max_attempts is reached."""
+    queue, sources = _queue(tmp_path, lease_seconds=-1, max_attempts=2)
+    queue.enqueue(sources[:1])
+
+    assert len(queue.claim("dead-1", 10)) == 1
+    assert len(queue.claim("dead-2", 10)) == 1  # expired lease re-queued and claimed again
+    assert queue.claim("w3", 10) == []
+    assert queue.counts() == {"FAILED": 1}
+
+
+def test_queue_workers_drain_queue_into_own_csv_files(tmp_path):
+    """Enqueue once, then workers load everything with per-worker CSV names."""
+    from main import enqueue_inputs, run_pipeline
+
+    generate_eml(str(tmp_path / "in"), count=5)
+    out = tmp_path / "out"
+    assert enqueue_inputs(str(tmp_path / "in"), str(out)) == 5
+    assert enqueue_inputs(str(tmp_path / "in"), str(out)) == 0
+
+    run_pipeline(str(tmp_path / "in"), str(out), chunk_size=2, worker=True, worker_id="w1")
+    run_pipeline(str(tmp_path / "in"), str(out), chunk_size=2, worker=True, worker_id="w2")
+
+    conn = sqlite3.connect(out / "etl_demo.db")
+    assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 5
+    assert conn.execute("SELECT status, COUNT(*) FROM work_queue GROUP BY status").fetchall() == [("DONE", 5)]
+    conn.close()
+    assert (out / "messages.w1.csv").exists()
+    assert not (out / "messages.w2.csv").exists()
+
+
+def test_restarted_worker_keeps_its_csv_rows(tmp_path):
+    """A worker restarted with the same id appends to its CSV files instead of truncating them."""
+    import os
+    import pandas as pd
+    from main import enqueue_inputs, run_pipeline
+
+    out = tmp_path / "out"
+    generate_eml(str(tmp_path / "in"), count=3)
+    enqueue_inputs(str(tmp_path / "in"), str(out))
+    run_pipeline(str(tmp_path / "in"), str(out), chunk_size=2, worker=True, worker_id="w1")
+
+    generate_eml(str(tmp_path / "more"), count=5)
+    for name in ("sample_4.eml", "sample_5.eml"):
+        os.replace(tmp_path / "more" / name, tmp_path / "in" / name)
+    assert enqueue_inputs(str(tmp_path / "in"), str(out)) == 2
+    run_pipeline(str(tmp_path / "in"), str(out), chunk_size=2, worker=True, worker_id="w1")
+
+    messages = pd.read_csv(out / "messages.w1.csv", encoding="utf-8-sig")
+    assert sorted(messages["email_id"]) == [f"sample_{i}" for i in range(1, 6)]